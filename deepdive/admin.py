@@ -3,8 +3,12 @@ from django.contrib.auth.models import Group
 
 from deepdive.auth.models import DeepDiveUser
 from deepdive.models import (
+    CompletionCacheEntry,
     Database,
     DatabaseFile,
+    DatabaseJob,
+    DatabaseSchemaSnapshot,
+    MaterializedIndex,
     Message,
     Session,
     SharedDatabase,
@@ -19,12 +23,16 @@ admin.site.register(DeepDiveUser)
 admin.site.register(Session)
 admin.site.register(Database)
 admin.site.register(DatabaseFile)
+admin.site.register(DatabaseJob)
+admin.site.register(DatabaseSchemaSnapshot)
+admin.site.register(MaterializedIndex)
 admin.site.register(Message)
 admin.site.register(SharedDatabase)
 admin.site.register(SharedSession)
 admin.site.register(SharedMessage)
 admin.site.register(SharedVisualization)
 admin.site.register(UnparsedQuery)
+admin.site.register(CompletionCacheEntry)
 admin.site.register(Visualization)
 
 # unregister the Group model from admin since we no longer use Django's default auth models
@@ -1,4 +1,6 @@
+from functools import lru_cache
 from pathlib import Path
+from typing import Tuple
 
 import json
 import pandas as pd
@@ -10,6 +12,7 @@ from deepdive.database.file_based_client_helper import (
     create_table_schema,
     sanitize_table_name,
 )
+from deepdive.jobs import enqueue_file_conversion
 from deepdive.models import Database, DatabaseFile, DatabaseType
 from deepdive.schema import DatabaseSchema, SqlDialect, TableConfig
 
@@ -285,8 +288,29 @@ def add_default_database(user, db_config, db_schema_json):
 
 
 def add_default_csv_database(user):
+    schema, table_configs = _parse_default_excel()
     with default_storage.open(DEFAULT_EXCEL_S3_PATH) as default_excel:
         default_database = Database(user=user, **DEFAULT_EXCEL_DATABASE_CONFIG)
+        default_database.schema = schema
+        default_database.save()
+
+        database_file = DatabaseFile(
+            user=user,
+            database=default_database,
+            file=default_excel,
+            configs=table_configs,
+        )
+        database_file.save()
+    enqueue_file_conversion(default_database)
+
+
+@lru_cache(maxsize=1)
+def _parse_default_excel() -> Tuple[str, str]:
+    """
+    Returns the schema and table configs of the default Excel database, parsed once
+    per process as they're the same for every user
+    """
+    with default_storage.open(DEFAULT_EXCEL_S3_PATH) as default_excel:
         excel_file = pd.ExcelFile(default_excel)
         table_schemas = []
         table_configs = {}
@@ -300,14 +324,5 @@ def add_default_csv_database(user):
             table_configs[sanitized_sheet_name] = TableConfig(
                 name=sanitized_sheet_name
             ).model_dump()
-        db_schema = DatabaseSchema(tables=table_schemas, sql_dialect=SqlDialect.SQLITE)
-        default_database.schema = db_schema.model_dump_json(exclude_none=True)
-        default_database.save()
-
-        database_file = DatabaseFile(
-            user=user,
-            database=default_database,
-            file=default_excel,
-            configs=json.dumps(table_configs),
-        )
-        database_file.save()
+    db_schema = DatabaseSchema(tables=table_schemas, sql_dialect=SqlDialect.SQLITE)
+    return db_schema.model_dump_json(exclude_none=True), json.dumps(table_configs)
@@ -1,15 +1,29 @@
+import asyncio
 import enum
 import json
-from typing import Dict, Tuple
+import logging
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple, Union
 
+from asgiref.sync import sync_to_async
 from channels.generic.websocket import AsyncWebsocketConsumer
 from django.core.serializers.json import DjangoJSONEncoder
 
+from deepdive.database import LoadProgress, ProgressCallback
 from deepdive.models import Message, Session, Visualization
-from deepdive.deepdive_client import DeepDiveClient
+from deepdive.deepdive_client import DeepDiveClient, DeepDiveResponse
+from deepdive.jobs import enqueue_schema_refresh
 from deepdive.serializers import MessageSerializer, VisualizationSerializer
+from deepdive.transport import (
+    ResultData,
+    ResultFormat,
+    encode_binary_frame,
+    to_arrow,
+    to_columnar,
+)
 from deepdive.viz.parser import parse_spec
 
+logger = logging.getLogger(__name__)
+
 
 class DeepDiveConsumer(AsyncWebsocketConsumer):
     """
@@ -21,37 +35,120 @@ class DeepDiveConsumer(AsyncWebsocketConsumer):
         super().__init__(args, kwargs)
         self.session = None
         self.processor = None
+        self.initialize_task = None
+        self.loaded = False
+        self.initialized = False
+        self.pending_requests = []
 
     async def connect(self):
         session_id = self.scope["url_route"]["kwargs"]["uuid"]
         self.session = await Session.objects.select_related("database").aget(
             id=session_id
         )
-        self.processor = RequestProcessor(self.session)
-        await self.processor.initialize_async()
+        self.processor = RequestProcessor(self.session, self._send_response_async)
+
+        # accept right away and ingest in the background, so that large uploads
+        # don't run into the websocket connect timeout
         await self.accept()
+        self.initialize_task = asyncio.create_task(self._initialize_async())
 
     async def receive(self, text_data=None, bytes_data=None):
-        response = await self.processor.process_async(text_data)
-        await self.send(text_data=response)
+        if not self.initialized:
+            # requests received while loading are processed in order once ready
+            self.pending_requests.append(text_data)
+            return
+
+        await self._send_response_async(await self.processor.process_async(text_data))
 
     async def disconnect(self, code):
+        if self.initialize_task and not self.initialize_task.done():
+            self.initialize_task.cancel()
         await self.processor.finalize_async()
 
+    async def _initialize_async(self):
+        loop = asyncio.get_running_loop()
+
+        def on_progress(progress: LoadProgress):
+            # invoked from the ingestion thread
+            asyncio.run_coroutine_threadsafe(self._send_loading_async(progress), loop)
+
+        try:
+            await self.processor.initialize_async(on_progress)
+        except Exception as ex:
+            logger.exception("Failed to initialize session: %s", self.session.id)
+            self.loaded = True
+            await self.send(
+                text_data=self.processor.serialize_event(
+                    500, EventType.LOADING, {"ready": False}, str(ex)
+                )
+            )
+            await self.close()
+            return
+
+        self.loaded = True
+        await self.send(
+            text_data=self.processor.serialize_event(
+                200, EventType.LOADING, {"ready": True}, ""
+            )
+        )
+
+        while self.pending_requests:
+            request = self.pending_requests.pop(0)
+            await self._send_response_async(await self.processor.process_async(request))
+        self.initialized = True
+
+        # picked up by the next session once refreshed, so as to not delay this one
+        try:
+            await sync_to_async(enqueue_schema_refresh)(self.session.database)
+        except Exception:
+            logger.exception("Failed to enqueue schema refresh: %s", self.session.id)
+
+    async def _send_response_async(self, response: Union[str, bytes]):
+        if isinstance(response, bytes):
+            await self.send(bytes_data=response)
+        else:
+            await self.send(text_data=response)
+
+    async def _send_loading_async(self, progress: LoadProgress):
+        # once loaded, progress is of tables loaded on first being queried
+        await self.send(
+            text_data=self.processor.serialize_event(
+                200,
+                EventType.LOADING,
+                {
+                    "ready": self.loaded,
+                    "tables_loaded": progress.tables_loaded,
+                    "total_tables": progress.total_tables,
+                    "rows_loaded": progress.rows_loaded,
+                },
+                "",
+            )
+        )
+
 
 class RequestProcessor:
     """
     Internal class to handle websocket requests.
     """
 
-    def __init__(self, session: Session):
+    def __init__(
+        self,
+        session: Session,
+        send: Optional[Callable[[Union[str, bytes]], Awaitable[None]]] = None,
+    ):
         self.session = session
         self.client = DeepDiveClient(self.session)
+        # pushes events to the websocket ahead of the response to a request
+        self.send = send
+        # query results being persisted, see _save_data_later
+        self.pending_saves: List[asyncio.Task] = []
 
-    async def initialize_async(self):
-        await self.client.initialize_async()
+    async def initialize_async(self, on_progress: Optional[ProgressCallback] = None):
+        await self.client.initialize_async(on_progress)
 
-    async def process_async(self, text_data: str):
+    async def process_async(self, text_data: str) -> Union[str, bytes]:
+        # requests may read results persisted while processing the previous ones
+        await self._wait_for_saves_async()
         try:
             request = json.loads(text_data)
             self._validate_request(request)
@@ -67,7 +164,7 @@ class RequestProcessor:
             elif action == ActionType.UPDATE_VIZ_SPEC:
                 response, error_message = await self._update_viz_spec_async(request)
             elif action == ActionType.GENERATE_REPORT:
-                response, error_message = await self._generate_report_async()
+                response, error_message = await self._generate_report_async(request)
             elif action == ActionType.ADD_VISUALIZATION:
                 response, error_message = await self._add_new_viz_async(request)
             elif action == ActionType.REMOVE_VISUALIZATION:
@@ -83,23 +180,40 @@ class RequestProcessor:
             )
 
     async def finalize_async(self):
+        await self._wait_for_saves_async()
         await self.client.finalize_async()
 
     async def _process_question_async(self, request) -> Tuple[Dict, str]:
         question = request["question"]
         await Message.objects.acreate(session=self.session, question=question)
 
-        response = await self.client.process_question_async(question)
+        on_partial_query = None
+        if request.get("stream") and self.send:
+
+            async def on_partial_query(sql_query: str):
+                await self.send(
+                    self.serialize_event(
+                        200,
+                        EventType.PARTIAL_QUERY,
+                        {"question": question, "sql_query": sql_query},
+                        "",
+                    )
+                )
+
+        response = await self.client.process_question_async(question, on_partial_query)
         message = await Message.objects.acreate(
             session=self.session,
             message_type=Message.MessageType.RESPONSE,
             question=question,
             sql_query=response.sql_query,
-            data=response.data,
             visualization_spec=response.visualization_spec,
             error_message=response.error_message,
         )
-        return MessageSerializer(message).data, response.error_message
+        self._save_data_later(message, response)
+        serialized = self._with_result_data(
+            request, MessageSerializer(message).data, response
+        )
+        return {**serialized, "timings": response.timings}, response.error_message
 
     async def _process_sql_query_async(self, request) -> Tuple[Dict, str]:
         message_id = request["message_id"]
@@ -108,11 +222,16 @@ class RequestProcessor:
         sql_query = request["sql_query"]
         response = await self.client.process_query_async(sql_query=sql_query)
         message.sql_query = response.sql_query
-        message.data = response.data
         message.visualization_spec = response.visualization_spec
         message.error_message = response.error_message
+        if response.dataframe is None:
+            message.data = None
         await message.asave()
-        return MessageSerializer(message).data, response.error_message
+        self._save_data_later(message, response)
+        return (
+            self._with_result_data(request, MessageSerializer(message).data, response),
+            response.error_message,
+        )
 
     async def _update_viz_spec_async(self, request) -> Tuple[Dict, str]:
         message_id = request["message_id"]
@@ -121,28 +240,51 @@ class RequestProcessor:
 
         response = await self.client.process_viz_spec_async(viz_spec)
         message.sql_query = response.sql_query
-        message.data = response.data
         message.visualization_spec = response.visualization_spec
         message.error_message = response.error_message
+        if response.dataframe is None:
+            message.data = None
         await message.asave()
-        return MessageSerializer(message).data, response.error_message
+        self._save_data_later(message, response)
+        return (
+            self._with_result_data(request, MessageSerializer(message).data, response),
+            response.error_message,
+        )
+
+    async def _generate_report_async(self, request) -> Tuple[Dict, str]:
+        viz_ids = []
 
-    async def _generate_report_async(self) -> Tuple[Dict, str]:
-        report = await self.client.generate_report_async()
-        for question, response in report.items():
+        async def on_response(question: str, response: DeepDiveResponse):
             if response.error_message:
-                continue
+                return
             viz = await Visualization.objects.acreate(
                 session=self.session,
                 title=question,
                 question=question,
                 sql_query=response.sql_query,
-                data=response.data,
+                data="",
                 visualization_spec=response.visualization_spec,
                 error_message=response.error_message,
             )
+            self._save_data_later(viz, response)
             self.client.add_new_viz_to_report(viz)
-        return {}, ""
+            viz_ids.append(viz.id)
+
+            if self.send:
+                await self.send(
+                    self.serialize_event(
+                        200,
+                        EventType.REPORT_VISUALIZATION,
+                        self._with_result_data(
+                            request, VisualizationSerializer(viz).data, response
+                        ),
+                        "",
+                    )
+                )
+
+        await self.client.generate_report_async(on_response)
+        # the visualizations were pushed as they were created, this marks completion
+        return {"visualization_ids": viz_ids}, ""
 
     async def _add_new_viz_async(self, request) -> Tuple[Dict, str]:
         message_id = request["message_id"]
@@ -173,11 +315,17 @@ class RequestProcessor:
 
         response = await self.client.process_viz_spec_async(viz_spec)
         viz.sql_query = response.sql_query
-        viz.data = response.data
         viz.visualization_spec = response.visualization_spec
         viz.error_message = response.error_message
-
-        return VisualizationSerializer(viz).data, response.error_message
+        if response.dataframe is None:
+            viz.data = None
+
+        return (
+            self._with_result_data(
+                request, VisualizationSerializer(viz).data, response
+            ),
+            response.error_message,
+        )
 
     async def _commit_viz_async(self, request) -> Tuple[Dict, str]:
         viz_id = request["viz_id"]
@@ -197,6 +345,51 @@ class RequestProcessor:
         if action not in ActionType:
             raise ValueError("Undefined action received")
         ActionType.validate(action, request)
+        if request.get("result_format", ResultFormat.JSON) not in [
+            result_format.value for result_format in ResultFormat
+        ]:
+            raise ValueError(f"Invalid result_format for {action}")
+
+    def _save_data_later(self, instance, response: DeepDiveResponse):
+        """
+        Persists the JSON-encoded query result of a message or visualization once the
+        response is sent, as responses in other result formats don't include it
+        """
+
+        async def save_async():
+            try:
+                instance.data = await sync_to_async(
+                    response.get_data, thread_sensitive=False
+                )()
+                await instance.asave(update_fields=["data"])
+            except Exception:
+                logger.exception("Failed to save data: %s", instance.id)
+
+        self.pending_saves.append(asyncio.create_task(save_async()))
+
+    async def _wait_for_saves_async(self):
+        pending_saves, self.pending_saves = self.pending_saves, []
+        await asyncio.gather(*pending_saves)
+
+    def _with_result_data(
+        self, request: Dict, serialized: Dict, response: DeepDiveResponse
+    ) -> Dict:
+        """
+        Swaps the data of a serialized message or visualization for the query result
+        itself, encoded in the request's result format upon serialization, and flags
+        results that were downsampled.
+        """
+        if response.downsampled:
+            serialized = {
+                **serialized,
+                "downsampled": True,
+                "original_row_count": response.original_row_count,
+            }
+
+        if response.dataframe is None:
+            return serialized
+        result_format = ResultFormat(request.get("result_format", ResultFormat.JSON))
+        return {**serialized, "data": ResultData(result_format, response)}
 
     def _generate_error_response(self, action: str, request: Dict) -> Dict:
         response = {}
@@ -207,9 +400,41 @@ class RequestProcessor:
             response["id"] = request["message_id"]
         return response
 
+    def serialize_event(
+        self, status: int, event: str, data: Dict, error_message: str
+    ) -> Union[str, bytes]:
+        return self._serialize_response(status, event, data, error_message)
+
     def _serialize_response(
         self, status: int, action: str, response: Dict, error_message: str
-    ) -> str:
+    ) -> Union[str, bytes]:
+        result_data = response.get("data") if isinstance(response, dict) else None
+        if isinstance(result_data, ResultData):
+            df = result_data.dataframe
+            if result_data.result_format == ResultFormat.JSON:
+                # cached, for the result to be persisted as is
+                return self._serialize_response(
+                    status,
+                    action,
+                    {**response, "data": result_data.response.get_data()},
+                    error_message,
+                )
+            if result_data.result_format == ResultFormat.ARROW:
+                response = {
+                    **response,
+                    "data": {"format": ResultFormat.ARROW, "num_rows": len(df)},
+                }
+                return encode_binary_frame(
+                    {
+                        "status": status,
+                        "action": action,
+                        "data": response,
+                        "error_message": error_message,
+                    },
+                    to_arrow(df),
+                )
+            response = {**response, "data": to_columnar(df)}
+
         return json.dumps(
             {
                 "status": status,
@@ -235,6 +460,16 @@ class ActionTypeMeta(enum.EnumMeta):
             return True
 
 
+class EventType(str, enum.Enum):
+    """
+    Enum class for a set of events pushed by the server outside of a request/response.
+    """
+
+    LOADING = "loading"
+    REPORT_VISUALIZATION = "report_visualization"
+    PARTIAL_QUERY = "partial_query"
+
+
 class ActionType(str, enum.Enum, metaclass=ActionTypeMeta):
     """
     Enum class for a set of supported actions.
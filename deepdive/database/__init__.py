@@ -1,31 +1,37 @@
-from typing import Dict, List
+import logging
+from typing import Dict, List, Optional
 
 from django.core.files.uploadedfile import UploadedFile
 
 from deepdive.database.bigquery_client import BigQueryClient
 from deepdive.database.bigquery_schema_client import BigQuerySchemaClient
-from deepdive.database.client import DatabaseClient
+from deepdive.database.client import DatabaseClient, LoadProgress, ProgressCallback
 from deepdive.database.csv_client import CSVClient
 from deepdive.database.excel_client import ExcelClient
 from deepdive.database.file_based_client import FileBasedClient
 from deepdive.database.parquet_client import ParquetClient
+from deepdive.database.schema_client import SchemaClient
 from deepdive.database.snowflake_client import SnowflakeClient
 from deepdive.database.snowflake_schema_client import SnowflakeSchemaClient
 from deepdive.models import Database, DatabaseType
 from deepdive.schema import DatabaseSchema, TableConfig, TablePreview
 
+logger = logging.getLogger(__name__)
 
-def get_db_client(database: Database) -> DatabaseClient:
+
+def get_db_client(
+    database: Database, on_progress: Optional[ProgressCallback] = None
+) -> DatabaseClient:
     if database.database_type == DatabaseType.SNOWFLAKE:
-        return SnowflakeClient(database)
+        return SnowflakeClient(database, on_progress)
     elif database.database_type == DatabaseType.BIGQUERY:
-        return BigQueryClient(database)
+        return BigQueryClient(database, on_progress)
     elif database.database_type == DatabaseType.CSV:
-        return CSVClient(database)
+        return CSVClient(database, on_progress)
     elif database.database_type == DatabaseType.EXCEL:
-        return ExcelClient(database)
+        return ExcelClient(database, on_progress)
     elif database.database_type == DatabaseType.PARQUET:
-        return ParquetClient(database)
+        return ParquetClient(database, on_progress)
     else:
         raise Exception("Unsupported database type! " + database.database_type)
 
@@ -59,14 +65,24 @@ def preview_table(
     return ExcelClient.preview_table(uploaded_file, sanitized_orig_table_name, config)
 
 
-def fetch_schema(database: Database) -> DatabaseSchema:
-    schema_client = None
+def get_schema_client(database: Database) -> SchemaClient:
     if database.database_type == DatabaseType.SNOWFLAKE:
-        schema_client = SnowflakeSchemaClient(database)
+        return SnowflakeSchemaClient(database)
     elif database.database_type == DatabaseType.BIGQUERY:
-        schema_client = BigQuerySchemaClient(database)
+        return BigQuerySchemaClient(database)
     else:
         raise Exception(
             "Cannot fetch schema for database type: " + database.database_type
         )
-    return schema_client.fetch().model_copy()
+
+
+def fetch_schema(database: Database) -> DatabaseSchema:
+    schema_client = get_schema_client(database)
+    schema = schema_client.fetch().model_copy()
+    logger.info(
+        "Fetched schema of %d tables for database %s, timings: %s",
+        len(schema.tables),
+        database.id,
+        schema_client.timings,
+    )
+    return schema
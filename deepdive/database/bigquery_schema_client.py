@@ -1,11 +1,12 @@
 import itertools
 import logging
-from typing import List
+from collections import defaultdict
+from typing import Dict, List
 
 from google.cloud.bigquery.schema import SchemaField
 
 from deepdive.database.bigquery_client import _get_bigquery_client
-from deepdive.database.schema_client import SchemaClient
+from deepdive.database.schema_client import SchemaClient, TableVersions
 from deepdive.models import Database
 from deepdive.schema import (
     ColumnSchema,
@@ -18,6 +19,22 @@ from deepdive.schema import (
 
 logger = logging.getLogger(__name__)
 
+# single scan of the (nested) columns of all tables in a dataset
+COLUMNS_QUERY = """
+select p.table_name, p.field_path, p.data_type, p.description
+from `{dataset}.INFORMATION_SCHEMA.COLUMN_FIELD_PATHS` p
+join `{dataset}.INFORMATION_SCHEMA.COLUMNS` c using (table_name, column_name)
+order by p.table_name, c.ordinal_position
+"""
+
+PROBE_QUERY = """
+select t.table_id as table_name, t.last_modified_time as last_altered,
+    count(c.column_name) as column_count
+from `{dataset}.__TABLES__` t
+left join `{dataset}.INFORMATION_SCHEMA.COLUMNS` c on c.table_name = t.table_id
+group by table_name, last_altered
+"""
+
 
 # Taken from: https://cloud.google.com/bigquery/docs/reference/rest/v2/tables#TableFieldSchema.FIELDS.type
 def _parse_bigquery_type(bigquery_type: str) -> str:
@@ -48,21 +65,84 @@ class BigQuerySchemaClient(SchemaClient):
         self.client = _get_bigquery_client()
 
     def fetch(self) -> DatabaseSchema:
-        return DatabaseSchema(
-            sql_dialect=SqlDialect.GOOGLE_SQL, tables=self._fetch_tables()
-        )
+        with self.timed("tables"):
+            tables = self._fetch_tables()
+        return DatabaseSchema(sql_dialect=SqlDialect.GOOGLE_SQL, tables=tables)
+
+    def probe(self) -> TableVersions:
+        query = PROBE_QUERY.format(dataset=self.database.bigquery_dataset_id)
+        with self.timed("probe"):
+            rows = list(self.client.query(query).result())
+        return {
+            row["table_name"]: {
+                "last_altered": str(row["last_altered"]),
+                "column_count": row["column_count"],
+            }
+            for row in rows
+        }
+
+    def fetch_tables(self, table_names: List[str]) -> List[TableSchema]:
+        with self.timed("columns"):
+            return self.map_concurrently(self._fetch_table, table_names)
 
     def _fetch_tables(self) -> List[TableSchema]:
-        tables = []
-        for table in self.client.list_tables(self.database.bigquery_dataset_id):
-            table = self.client.get_table(
-                f"{self.database.bigquery_dataset_id}.{table.table_id}"
+        try:
+            return self._fetch_tables_in_bulk()
+        except Exception:
+            logger.warning(
+                "Failed to scan INFORMATION_SCHEMA.COLUMN_FIELD_PATHS, "
+                "fetching columns per table",
+                exc_info=True,
             )
-            columns = list(
-                itertools.chain(*[self._get_columns(field) for field in table.schema])
+            return self._fetch_tables_per_table()
+
+    def _fetch_tables_in_bulk(self) -> List[TableSchema]:
+        query = COLUMNS_QUERY.format(dataset=self.database.bigquery_dataset_id)
+        columns: Dict[str, List[ColumnSchema]] = defaultdict(list)
+        repeated_paths = []
+        for row in self.client.query(query).result():
+            field_path, data_type = row["field_path"], row["data_type"]
+            if any(
+                field_path == path or field_path.startswith(path + ".")
+                for path in repeated_paths
+            ):
+                continue
+            if data_type.startswith("ARRAY<"):
+                logger.error(
+                    "BigQuery dataset has REPEATED field, skipping: " + field_path
+                )
+                repeated_paths.append(field_path)
+                continue
+            if data_type.startswith("STRUCT<"):  # denormalized into its subfields
+                continue
+
+            columns[row["table_name"]].append(
+                ColumnSchema(
+                    name=field_path,
+                    column_type=_parse_bigquery_type(data_type),
+                    comment=str(row["description"]),
+                )
             )
-            tables.append(TableSchema(name=table.table_id, columns=columns))
-        return tables
+        return [
+            TableSchema(name=table_name, columns=table_columns)
+            for table_name, table_columns in columns.items()
+        ]
+
+    def _fetch_tables_per_table(self) -> List[TableSchema]:
+        with self.timed("table_names"):
+            table_ids = [
+                table.table_id
+                for table in self.client.list_tables(self.database.bigquery_dataset_id)
+            ]
+        with self.timed("columns"):
+            return self.map_concurrently(self._fetch_table, table_ids)
+
+    def _fetch_table(self, table_id: str) -> TableSchema:
+        table = self.client.get_table(f"{self.database.bigquery_dataset_id}.{table_id}")
+        columns = list(
+            itertools.chain(*[self._get_columns(field) for field in table.schema])
+        )
+        return TableSchema(name=table.table_id, columns=columns)
 
     def _get_columns(self, field: SchemaField) -> List[ColumnSchema]:
         if field.mode == "REPEATED":
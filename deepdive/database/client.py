@@ -1,4 +1,6 @@
 from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import Callable, Optional, Set
 
 from pandas import DataFrame
 
@@ -6,10 +8,27 @@ from deepdive.models import Database
 from deepdive.schema import DatabaseSchema
 
 
+@dataclass
+class LoadProgress:
+    tables_loaded: int
+    total_tables: int
+    rows_loaded: int = 0
+
+
+ProgressCallback = Callable[[LoadProgress], None]
+
+
 class DatabaseClient(ABC):
-    def __init__(self, database: Database):
+    def __init__(
+        self, database: Database, on_progress: Optional[ProgressCallback] = None
+    ):
+        self.on_progress = on_progress
         self.initialize(database)
 
+    def report_progress(self, progress: LoadProgress):
+        if self.on_progress:
+            self.on_progress(progress)
+
     @staticmethod
     @abstractmethod
     def validate(database: Database):
@@ -26,3 +45,9 @@ class DatabaseClient(ABC):
     @abstractmethod
     def execute_query(self, query: str) -> DataFrame:
         pass
+
+    def load_tables(self, table_names: Set[str]):
+        """
+        Loads the given tables, if needed, before a query reads from them
+        """
+        pass
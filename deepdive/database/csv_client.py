@@ -1,10 +1,12 @@
 from pathlib import Path
-from typing import Dict, List
+from typing import Dict, Iterator, List, Tuple
 
 import pandas as pd
 from django.core.files.uploadedfile import UploadedFile
 
+from deepdive.database.csv_reader import get_chunk_size, get_csv_reader
 from deepdive.database.file_based_client import FileBasedClient
+from deepdive.database.file_cache import open_cached
 from deepdive.database.file_based_client_helper import (
     NUM_SAMPLE_ROWS,
     create_table_schema,
@@ -21,7 +23,9 @@ class CSVClient(FileBasedClient):
 
     def preview_tables(uploaded_file: UploadedFile) -> List[TablePreview]:
         delimiter = "," if Path(uploaded_file.name).suffix == ".csv" else "\t"
-        sample_data = pd.read_csv(uploaded_file, nrows=NUM_SAMPLE_ROWS + 1, sep=delimiter)
+        sample_data = get_csv_reader().read(
+            uploaded_file, delimiter, nrows=NUM_SAMPLE_ROWS + 1
+        )
         table_schema = create_table_schema(
             sanitize_table_name(Path(uploaded_file.name).stem), sample_data
         )
@@ -33,22 +37,31 @@ class CSVClient(FileBasedClient):
             )
         ]
 
+    def get_table_names(self, db_file: DatabaseFile) -> List[str]:
+        return [self.db_schema.tables[0].name]
+
     def read_data(self, db_file: DatabaseFile) -> Dict[str, pd.DataFrame]:
-        table_name = self.db_schema.tables[0].name
-        delimiter = "," if Path(db_file.file.name).suffix == ".csv" else "\t"
-        return {
-            table_name: pd.read_csv(
-                db_file.file,
-                names=self._get_column_names(table_name),
-                header=None,
-                skiprows=1,
-                sep=delimiter,
-            ),
-        }
-
-    def _get_column_names(self, table_name: str) -> List[str]:
-        for table in self.db_schema.tables:
-            if table.name == table_name:
-                return [column.name for column in table.columns]
-
-        raise Exception(f"Could not find table schema for table: {table_name}")
+        table = self.db_schema.tables[0]
+        with open_cached(db_file.file) as file:
+            return {
+                table.name: get_csv_reader().read(
+                    file, self._get_delimiter(db_file), table
+                )
+            }
+
+    def read_data_chunks(
+        self, db_file: DatabaseFile
+    ) -> Iterator[Tuple[str, pd.DataFrame]]:
+        """
+        Streams the file CSV_CHUNK_SIZE rows at a time, so that loading it takes the
+        same memory regardless of its size
+        """
+        table = self.db_schema.tables[0]
+        with open_cached(db_file.file) as file:
+            for chunk in get_csv_reader().read_chunks(
+                file, self._get_delimiter(db_file), table, get_chunk_size()
+            ):
+                yield table.name, chunk
+
+    def _get_delimiter(self, db_file: DatabaseFile) -> str:
+        return "," if Path(db_file.file.name).suffix == ".csv" else "\t"
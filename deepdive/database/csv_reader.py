@@ -0,0 +1,181 @@
+import logging
+from abc import ABC, abstractmethod
+from typing import IO, Iterator, Optional
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+from django.conf import settings
+
+from deepdive.schema import ColumnType, TableSchema
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BACKEND = "pandas"
+
+# rows parsed at a time when reading in chunks, see CSV_CHUNK_SIZE
+DEFAULT_CHUNK_SIZE = 100000
+
+# bytes parsed per block, blocks are parsed in parallel by the pyarrow reader
+ARROW_BLOCK_SIZE = 16 * 1024**2
+
+# all other columns are read as strings
+NUMERIC_COLUMN_TYPES = (ColumnType.INT, ColumnType.FLOAT)
+
+ARROW_COLUMN_TYPES = {
+    ColumnType.INT: pa.int64(),
+    ColumnType.FLOAT: pa.float64(),
+}
+
+
+class CSVReader(ABC):
+    """
+    Parses CSV and TSV files into DataFrames.
+
+    Given a TableSchema, the file's header is skipped in favor of the schema's column
+    names and numeric columns are parsed as their types, while all other columns are
+    read as strings. Otherwise, column names are read from the header and all column
+    types are inferred.
+    """
+
+    @abstractmethod
+    def read(
+        self,
+        file: IO,
+        sep: str,
+        table: Optional[TableSchema] = None,
+        nrows: Optional[int] = None,
+    ) -> pd.DataFrame:
+        pass
+
+    @abstractmethod
+    def read_chunks(
+        self, file: IO, sep: str, table: TableSchema, chunk_size: int
+    ) -> Iterator[pd.DataFrame]:
+        pass
+
+
+class PandasCSVReader(CSVReader):
+    def read(
+        self,
+        file: IO,
+        sep: str,
+        table: Optional[TableSchema] = None,
+        nrows: Optional[int] = None,
+    ) -> pd.DataFrame:
+        return pd.read_csv(file, sep=sep, nrows=nrows, **self._get_params(table))
+
+    def read_chunks(
+        self, file: IO, sep: str, table: TableSchema, chunk_size: int
+    ) -> Iterator[pd.DataFrame]:
+        with pd.read_csv(
+            file, sep=sep, chunksize=chunk_size, **self._get_params(table)
+        ) as reader:
+            yield from reader
+
+    def _get_params(self, table: Optional[TableSchema]):
+        if not table:
+            return {}
+        return {
+            "names": [column.name for column in table.columns],
+            "header": None,
+            "skiprows": 1,
+            # types are inferred per chunk, so non-numeric columns are read as
+            # strings for them to be consistent across chunks
+            "dtype": {
+                column.name: str
+                for column in table.columns
+                if column.column_type not in NUMERIC_COLUMN_TYPES
+            },
+        }
+
+
+class ArrowCSVReader(CSVReader):
+    """
+    Parses blocks of the file on multiple threads, using pyarrow's CSV reader.
+
+    As pyarrow can't fall back to strings for values not matching a column's type,
+    files that fail to parse are read with the pandas reader instead.
+    """
+
+    def read(
+        self,
+        file: IO,
+        sep: str,
+        table: Optional[TableSchema] = None,
+        nrows: Optional[int] = None,
+    ) -> pd.DataFrame:
+        start = file.tell()
+        try:
+            if nrows is not None:
+                return self._read_head(file, sep, table, nrows)
+            return pa_csv.read_csv(file, **self._get_options(sep, table)).to_pandas()
+        except pa.ArrowInvalid:
+            logger.warning("Failed to parse CSV with pyarrow, falling back to pandas")
+            file.seek(start)
+            return PandasCSVReader().read(file, sep, table, nrows)
+
+    def read_chunks(
+        self, file: IO, sep: str, table: TableSchema, chunk_size: int
+    ) -> Iterator[pd.DataFrame]:
+        """
+        Parses the whole file on multiple threads, then converts it chunk_size rows at
+        a time. pyarrow's streaming reader parses one block at a time, so reading in
+        chunks trades the memory of the parsed file (in Arrow's columnar format) for
+        parsing in parallel.
+        """
+        start = file.tell()
+        try:
+            rows = pa_csv.read_csv(file, **self._get_options(sep, table))
+        except pa.ArrowInvalid:
+            logger.warning("Failed to parse CSV with pyarrow, falling back to pandas")
+            file.seek(start)
+            yield from PandasCSVReader().read_chunks(file, sep, table, chunk_size)
+            return
+
+        for offset in range(0, rows.num_rows, chunk_size):
+            yield rows.slice(offset, chunk_size).to_pandas()
+
+    def _read_head(
+        self, file: IO, sep: str, table: Optional[TableSchema], nrows: int
+    ) -> pd.DataFrame:
+        reader = pa_csv.open_csv(file, **self._get_options(sep, table))
+        batches = []
+        num_rows = 0
+        for batch in reader:
+            batches.append(batch)
+            num_rows += batch.num_rows
+            if num_rows >= nrows:
+                break
+        return pa.Table.from_batches(batches, reader.schema).slice(0, nrows).to_pandas()
+
+    def _get_options(self, sep: str, table: Optional[TableSchema]):
+        read_options = pa_csv.ReadOptions(use_threads=True, block_size=ARROW_BLOCK_SIZE)
+        convert_options = pa_csv.ConvertOptions(strings_can_be_null=True)
+        if table:
+            read_options.column_names = [column.name for column in table.columns]
+            read_options.skip_rows = 1
+            convert_options.column_types = {
+                column.name: ARROW_COLUMN_TYPES.get(column.column_type, pa.string())
+                for column in table.columns
+            }
+        return {
+            "read_options": read_options,
+            "parse_options": pa_csv.ParseOptions(delimiter=sep),
+            "convert_options": convert_options,
+        }
+
+
+CSV_READERS = {
+    "pandas": PandasCSVReader,
+    "pyarrow": ArrowCSVReader,
+}
+
+
+def get_csv_reader(backend: Optional[str] = None) -> CSVReader:
+    backend = backend or getattr(settings, "CSV_READER_BACKEND", DEFAULT_BACKEND)
+    return CSV_READERS[backend]()
+
+
+def get_chunk_size() -> int:
+    return getattr(settings, "CSV_CHUNK_SIZE", DEFAULT_CHUNK_SIZE)
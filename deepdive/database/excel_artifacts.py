@@ -0,0 +1,173 @@
+import hashlib
+import io
+import json
+import logging
+import timeit
+from pathlib import Path
+from typing import BinaryIO, Dict, Iterable, Optional, Set
+
+import pandas as pd
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+
+from deepdive.database.file_based_client_helper import sanitize_table_name
+from deepdive.database.file_cache import get_local_path, open_cached
+from deepdive.models import Database, DatabaseFile, DatabaseType
+from deepdive.schema import TableConfig
+
+logger = logging.getLogger(__name__)
+
+
+def get_configs_hash(configs: Optional[str]) -> str:
+    return hashlib.sha256((configs or "").encode()).hexdigest()
+
+
+def convert_excel_files(database: Database):
+    """
+    Converts the Excel workbooks of the database to per table Parquet files, unless
+    they're already converted for their current table configs
+    """
+    if database.database_type != DatabaseType.EXCEL:
+        return
+    for db_file in database.files.all():
+        if not has_artifacts(db_file):
+            convert_excel_file(db_file)
+
+
+def has_artifacts(db_file: DatabaseFile) -> bool:
+    return bool(
+        db_file.artifacts
+        and db_file.artifacts["configs_hash"] == get_configs_hash(db_file.configs)
+    )
+
+
+def convert_excel_file(db_file: DatabaseFile):
+    """
+    Parses each configured sheet of the workbook and stores it as a Parquet file next
+    to the workbook, replacing any artifacts of previous table configs. Artifacts of
+    another file with the same content and table configs (e.g, the default workbook
+    every user is given) are copied rather than parsed again.
+    """
+    start = timeit.default_timer()
+    configs = json.loads(db_file.configs) if db_file.configs else {}
+    with open_cached(db_file.file) as file:
+        content_hash = _get_content_hash(file)
+        tables = _copy_artifacts(db_file, content_hash)
+        copied = tables is not None
+        if not copied:
+            tables = _convert_workbook(db_file, pd.ExcelFile(file), configs)
+
+    previous_artifacts = db_file.artifacts
+    db_file.artifacts = {
+        "configs_hash": get_configs_hash(db_file.configs),
+        "content_hash": content_hash,
+        "tables": tables,
+    }
+    # only the artifacts are updated, configs may have been changed concurrently
+    DatabaseFile.objects.filter(id=db_file.id).update(artifacts=db_file.artifacts)
+    if previous_artifacts:
+        _delete_paths(previous_artifacts["tables"].values())
+    logger.info(
+        f"{'Copied' if copied else 'Converted'} {len(tables)} sheets of "
+        f"{db_file.file.name} to Parquet in {timeit.default_timer() - start:.2f}s"
+    )
+
+
+def delete_artifacts(db_file: DatabaseFile):
+    if db_file.artifacts:
+        _delete_paths(db_file.artifacts["tables"].values())
+
+
+def _get_content_hash(file: BinaryIO) -> str:
+    content_hash = hashlib.sha256()
+    for chunk in iter(lambda: file.read(1024**2), b""):
+        content_hash.update(chunk)
+    file.seek(0)
+    return content_hash.hexdigest()
+
+
+def _copy_artifacts(
+    db_file: DatabaseFile, content_hash: str
+) -> Optional[Dict[str, str]]:
+    source = (
+        DatabaseFile.objects.filter(
+            artifacts__content_hash=content_hash,
+            artifacts__configs_hash=get_configs_hash(db_file.configs),
+        )
+        .exclude(id=db_file.id)
+        .first()
+    )
+    if not source:
+        return None
+
+    tables = {}
+    try:
+        for table_name, path in source.artifacts["tables"].items():
+            with default_storage.open(path) as artifact:
+                tables[table_name] = default_storage.save(
+                    _get_artifact_path(db_file, table_name), artifact
+                )
+    except OSError:  # the source was deleted concurrently
+        _delete_paths(tables.values())
+        return None
+    return tables
+
+
+def _get_artifact_path(db_file: DatabaseFile, table_name: str) -> str:
+    return f"{Path(db_file.file.name).with_suffix('')}.{table_name}.parquet"
+
+
+def _delete_paths(paths: Iterable[str]):
+    for path in paths:
+        default_storage.delete(path)
+
+
+def _convert_workbook(
+    db_file: DatabaseFile, excel_file: pd.ExcelFile, configs: Dict
+) -> Dict[str, str]:
+    tables = {}
+    for sheet_name in excel_file.sheet_names:
+        sanitized_sheet_name = sanitize_table_name(sheet_name)
+        if sanitized_sheet_name not in configs:
+            continue
+        config = TableConfig.model_validate(configs[sanitized_sheet_name])
+        df = excel_file.parse(sheet_name=sheet_name, **config.excel_params)
+        buffer = io.BytesIO()
+        _to_parquet_compatible(df).to_parquet(buffer, index=False)
+        tables[config.name] = default_storage.save(
+            _get_artifact_path(db_file, config.name), ContentFile(buffer.getvalue())
+        )
+    return tables
+
+
+def read_artifacts(
+    db_file: DatabaseFile, table_names: Optional[Set[str]] = None
+) -> Optional[Dict[str, pd.DataFrame]]:
+    """
+    Returns the converted tables of the workbook, all or only the given ones, or None
+    if it hasn't been converted for its current table configs
+    """
+    if not has_artifacts(db_file):
+        return None
+    data = {}
+    for table_name, path in db_file.artifacts["tables"].items():
+        if table_names is not None and table_name not in table_names:
+            continue
+        # memory mapped, rather than read into a buffer first
+        data[table_name] = pd.read_parquet(
+            get_local_path(default_storage, path), memory_map=True
+        )
+    return data
+
+
+def _to_parquet_compatible(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Parquet columns have a single type, so values of columns mixing types (e.g, a
+    number in a text column) are stored as strings, converted back by SQLite's type
+    affinity when loaded into numeric columns
+    """
+    df.columns = [str(column) for column in df.columns]
+    for column in df:
+        if pd.api.types.infer_dtype(df[column], skipna=True).startswith("mixed"):
+            df[column] = df[column].where(df[column].isna(), df[column].astype(str))
+    return df
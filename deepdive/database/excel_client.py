@@ -1,17 +1,26 @@
 import json
-from typing import Dict, List
+from pathlib import Path
+from typing import BinaryIO, Dict, Iterator, List
 
+import openpyxl
 import pandas as pd
 from django.core.files.uploadedfile import UploadedFile
+from openpyxl.cell.cell import TYPE_ERROR, TYPE_NUMERIC
+from pandas.io.parsers import TextParser
 
+from deepdive.database.excel_artifacts import read_artifacts
 from deepdive.database.file_based_client import FileBasedClient
+from deepdive.database.file_cache import open_cached
 from deepdive.database.file_based_client_helper import (
     NUM_SAMPLE_ROWS,
     create_table_schema,
     sanitize_table_name,
 )
 from deepdive.models import DatabaseFile
-from deepdive.schema import TableConfig, TablePreview
+from deepdive.schema import TableConfig, TablePreview, TableSchema
+
+# formats openpyxl can stream, others (e.g, .xls) are read by pandas
+STREAMED_SUFFIXES = (".xlsx", ".xlsm")
 
 
 class ExcelClient(FileBasedClient):
@@ -21,7 +30,7 @@ class ExcelClient(FileBasedClient):
 
     def preview_tables(uploaded_file: UploadedFile) -> List[TablePreview]:
         previews = []
-        dfs = pd.read_excel(uploaded_file, sheet_name=None, nrows=NUM_SAMPLE_ROWS)
+        dfs = read_sheet_heads(uploaded_file, NUM_SAMPLE_ROWS)
         for df in dfs.values():
             df.columns = map(str, df.columns)
         for table_name, sample_data in dfs.items():
@@ -55,12 +64,45 @@ class ExcelClient(FileBasedClient):
             sample_data=sample_data.to_json(orient="table", index=True),
         )
 
+    def get_table_names(self, db_file: DatabaseFile) -> List[str]:
+        return [
+            TableConfig.model_validate(config).name
+            for config in json.loads(db_file.configs).values()
+        ]
+
     def read_data(self, db_file: DatabaseFile) -> Dict[str, pd.DataFrame]:
+        return self._read_tables(db_file, self.db_schema.tables)
+
+    def read_table_chunks(
+        self, db_file: DatabaseFile, table_name: str
+    ) -> Iterator[pd.DataFrame]:
+        # only the table's sheet (or artifact) is read, rather than the whole workbook
+        table_schema = self.db_schema.get_table(table_name)
+        data = self._read_tables(db_file, [table_schema])
+        if table_name in data:
+            yield data[table_name]
+
+    def _read_tables(
+        self, db_file: DatabaseFile, tables: List[TableSchema]
+    ) -> Dict[str, pd.DataFrame]:
+        table_schemas = {table_schema.name: table_schema for table_schema in tables}
+        artifacts = read_artifacts(db_file, set(table_schemas))
+        if artifacts is not None:
+            data = {}
+            for table_name, df in artifacts.items():
+                table_schema = table_schemas[table_name]
+                df.columns = [column.name for column in table_schema.columns]
+                data[table_name] = df
+            return data
+
         configs = json.loads(db_file.configs)
-        excel_file = pd.ExcelFile(db_file.file)
-        table_schemas = {
-            table_schema.name: table_schema for table_schema in self.db_schema.tables
-        }
+        with open_cached(db_file.file) as file:
+            return self._read_workbook(file, configs, table_schemas)
+
+    def _read_workbook(
+        self, file: BinaryIO, configs: Dict, table_schemas: Dict[str, TableSchema]
+    ) -> Dict[str, pd.DataFrame]:
+        excel_file = pd.ExcelFile(file)
         data = {}
         for sheet_name in excel_file.sheet_names:
             sanitized_sheet_name = sanitize_table_name(sheet_name)
@@ -73,3 +115,63 @@ class ExcelClient(FileBasedClient):
                 df.columns = list(map(lambda col : col.name, table_schemas[table_name].columns))
                 data[table_name] = df
         return data
+
+
+def read_sheet_heads(
+    uploaded_file: UploadedFile, nrows: int
+) -> Dict[str, pd.DataFrame]:
+    """
+    Returns the first nrows rows of each sheet, as pd.read_excel(sheet_name=None,
+    nrows=nrows) would.
+
+    The workbook is opened in read-only mode and read from disk if it was uploaded
+    to a temporary file, so that only the rows previewed are parsed rather than all
+    sheets being loaded into memory.
+    """
+    if Path(uploaded_file.name).suffix.lower() not in STREAMED_SUFFIXES:
+        return pd.read_excel(uploaded_file, sheet_name=None, nrows=nrows)
+
+    if hasattr(uploaded_file, "temporary_file_path"):
+        workbook_file = uploaded_file.temporary_file_path()
+    else:
+        workbook_file = uploaded_file
+    workbook = openpyxl.load_workbook(
+        workbook_file, read_only=True, data_only=True, keep_links=False
+    )
+    try:
+        return {
+            worksheet.title: _read_sheet_head(worksheet, nrows)
+            for worksheet in workbook.worksheets
+        }
+    finally:
+        workbook.close()
+
+
+def _read_sheet_head(worksheet, nrows: int) -> pd.DataFrame:
+    # dimensions stored in the file may be wrong, see pandas' OpenpyxlReader
+    worksheet.reset_dimensions()
+    rows = []
+    for row in worksheet.iter_rows(max_row=nrows + 1):
+        cells = [_convert_cell(cell) for cell in row]
+        while cells and cells[-1] == "":
+            cells.pop()
+        rows.append(cells)
+    while rows and not rows[-1]:
+        rows.pop()
+    if not rows:
+        return pd.DataFrame()
+
+    width = max(len(row) for row in rows)
+    rows = [row + [""] * (width - len(row)) for row in rows]
+    # the parser pd.read_excel uses, for the same header and type handling
+    return TextParser(rows, header=0).read()
+
+
+def _convert_cell(cell):
+    if cell.value is None:
+        return ""
+    if cell.data_type == TYPE_ERROR:
+        return float("nan")
+    if cell.data_type == TYPE_NUMERIC and int(cell.value) == cell.value:
+        return int(cell.value)
+    return cell.value
@@ -0,0 +1,163 @@
+import asyncio
+import logging
+import threading
+import timeit
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, TypeVar
+
+from django.conf import settings
+from django.db import close_old_connections
+
+from deepdive.models import Database, DatabaseType
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+FILE_BASED_DATABASE_TYPES = (
+    DatabaseType.CSV,
+    DatabaseType.EXCEL,
+    DatabaseType.PARQUET,
+)
+
+DEFAULT_MAX_WORKERS = {
+    DatabaseType.SNOWFLAKE: 8,
+    DatabaseType.BIGQUERY: 8,
+}
+FALLBACK_MAX_WORKERS = 4
+
+# log a warning when a task waits longer than this for a worker thread
+SLOW_WAIT_SECONDS = 1.0
+
+
+class ExecutorMetrics:
+    """
+    Queue depth and wait time (time between submission and a worker picking
+    the task up) of the tasks run through one or more executors.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.lock = threading.Lock()
+        self.submitted = 0
+        self.completed = 0
+        self.queue_depth = 0
+        self.max_queue_depth = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def on_submit(self):
+        with self.lock:
+            self.submitted += 1
+            self.queue_depth += 1
+            self.max_queue_depth = max(self.max_queue_depth, self.queue_depth)
+
+    def on_start(self, wait: float):
+        with self.lock:
+            self.queue_depth -= 1
+            self.total_wait += wait
+            self.max_wait = max(self.max_wait, wait)
+        if wait > SLOW_WAIT_SECONDS:
+            logger.warning(f"Task waited {wait:.2f}s for a {self.name} worker thread")
+
+    def on_complete(self):
+        with self.lock:
+            self.completed += 1
+
+    def to_dict(self) -> Dict:
+        with self.lock:
+            started = self.submitted - self.queue_depth
+            return {
+                "submitted": self.submitted,
+                "completed": self.completed,
+                "queue_depth": self.queue_depth,
+                "max_queue_depth": self.max_queue_depth,
+                "avg_wait": self.total_wait / started if started else 0.0,
+                "max_wait": self.max_wait,
+            }
+
+
+class MeteredExecutor:
+    """
+    Runs blocking database calls on a bounded thread pool, recording ExecutorMetrics.
+    """
+
+    def __init__(self, name: str, max_workers: int, metrics: ExecutorMetrics):
+        self.name = name
+        self.metrics = metrics
+        self.executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix=name
+        )
+
+    async def run_async(self, func: Callable[..., T], *args) -> T:
+        submitted_at = timeit.default_timer()
+        self.metrics.on_submit()
+
+        def run():
+            self.metrics.on_start(timeit.default_timer() - submitted_at)
+            try:
+                return func(*args)
+            finally:
+                # worker threads are not managed by Django, clean up stale connections
+                close_old_connections()
+                self.metrics.on_complete()
+
+        return await asyncio.get_running_loop().run_in_executor(self.executor, run)
+
+    def release(self):
+        pass
+
+
+class PinnedExecutor(MeteredExecutor):
+    """
+    A single thread owned by one session.
+
+    sqlite3 connections may only be used by the thread that created them, so
+    every call on a file based DB's client must go through the same thread.
+    """
+
+    def __init__(self, name: str, metrics: ExecutorMetrics):
+        super().__init__(name, 1, metrics)
+
+    def release(self):
+        self.executor.shutdown(wait=False)
+
+
+_executors: Dict[str, MeteredExecutor] = {}
+_metrics: Dict[str, ExecutorMetrics] = {}
+_lock = threading.Lock()
+
+
+def _get_metrics(name: str) -> ExecutorMetrics:
+    if name not in _metrics:
+        _metrics[name] = ExecutorMetrics(name)
+    return _metrics[name]
+
+
+def get_executor(database: Database) -> MeteredExecutor:
+    """
+    Returns the executor to run the given Database's client calls on.
+
+    Remote databases share a bounded pool per database type, so a slow warehouse
+    doesn't stall the others. File based databases get a new thread pinned to the
+    caller's session, which the caller must release() once done.
+    """
+    database_type = database.database_type
+    with _lock:
+        if database_type in FILE_BASED_DATABASE_TYPES:
+            return PinnedExecutor(f"sqlite-{database.id}", _get_metrics("sqlite"))
+
+        if database_type not in _executors:
+            max_workers = getattr(settings, "DB_EXECUTOR_MAX_WORKERS", {}).get(
+                database_type,
+                DEFAULT_MAX_WORKERS.get(database_type, FALLBACK_MAX_WORKERS),
+            )
+            _executors[database_type] = MeteredExecutor(
+                database_type, max_workers, _get_metrics(database_type)
+            )
+        return _executors[database_type]
+
+
+def get_executor_metrics() -> Dict[str, Dict]:
+    with _lock:
+        return {name: metrics.to_dict() for name, metrics in _metrics.items()}
@@ -1,17 +1,31 @@
+import copy
+import logging
 import os
+import resource
 import sqlite3
+import sys
+import timeit
 import uuid
 import math
 from abc import abstractmethod
-from typing import Dict
+from typing import Dict, Iterator, List, Set, Tuple
 
 import pandas as pd
+from django.conf import settings
 
-from deepdive.database.client import DatabaseClient
+from deepdive.database.client import DatabaseClient, LoadProgress
 from deepdive.database.file_based_client_helper import validate_column_name
+from deepdive.database.index_advisor import IndexRecommendation, create_indexes
+from deepdive.database.lazy_materialization import get_lazy_database
+from deepdive.database.materialized_cache import get_materialized_cache
 from deepdive.models import Database, DatabaseFile
 from deepdive.schema import ColumnType, DatabaseSchema, TableSchema
 
+logger = logging.getLogger(__name__)
+
+DEFAULT_SQLITE_MMAP_SIZE = 256 * 1024**2
+DEFAULT_SQLITE_CACHE_SIZE = 64 * 1024**2
+
 
 class FileBasedClient(DatabaseClient):
     """
@@ -28,26 +42,111 @@ class FileBasedClient(DatabaseClient):
     BASE_DIRECTORY = "local_dbs"
     DB_NAME = "temp.db"
 
+    # number of rows bound per executemany() call when bulk loading a table
+    INSERT_BATCH_SIZE = 10000
+
     def initialize(self, database: Database):
         self.db_schema = DatabaseSchema.model_validate_json(database.schema)
-        self.db_path = self._setup_directories()
-        self.conn = sqlite3.connect(self.db_path)
+        db_files = list(database.files.all())
+
+        # materialized DBs are shared by all sessions on the Database and opened
+        # read-only, their tables are loaded on first use, see load_tables
+        key = get_materialized_cache().get_key(database, db_files)
+        self.materialized_key = key
+        self.materialized_db = get_lazy_database(database, key, self, db_files)
+
+        self.conn = sqlite3.connect(
+            f"file:{self.materialized_db.path}?mode=ro", uri=True
+        )
+        self._apply_pragmas(self.conn)
         self._define_sqlite_functions(self.conn)
-        table_schemas = {table.name: table for table in self.db_schema.tables}
-        for db_file in database.files.all():
-            self._parse_file(db_file, table_schemas)
+        self.report_progress(
+            LoadProgress(
+                tables_loaded=len(self.materialized_db.get_loaded_tables()),
+                total_tables=len(self.db_schema.tables),
+            )
+        )
+        # tables not queried yet are loaded in the background
+        self.materialized_db.warm_up()
+
+    def load_tables(self, table_names: Set[str]):
+        self.materialized_db.load_tables(table_names, self.report_progress)
+
+    def with_connection(self, conn: sqlite3.Connection) -> "FileBasedClient":
+        """
+        Returns a copy of the client reading files into the given connection, e.g, of
+        a staging DB on a worker thread
+        """
+        client = copy.copy(self)
+        client.conn = conn
+        client.on_progress = None
+        return client
+
+    def _build_table(
+        self,
+        database: Database,
+        db_file: DatabaseFile,
+        table_schema: TableSchema,
+        recommendations: List[IndexRecommendation],
+    ) -> int:
+        """
+        Loads the table from the given file then builds its indexes, as the table is
+        read-only after. Returns the number of rows loaded.
+        """
+        num_rows = self._load_table(db_file, table_schema)
+        create_indexes(self.conn, database, table_schema.name, recommendations)
+        self._create_foreign_key_indexes(table_schema.name)
         self.conn.commit()
+        return num_rows
+
+    def _create_foreign_key_indexes(self, table_name: str):
+        """
+        Indexes the table's side of every foreign key, as joins are constructed from
+        them.
+        """
+        start = timeit.default_timer()
+        columns = {
+            (table.name.lower(), column.name.lower()): (table.name, column.name)
+            for table in self.db_schema.tables
+            for column in table.columns
+            if table.name.lower() == table_name.lower()
+        }
+        indexed = set()
+        for foreign_key in self.db_schema.foreign_keys or []:
+            for key in (foreign_key.primary, foreign_key.reference):
+                table_column = tuple(key.lower().split(".", 1))
+                if table_column not in columns or table_column in indexed:
+                    continue
+                indexed.add(table_column)
+                name, column_name = columns[table_column]
+                self.conn.execute(
+                    f"CREATE INDEX IF NOT EXISTS fk_{name}_{column_name} "
+                    f"ON {name}({column_name})"
+                )
+        logger.info(
+            f"Built {len(indexed)} foreign key indexes on {table_name} in "
+            f"{timeit.default_timer() - start:.2f}s"
+        )
+
+    def _apply_pragmas(self, conn):
+        """
+        Tunes a connection for read-mostly analytical queries: the DB file is memory
+        mapped rather than read through syscalls, more pages are cached and
+        temporary b-trees (sorts, GROUP BYs, DISTINCTs) are kept in memory
+        """
+        mmap_size = getattr(settings, "SQLITE_MMAP_SIZE", DEFAULT_SQLITE_MMAP_SIZE)
+        cache_size = getattr(settings, "SQLITE_CACHE_SIZE", DEFAULT_SQLITE_CACHE_SIZE)
+        conn.execute(f"PRAGMA mmap_size = {int(mmap_size)}")
+        # a negative cache size is in KiB rather than pages
+        conn.execute(f"PRAGMA cache_size = -{int(cache_size) // 1024}")
+        conn.execute("PRAGMA temp_store = MEMORY")
 
     def _define_sqlite_functions(self, conn):
         conn.create_function("log10", 1, math.log10)
 
     def finalize(self):
+        # the materialized DB is left in the cache for the next session
         self.conn.close()
-        if os.path.exists(self.db_path):
-            os.remove(self.db_path)
-        temp_dir_path = os.path.dirname(self.db_path)
-        if os.path.exists(temp_dir_path):
-            os.rmdir(temp_dir_path)
 
     def validate(database: Database):
         schema = DatabaseSchema.model_validate_json(database.schema, strict=True)
@@ -66,19 +165,66 @@ class FileBasedClient(DatabaseClient):
         """
         return {}
 
+    def read_data_chunks(
+        self, db_file: DatabaseFile
+    ) -> Iterator[Tuple[str, pd.DataFrame]]:
+        """
+        Yields (table name, DataFrame) chunks of the given file, all chunks of a table
+        consecutively. Defaults to a single chunk per table from read_data(), clients
+        able to stream their files override this to load them in bounded memory.
+        """
+        yield from self.read_data(db_file).items()
+
+    def get_table_names(self, db_file: DatabaseFile) -> List[str]:
+        """
+        Returns the names of the tables read from the given file. Defaults to reading
+        the file, clients override this to tell from the file's name or configs.
+        """
+        return list(self.read_data(db_file).keys())
+
+    def read_table_chunks(
+        self, db_file: DatabaseFile, table_name: str
+    ) -> Iterator[pd.DataFrame]:
+        """
+        Yields the DataFrame chunks of the given table of the file. Defaults to the
+        table's chunks from read_data_chunks(), clients of files with many tables
+        override this to only read the given table.
+        """
+        for chunk_table_name, dataframe in self.read_data_chunks(db_file):
+            if chunk_table_name == table_name:
+                yield dataframe
+
     def _setup_directories(self) -> str:
         temp_dir_path = f"{FileBasedClient.BASE_DIRECTORY}/{uuid.uuid4()}"
         os.mkdir(temp_dir_path)
         db_path = f"{temp_dir_path}/{FileBasedClient.DB_NAME}"
         return os.path.abspath(db_path)
 
-    def _parse_file(self, db_file: DatabaseFile, table_schemas: Dict):
-        data = self.read_data(db_file)
-        for table_name, dataframe in data.items():
-            table_schema = table_schemas[table_name]
-            self._create_table(table_schema)
+    def _remove_directories(self, db_path: str):
+        if os.path.exists(db_path):
+            os.remove(db_path)
+        temp_dir_path = os.path.dirname(db_path)
+        if os.path.exists(temp_dir_path):
+            os.rmdir(temp_dir_path)
+
+    def _load_table(self, db_file: DatabaseFile, table_schema: TableSchema) -> int:
+        """
+        Creates and loads the table from the given file, returning the number of rows
+        loaded
+        """
+        self._create_table(table_schema)
+        start = timeit.default_timer()
+        num_rows = 0
+        for dataframe in self.read_table_chunks(db_file, table_schema.name):
             self._process_data(table_schema, dataframe)
-            self._insert_data(table_schema, dataframe)
+            num_rows += self._insert_data(table_schema, dataframe)
+        elapsed = timeit.default_timer() - start
+        logger.info(
+            f"Loaded {num_rows} rows into {table_schema.name} in {elapsed:.2f}s "
+            f"({num_rows / elapsed if elapsed > 0 else num_rows:.0f} rows/s), "
+            f"peak memory: {get_peak_memory_mb():.0f}MB"
+        )
+        return num_rows
 
     def _create_table(self, schema: TableSchema):
         column_descriptions = []
@@ -96,10 +242,35 @@ class FileBasedClient(DatabaseClient):
             return "real"
         return "text"
 
-    def _insert_data(self, schema: TableSchema, data: pd.DataFrame):
+    def _insert_data(self, schema: TableSchema, data: pd.DataFrame) -> int:
+        """
+        Bulk loads the given DataFrame into the table, returning the number of rows inserted.
+
+        Rows are bound column batch by column batch through a single prepared statement
+        on one cursor, so no per-row cursor or pandas Series is created. The inserts
+        all run in the connection's open transaction, committed by the caller.
+        """
         column_names = [column.name for column in schema.columns]
         query = f"INSERT INTO {schema.name}({','.join(column_names)}) VALUES({','.join(['?'] * len(column_names))})"
-        data.apply(lambda row: self.conn.cursor().execute(query, row), axis=1)
+        cursor = self.conn.cursor()
+        num_rows = 0
+        for rows in self._batch_rows(data):
+            cursor.executemany(query, rows)
+            num_rows += cursor.rowcount
+        cursor.close()
+        return num_rows
+
+    def _batch_rows(self, data: pd.DataFrame) -> Iterator[List[Tuple]]:
+        """
+        Yields row tuples of native Python values, INSERT_BATCH_SIZE rows at a time.
+
+        Each batch is converted column-wise (Series.tolist()) which both avoids boxing a
+        Series per row and turns numpy scalars into types sqlite3 can bind.
+        """
+        for start in range(0, len(data), FileBasedClient.INSERT_BATCH_SIZE):
+            batch = data.iloc[start : start + FileBasedClient.INSERT_BATCH_SIZE]
+            columns = [_to_sqlite_values(batch[column]) for column in batch]
+            yield list(zip(*columns))
 
     def _process_data(self, schema: TableSchema, data: pd.DataFrame):
         column_types = {column.name: column.column_type for column in schema.columns}
@@ -107,3 +278,19 @@ class FileBasedClient(DatabaseClient):
             column_type = column_types[column_name]
             if column_type not in FileBasedClient.SUPPORTED_COLUMN_TYPES:
                 data[column_name] = data[column_name].astype(str)
+
+
+def get_peak_memory_mb() -> float:
+    """
+    Returns the high-water mark of the process' resident memory
+    """
+    peak_memory = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # reported in kilobytes on Linux, but bytes on macOS
+    return peak_memory / 1024**2 if sys.platform == "darwin" else peak_memory / 1024
+
+
+def _to_sqlite_values(column: pd.Series) -> List:
+    if column.dtype == object:
+        # NaN / NaT within object columns are bound as NULL
+        return column.where(column.notna(), None).tolist()
+    return column.tolist()
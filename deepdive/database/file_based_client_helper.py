@@ -1,16 +1,24 @@
 import io
 from pathlib import Path
 import re
-from typing import Dict, List, Tuple
+from typing import Dict, Iterator, List, Tuple
 
 import pandas as pd
 
+from deepdive.database.csv_reader import get_chunk_size, get_csv_reader
+from deepdive.database.file_cache import open_cached
 from deepdive.database.sqlite_helper import (
     SQLITE_KEYWORD_SUBSTITUTES,
     SQLITE_KEYWORDS,
 )
 from deepdive.helper import get_column_to_types
-from deepdive.schema import ColumnSchema, DatabaseSchema, TableConfig, TableSchema
+from deepdive.schema import (
+    ColumnSchema,
+    ColumnType,
+    DatabaseSchema,
+    TableConfig,
+    TableSchema,
+)
 
 NUM_SAMPLE_ROWS = 10
 
@@ -137,15 +145,67 @@ def parse_row_col(literal: str) -> Tuple[str, str]:
     return int(literal[index:]), literal[:index]
 
 
-def merge_db_files(db_files: List):
-    dfs = []
-    for db_file in db_files:
-        delimiter = "," if Path(db_file.file.name).suffix == ".csv" else "\t"
-        df = pd.read_csv(db_file.file, sep=delimiter)
-        df.insert(0, "Trial", Path(db_file.file.name).stem)
-        dfs.append(df)
+def merge_db_files(db_files: List) -> io.BufferedReader:
+    """
+    Returns a stream of a CSV concatenating the given CSV files, with a Trial column
+    of the file each row came from. Files are read and written a chunk at a time, so
+    that merging takes the same memory regardless of the number and size of files.
+
+    Values are copied as is, rather than parsed, and rows of files missing some of
+    the columns are left empty in those columns.
+    """
+    return io.BufferedReader(_IteratorStream(_merge_csv_chunks(db_files)))
+
+
+def _merge_csv_chunks(db_files: List) -> Iterator[bytes]:
+    delimiters = [
+        "," if Path(db_file.file.name).suffix == ".csv" else "\t"
+        for db_file in db_files
+    ]
+    headers = []
+    for db_file, delimiter in zip(db_files, delimiters):
+        with open_cached(db_file.file) as file:
+            headers.append(list(pd.read_csv(file, sep=delimiter, nrows=0).columns))
+            file.seek(0)
+    # all columns in order of appearance, as pd.concat would
+    columns = list(dict.fromkeys(["Trial"] + [c for header in headers for c in header]))
+    yield pd.DataFrame(columns=columns).to_csv(index=False).encode()
+
+    reader = get_csv_reader()
+    for db_file, delimiter, header in zip(db_files, delimiters, headers):
+        table = TableSchema(
+            name="merged",
+            columns=[
+                ColumnSchema(name=column, column_type=ColumnType.TEXT)
+                for column in header
+            ],
+        )
+        with open_cached(db_file.file) as file:
+            for chunk in reader.read_chunks(file, delimiter, table, get_chunk_size()):
+                chunk.insert(0, "Trial", Path(db_file.file.name).stem)
+                chunk = chunk.reindex(columns=columns)
+                yield chunk.to_csv(index=False, header=False).encode()
+
+
+class _IteratorStream(io.RawIOBase):
+    """
+    A read-only stream of the bytes yielded by an iterator
+    """
 
-    csv_buffer = io.StringIO()
-    merged_df = pd.concat(dfs, ignore_index=True)
-    merged_df.to_csv(csv_buffer, index=False)
-    return csv_buffer
+    def __init__(self, iterator: Iterator[bytes]):
+        self._iterator = iterator
+        self._buffer = memoryview(b"")
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        while not self._buffer:
+            try:
+                self._buffer = memoryview(next(self._iterator))
+            except StopIteration:
+                return 0
+        size = min(len(buffer), len(self._buffer))
+        buffer[:size] = self._buffer[:size]
+        self._buffer = self._buffer[size:]
+        return size
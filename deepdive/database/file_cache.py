@@ -0,0 +1,172 @@
+import hashlib
+import logging
+import os
+import shutil
+import threading
+import timeit
+import uuid
+from contextlib import nullcontext
+from typing import BinaryIO, ContextManager, List, Optional, Tuple
+
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage, Storage
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DIRECTORY = "local_dbs/files"
+DEFAULT_MAX_BYTES = 10 * 1024**3
+
+# bytes copied at a time when downloading
+DOWNLOAD_BUFFER_SIZE = 8 * 1024**2
+
+
+class FileCache:
+    """
+    A node-local cache of files in (remote) storage, e.g, DatabaseFiles on S3.
+
+    Entries are content addressed: keyed by the object's ETag (a hash of its content)
+    and size where the storage provides one, otherwise by its name, size and modified
+    time. A changed object thus results in a new key, and identical objects (e.g, the
+    default workbook copied for each user) share an entry. Entries are evicted least
+    recently used first once the cache grows beyond max_bytes.
+    """
+
+    def __init__(self, directory: str, max_bytes: int):
+        self.directory = os.path.abspath(directory)
+        self.max_bytes = max_bytes
+        self._locks = {}
+        self._locks_lock = threading.Lock()
+        os.makedirs(self.directory, exist_ok=True)
+
+    def get_path(self, storage: Storage, name: str) -> str:
+        """
+        Returns the local path of the named file, downloading it if not cached. Files
+        are downloaded only once, even when requested concurrently.
+        """
+        key, size = self._get_key(storage, name)
+        path = os.path.join(self.directory, key)
+        with self._lock(key):
+            if self._touch(path):
+                return path
+            self._download(storage, name, path, size)
+        self.evict(keep=path)
+        return path
+
+    def evict(self, keep: Optional[str] = None):
+        entries = []
+        for path in self._get_entries():
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+
+        total_bytes = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total_bytes <= self.max_bytes:
+                break
+            if path == keep:
+                continue
+            # open files keep their handle to the unlinked file
+            self._remove(path)
+            total_bytes -= size
+
+    def _get_key(self, storage: Storage, name: str) -> Tuple[str, int]:
+        bucket = getattr(storage, "bucket", None)
+        if bucket is not None:
+            # a single HEAD request, for S3Boto3Storage
+            s3_object = bucket.Object(storage._normalize_name(name))
+            version = f"etag:{s3_object.e_tag}:{s3_object.content_length}"
+            size = s3_object.content_length
+        else:
+            size = storage.size(name)
+            try:
+                modified_time = storage.get_modified_time(name).timestamp()
+            except NotImplementedError:
+                modified_time = None
+            version = f"name:{name}:{size}:{modified_time}"
+        return hashlib.sha256(version.encode()).hexdigest(), size
+
+    def _lock(self, key: str) -> threading.Lock:
+        with self._locks_lock:
+            if key not in self._locks:
+                self._locks[key] = threading.Lock()
+            return self._locks[key]
+
+    def _touch(self, path: str) -> bool:
+        try:
+            os.utime(path)  # mark as recently used
+        except FileNotFoundError:
+            return False
+        return True
+
+    def _download(self, storage: Storage, name: str, path: str, size: int):
+        start = timeit.default_timer()
+        download_path = os.path.join(self.directory, f"{uuid.uuid4()}.download")
+        try:
+            with storage.open(name, "rb") as source, open(
+                download_path, "wb"
+            ) as destination:
+                shutil.copyfileobj(source, destination, DOWNLOAD_BUFFER_SIZE)
+            downloaded_size = os.path.getsize(download_path)
+            if downloaded_size != size:
+                raise IOError(f"Downloaded {downloaded_size} of {size} bytes of {name}")
+            # only complete files are ever visible under the key
+            os.replace(download_path, path)
+        finally:
+            if os.path.exists(download_path):
+                os.remove(download_path)
+        logger.info(
+            f"Downloaded {name} ({size} bytes) to the file cache in "
+            f"{timeit.default_timer() - start:.2f}s"
+        )
+
+    def _get_entries(self) -> List[str]:
+        return [
+            os.path.join(self.directory, filename)
+            for filename in os.listdir(self.directory)
+            if not filename.endswith(".download")
+        ]
+
+    def _remove(self, path: str):
+        try:
+            os.remove(path)
+            logger.info(f"Evicted cached file: {path}")
+        except FileNotFoundError:
+            pass
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_file_cache() -> FileCache:
+    global _cache
+    with _cache_lock:
+        if not _cache:
+            _cache = FileCache(
+                getattr(settings, "FILE_CACHE_DIRECTORY", DEFAULT_DIRECTORY),
+                getattr(settings, "FILE_CACHE_MAX_BYTES", DEFAULT_MAX_BYTES),
+            )
+        return _cache
+
+
+def get_local_path(storage: Storage, name: str) -> str:
+    """
+    Returns a local path of a file in storage, downloading it to the file cache if
+    the storage is remote
+    """
+    if isinstance(storage, FileSystemStorage):
+        return storage.path(name)
+    return get_file_cache().get_path(storage, name)
+
+
+def open_cached(file) -> ContextManager[BinaryIO]:
+    """
+    Opens a file in storage (e.g, DatabaseFile.file) from its local path, see
+    get_local_path. Files not in storage, e.g, uploads, are returned as is and left
+    open.
+    """
+    if getattr(file, "storage", None) is None:
+        return nullcontext(file)
+    return open(get_local_path(file.storage, file.name), "rb")
@@ -0,0 +1,227 @@
+import logging
+import math
+import sqlite3
+import timeit
+from collections import Counter
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+from django.conf import settings
+from pydantic import ValidationError
+
+from deepdive.models import Database, MaterializedIndex, Message, Visualization
+from deepdive.schema import DatabaseSchema, VizSpec
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_INDEXES = 8
+
+# number of most recent messages and visualizations mined per database
+WORKLOAD_SIZE = 500
+
+# composite indexes beyond this many columns rarely pay for their size
+MAX_INDEX_COLUMNS = 3
+
+# how much a use of a column benefits from an index on it, roughly in proportion
+# to how much of a scan the index avoids
+EQUALITY_FILTER_WEIGHT = 3.0
+RANGE_FILTER_WEIGHT = 2.0
+GROUP_BY_WEIGHT = 2.0
+SORT_BY_WEIGHT = 1.0
+
+
+@dataclass
+class IndexRecommendation:
+    table: str
+    columns: Tuple[str, ...]
+    score: float
+
+    @property
+    def name(self) -> str:
+        return f"ix_{self.table}_{'_'.join(self.columns)}"
+
+
+def load_workload(database: Database) -> List[VizSpec]:
+    """
+    Returns the viz specs of the database's most recent messages and visualizations
+    """
+    encoded_specs = list(
+        Message.objects.filter(
+            session__database=database, visualization_spec__isnull=False
+        )
+        .order_by("-timestamp")
+        .values_list("visualization_spec", flat=True)[:WORKLOAD_SIZE]
+    ) + list(
+        Visualization.objects.filter(session__database=database)
+        .order_by("-timestamp")
+        .values_list("visualization_spec", flat=True)[:WORKLOAD_SIZE]
+    )
+
+    viz_specs = []
+    for encoded_spec in encoded_specs:
+        try:
+            viz_specs.append(VizSpec.model_validate_json(encoded_spec))
+        except (ValidationError, ValueError):
+            continue
+    return viz_specs
+
+
+def recommend_indexes(
+    viz_specs: List[VizSpec], schema: DatabaseSchema, max_indexes: int
+) -> List[IndexRecommendation]:
+    """
+    Scores the single-column and composite indexes that would serve the filters,
+    group bys and sorts of the given viz specs, and returns the best max_indexes.
+
+    Composite indexes lead with equality filtered columns followed by grouped
+    columns, the order in which SQLite can use them for a single query.
+    """
+    scores: Counter = Counter()
+    for viz_spec in viz_specs:
+        resolver = _ColumnResolver(schema, viz_spec.tables)
+        equality_columns: Dict[str, List[str]] = {}
+        group_columns: Dict[str, List[str]] = {}
+
+        def use(name: str, weight: float, composite: Optional[Dict] = None):
+            resolved = resolver.resolve(name)
+            if not resolved:
+                return
+            table, column = resolved
+            scores[(table, (column,))] += weight
+            if composite is not None and column not in composite.get(table, []):
+                composite.setdefault(table, []).append(column)
+
+        for viz_filter in viz_spec.filters:
+            if viz_filter.filter_type == "comparison" and not viz_filter.negate:
+                use(viz_filter.name, EQUALITY_FILTER_WEIGHT, equality_columns)
+            elif viz_filter.filter_type == "numeric":
+                use(viz_filter.name, RANGE_FILTER_WEIGHT)
+        # binned x-axes are grouped by an expression no index serves
+        x_axis = viz_spec.x_axis
+        if x_axis and not x_axis.binner and not x_axis.unparsed:
+            use(x_axis.name, GROUP_BY_WEIGHT, group_columns)
+        for breakdown in viz_spec.breakdowns:
+            if not breakdown.unparsed:
+                use(breakdown.name, GROUP_BY_WEIGHT, group_columns)
+        if viz_spec.sort_by and not viz_spec.sort_by.unparsed:
+            use(viz_spec.sort_by.name, SORT_BY_WEIGHT)
+
+        for table in set(equality_columns) | set(group_columns):
+            columns = tuple(
+                dict.fromkeys(
+                    equality_columns.get(table, []) + group_columns.get(table, [])
+                )
+            )[:MAX_INDEX_COLUMNS]
+            if len(columns) > 1:
+                # a composite serves all of its columns in a single index
+                scores[(table, columns)] += EQUALITY_FILTER_WEIGHT * len(
+                    equality_columns.get(table, [])
+                ) + GROUP_BY_WEIGHT * len(group_columns.get(table, []))
+
+    recommendations = []
+    for (table, columns), score in scores.most_common():
+        # an index also serves queries on any prefix of its columns
+        if any(
+            recommendation.table == table
+            and recommendation.columns[: len(columns)] == columns
+            for recommendation in recommendations
+        ):
+            continue
+        recommendations.append(IndexRecommendation(table, columns, score))
+        if len(recommendations) == max_indexes:
+            break
+    return recommendations
+
+
+def advise_indexes(database: Database, schema: DatabaseSchema):
+    max_indexes = getattr(settings, "INDEX_ADVISOR_MAX_INDEXES", DEFAULT_MAX_INDEXES)
+    if not max_indexes:
+        return []
+    return recommend_indexes(load_workload(database), schema, max_indexes)
+
+
+def create_indexes(
+    conn: sqlite3.Connection,
+    database: Database,
+    table_name: str,
+    recommendations: List[IndexRecommendation],
+):
+    """
+    Builds the indexes recommended on the given table, recording their build time and
+    estimated speedup
+    """
+    indexes = []
+    for recommendation in recommendations:
+        if recommendation.table != table_name:
+            continue
+        start_time = timeit.default_timer()
+        try:
+            conn.execute(
+                f"CREATE INDEX IF NOT EXISTS {recommendation.name} "
+                f"ON {recommendation.table}({','.join(recommendation.columns)})"
+            )
+        except sqlite3.Error:
+            # an index is only an optimization, the DB is usable without it
+            logger.warning("Failed to build index %s", recommendation.name)
+            continue
+        build_time = timeit.default_timer() - start_time
+        estimated_speedup = _estimate_speedup(
+            conn, recommendation.table, recommendation.columns[0]
+        )
+        logger.info(
+            "Built index %s (score %.1f) in %.2fs, estimated speedup %.1fx",
+            recommendation.name,
+            recommendation.score,
+            build_time,
+            estimated_speedup,
+        )
+        indexes.append(
+            MaterializedIndex(
+                database=database,
+                table_name=recommendation.table,
+                columns=",".join(recommendation.columns),
+                score=recommendation.score,
+                build_time=build_time,
+                estimated_speedup=estimated_speedup,
+            )
+        )
+
+    MaterializedIndex.objects.filter(database=database, table_name=table_name).delete()
+    MaterializedIndex.objects.bulk_create(indexes)
+
+
+def _estimate_speedup(conn: sqlite3.Connection, table: str, column: str) -> float:
+    """
+    Estimates the speedup of looking up a single value of the column, i.e, a scan of
+    all rows against a search of the index followed by reading the matching rows
+    """
+    num_rows, num_distinct = conn.execute(
+        f"SELECT COUNT(*), COUNT(DISTINCT {column}) FROM {table}"
+    ).fetchone()
+    if not num_rows or not num_distinct:
+        return 1.0
+    return num_rows / (num_rows / num_distinct + math.log2(num_rows + 1))
+
+
+class _ColumnResolver:
+    """
+    Resolves viz spec column names, qualified (table.column) or not, to the table and
+    column they refer to
+    """
+
+    def __init__(self, schema: DatabaseSchema, tables: Optional[List[str]]):
+        self.columns = {
+            (table.name, column.name)
+            for table in schema.tables
+            for column in table.columns
+        }
+        self.tables = tables or [table.name for table in schema.tables]
+
+    def resolve(self, name: str) -> Optional[Tuple[str, str]]:
+        if "." in name:
+            table, column = name.split(".", 1)
+            return (table, column) if (table, column) in self.columns else None
+        for table in self.tables:
+            if (table, name) in self.columns:
+                return (table, name)
+        return None
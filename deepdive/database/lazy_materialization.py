@@ -0,0 +1,365 @@
+import logging
+import os
+import sqlite3
+import threading
+import timeit
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional, Set
+
+from django.conf import settings
+from django.db import close_old_connections
+
+from deepdive.database.client import LoadProgress, ProgressCallback
+from deepdive.database.index_advisor import advise_indexes
+from deepdive.database.materialized_cache import get_materialized_cache
+from deepdive.database.profiler import profile_tables, save_profiles
+from deepdive.models import Database, DatabaseFile
+from deepdive.schema import SqlDialect
+
+if TYPE_CHECKING:
+    from deepdive.database.file_based_client import FileBasedClient
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_WORKERS = 4
+
+# records the tables loaded into a materialized DB, by any process
+LOADED_TABLES_TABLE = "deepdive_loaded_tables"
+
+# seconds the connection publishing tables waits for sessions' reads to finish
+PUBLISH_TIMEOUT_SECONDS = 60
+
+
+class LazyMaterializedDatabase:
+    """
+    A materialized SQLite DB of a file based Database whose tables are loaded the
+    first time a query reads from them, shared by all sessions on the Database.
+
+    Each table is loaded into its own staging DB by a worker thread, so that tables
+    load concurrently, then copied into the materialized DB. As staging tables are
+    identical to the materialized ones, SQLite copies their pages as is (the "xfer"
+    optimization of INSERT INTO ... SELECT *) rather than row by row. Loads are
+    deduplicated: a table is loaded once however many sessions request it, and tables
+    loaded by other processes are recorded in the DB itself.
+
+    Tables are profiled once published, in the background, so that queries waiting
+    for a table don't wait for its profiles too.
+    """
+
+    def __init__(
+        self,
+        database: Database,
+        key: str,
+        path: str,
+        client: "FileBasedClient",
+        db_files: List[DatabaseFile],
+    ):
+        self.database = database
+        self.key = key
+        self.path = path
+        # only used to read files and build tables, through copies of it
+        self.client = client
+        self.db_schema = client.db_schema
+        self.table_files: Dict[str, DatabaseFile] = {
+            table_name: db_file
+            for db_file in db_files
+            for table_name in client.get_table_names(db_file)
+            if self.db_schema.get_table(table_name)
+        }
+        self.table_names = {name.lower(): name for name in self.table_files}
+        # indexes are chosen from the workload as of materialization
+        self.recommendations = advise_indexes(database, self.db_schema)
+
+        # tables are published one at a time through a single connection, which
+        # keeps the DB file open even once evicted from the cache
+        self.conn = sqlite3.connect(
+            path,
+            isolation_level=None,
+            check_same_thread=False,
+            timeout=PUBLISH_TIMEOUT_SECONDS,
+        )
+        client._apply_pragmas(self.conn)
+        self.conn.execute(
+            f"CREATE TABLE IF NOT EXISTS {LOADED_TABLES_TABLE} (name text PRIMARY KEY)"
+        )
+        self._publish_lock = threading.Lock()
+        self._futures: Dict[str, Future] = {}
+        self._futures_lock = threading.Lock()
+        self._profiling: Dict[str, Future] = {}
+        self._warm_up_thread = None
+
+    def get_loaded_tables(self) -> Set[str]:
+        with self._publish_lock:
+            return {
+                name
+                for name, in self.conn.execute(
+                    f"SELECT name FROM {LOADED_TABLES_TABLE}"
+                )
+            }
+
+    def resolve(self, table_name: str) -> Optional[str]:
+        # SQLite table names are case insensitive
+        return self.table_names.get(table_name.lower())
+
+    def load_tables(
+        self,
+        table_names: Iterable[str],
+        on_progress: Optional[ProgressCallback] = None,
+    ):
+        """
+        Loads the given tables unless already loaded, waiting for any being loaded and
+        reporting progress as each is. Names of tables not in the DB, e.g, aliases, are
+        ignored.
+        """
+        futures = [
+            self.load(table_name)
+            for table_name in {self.resolve(name) for name in table_names}
+            if table_name
+        ]
+        if not on_progress or all(future.done() for future in futures):
+            for future in futures:
+                future.result()
+            return
+
+        rows_loaded = 0
+        on_progress(self._get_progress(rows_loaded))
+        for future in as_completed(futures):
+            rows_loaded += future.result()
+            on_progress(self._get_progress(rows_loaded))
+
+    def load(self, table_name: str) -> Future:
+        """
+        Returns the future of loading the given table, starting to load it unless it's
+        loaded or being loaded already. Failed loads are retried on the next call.
+        """
+        with self._futures_lock:
+            future = self._futures.get(table_name)
+            if future and not (future.done() and future.exception()):
+                return future
+            future = _get_executor().submit(self._load, table_name)
+            self._futures[table_name] = future
+            return future
+
+    def _get_progress(self, rows_loaded: int) -> LoadProgress:
+        return LoadProgress(
+            tables_loaded=len(self.get_loaded_tables()),
+            total_tables=len(self.table_files),
+            rows_loaded=rows_loaded,
+        )
+
+    def warm_up(self):
+        """
+        Loads all tables one at a time in the background, leaving the other worker
+        threads free for tables queried in the meantime
+        """
+        with self._futures_lock:
+            if self._warm_up_thread:
+                return
+            self._warm_up_thread = threading.Thread(
+                target=self._warm_up, name=f"warm-up-{self.key[:8]}", daemon=True
+            )
+        self._warm_up_thread.start()
+
+    def _warm_up(self):
+        start_time = timeit.default_timer()
+        for table_name in self.table_files:
+            try:
+                self.load(table_name).result()
+            except Exception:
+                # retried once the table is queried
+                logger.exception("Failed to warm up table %s", table_name)
+        logger.info(
+            "Warmed up %d tables of %s in %.2fs",
+            len(self.table_files),
+            self.path,
+            timeit.default_timer() - start_time,
+        )
+
+    def _load(self, table_name: str) -> int:
+        """
+        Loads the table unless already loaded, returning the number of rows loaded
+        """
+        try:
+            if table_name in self.get_loaded_tables():
+                return 0
+            start_time = timeit.default_timer()
+            num_rows = self._build(table_name)
+            logger.info(
+                "Materialized table %s in %.2fs",
+                table_name,
+                timeit.default_timer() - start_time,
+            )
+            self._profiling[table_name] = _get_profile_executor().submit(
+                self._profile, table_name
+            )
+            return num_rows
+        finally:
+            # worker threads are not managed by Django, clean up stale connections
+            close_old_connections()
+
+    def _build(self, table_name: str) -> int:
+        """
+        Loads the table into a staging DB then publishes it, returning the number of
+        rows loaded
+        """
+        staging_path = self.client._setup_directories()
+        conn = sqlite3.connect(staging_path)
+        try:
+            client = self.client.with_connection(conn)
+            client._apply_pragmas(conn)
+            table_schema = self.db_schema.get_table(table_name)
+            num_rows = client._build_table(
+                self.database,
+                self.table_files[table_name],
+                table_schema,
+                self.recommendations,
+            )
+            conn.close()
+            self._publish(table_name, staging_path)
+            get_materialized_cache().evict(keep=self.path)
+            return num_rows
+        finally:
+            conn.close()
+            self.client._remove_directories(staging_path)
+
+    def _profile(self, table_name: str):
+        """
+        Profiles the published table and saves its profiles to the Database's schema
+        """
+        try:
+            conn = sqlite3.connect(f"file:{self.path}?mode=ro", uri=True)
+            try:
+                client = self.client.with_connection(conn)
+                table = profile_tables(
+                    client.execute_query,
+                    [self.db_schema.get_table(table_name)],
+                    SqlDialect.SQLITE,
+                    version=self.key,
+                )[0]
+            finally:
+                conn.close()
+            save_profiles(self.database, [table])
+        except Exception:
+            # profiles are only informational, the table is usable without them
+            logger.warning("Failed to profile table %s", table_name, exc_info=True)
+        finally:
+            close_old_connections()
+
+    def _publish(self, table_name: str, staging_path: str):
+        with self._publish_lock:
+            self.conn.execute("ATTACH DATABASE ? AS staging", (staging_path,))
+            try:
+                self.conn.execute("BEGIN IMMEDIATE")
+                try:
+                    self._copy_table(table_name)
+                    self.conn.execute("COMMIT")
+                except Exception:
+                    self.conn.execute("ROLLBACK")
+                    raise
+            finally:
+                self.conn.execute("DETACH DATABASE staging")
+
+    def _copy_table(self, table_name: str):
+        loaded = self.conn.execute(
+            f"SELECT 1 FROM {LOADED_TABLES_TABLE} WHERE name = ?", (table_name,)
+        ).fetchone()
+        if loaded:  # by another process
+            return
+        # the table, then its indexes, created empty so that their pages are copied
+        for (sql,) in self.conn.execute(
+            "SELECT sql FROM staging.sqlite_master WHERE tbl_name = ? "
+            "AND sql IS NOT NULL ORDER BY type = 'index'",
+            (table_name,),
+        ).fetchall():
+            self.conn.execute(sql)
+        self.conn.execute(
+            f"INSERT INTO main.{table_name} SELECT * FROM staging.{table_name}"
+        )
+        # statistics the query planner uses to pick between indexes and join orders
+        self.conn.execute(f"ANALYZE main.{table_name}")
+        self.conn.execute(
+            f"INSERT INTO {LOADED_TABLES_TABLE} (name) VALUES (?)", (table_name,)
+        )
+
+
+# materialized DBs by key, created outside of the lock as creating one may block
+_databases: Dict[str, "Future[LazyMaterializedDatabase]"] = {}
+# the key last requested of each Database, which supersedes its previous keys
+_database_keys: Dict[str, str] = {}
+_databases_lock = threading.Lock()
+
+_executor = None
+_profile_executor = None
+
+
+def get_lazy_database(
+    database: Database,
+    key: str,
+    client: "FileBasedClient",
+    db_files: List[DatabaseFile],
+) -> LazyMaterializedDatabase:
+    """
+    Returns the materialized DB of the given key, creating it (or registering an
+    existing one, e.g, of a previous process) in the materialized DB cache if needed.
+
+    Materialized DBs of previous keys of the Database, i.e, before its files or schema
+    changed, are dropped, and closed once the sessions which opened them are done.
+    """
+    cache = get_materialized_cache()
+    with _databases_lock:
+        for cached_key, cached_future in list(_databases.items()):
+            # evicted DBs remain usable by sessions which opened them
+            if cached_future.done() and not os.path.exists(cached_future.result().path):
+                del _databases[cached_key]
+
+        previous_key = _database_keys.get(str(database.id))
+        if previous_key != key:
+            _databases.pop(previous_key, None)
+            _database_keys[str(database.id)] = key
+
+        future = _databases.get(key)
+        creating = future is None
+        if creating:
+            future = _databases[key] = Future()
+        else:
+            cache.lookup(database.id, key)  # mark as recently used
+
+    if not creating:
+        return future.result()
+
+    try:
+        path = cache.lookup(database.id, key) or cache.get_path(database.id, key)
+        lazy_database = LazyMaterializedDatabase(database, key, path, client, db_files)
+    except BaseException as ex:
+        # retried by the next session
+        with _databases_lock:
+            if _databases.get(key) is future:
+                del _databases[key]
+        future.set_exception(ex)
+        raise
+    future.set_result(lazy_database)
+    return lazy_database
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    with _databases_lock:
+        if not _executor:
+            _executor = ThreadPoolExecutor(
+                max_workers=getattr(
+                    settings, "MATERIALIZATION_MAX_WORKERS", DEFAULT_MAX_WORKERS
+                ),
+                thread_name_prefix="materialize",
+            )
+        return _executor
+
+
+def _get_profile_executor() -> ThreadPoolExecutor:
+    # tables are profiled one at a time, leaving the CPU to tables being loaded
+    global _profile_executor
+    with _databases_lock:
+        if not _profile_executor:
+            _profile_executor = ThreadPoolExecutor(
+                max_workers=1, thread_name_prefix="profile"
+            )
+        return _profile_executor
@@ -0,0 +1,144 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+from typing import Dict, Iterable, List, Optional
+
+from django.conf import settings
+
+from deepdive.models import Database, DatabaseFile
+
+logger = logging.getLogger(__name__)
+
+# bump whenever the way files are materialized into SQLite changes
+CACHE_VERSION = 3
+
+DEFAULT_DIRECTORY = "local_dbs/materialized"
+DEFAULT_MAX_BYTES = 10 * 1024**3
+
+
+def _file_fingerprint(db_file: DatabaseFile) -> Dict:
+    return {
+        "id": str(db_file.id),
+        "name": db_file.file.name,
+        "size": db_file.file.size,
+        "configs": db_file.configs,
+    }
+
+
+def get_schema_structure(schema: str) -> Dict:
+    # profiles are computed from the materialized data, and don't change it
+    schema = json.loads(schema)
+    for table in schema.get("tables", []):
+        table.pop("profile", None)
+        for column in table.get("columns", []):
+            column.pop("profile", None)
+    return schema
+
+
+class MaterializedDatabaseCache:
+    """
+    A node-local cache of materialized SQLite databases for file based DBs.
+
+    Entries are content addressed, i.e, keyed by a hash of the Database's schema and
+    the fingerprints and table configs of its DatabaseFiles. Any change to the files,
+    configs or schema results in a new key, so stale entries are never served and are
+    eventually evicted. Entries are evicted least recently used first once the cache
+    grows beyond max_bytes.
+    """
+
+    def __init__(self, directory: str, max_bytes: int):
+        self.directory = os.path.abspath(directory)
+        self.max_bytes = max_bytes
+        os.makedirs(self.directory, exist_ok=True)
+
+    def get_key(self, database: Database, db_files: Iterable[DatabaseFile]) -> str:
+        content = json.dumps(
+            {
+                "version": CACHE_VERSION,
+                "schema": get_schema_structure(database.schema),
+                "files": sorted(
+                    [_file_fingerprint(db_file) for db_file in db_files],
+                    key=lambda fingerprint: fingerprint["id"],
+                ),
+            },
+            sort_keys=True,
+        )
+        return hashlib.sha256(content.encode()).hexdigest()
+
+    def lookup(self, database_id: str, key: str) -> Optional[str]:
+        path = self.get_path(database_id, key)
+        if not os.path.exists(path):
+            return None
+
+        try:
+            os.utime(path)  # mark as recently used
+        except FileNotFoundError:  # evicted concurrently
+            return None
+        return path
+
+    def publish(self, database_id: str, key: str, db_path: str) -> str:
+        """
+        Moves a fully materialized SQLite file into the cache, returning its new path.
+        """
+        path = self.get_path(database_id, key)
+        os.replace(db_path, path)
+        self.evict(keep=path)
+        return path
+
+    def invalidate(self, database_id: str):
+        for path in self._get_entries(database_id):
+            self._remove(path)
+
+    def evict(self, keep: Optional[str] = None):
+        entries = []
+        for path in self._get_entries():
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+
+        total_bytes = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total_bytes <= self.max_bytes:
+                break
+            if path == keep:
+                continue
+            # open read-only connections keep their handle to the unlinked file
+            self._remove(path)
+            total_bytes -= size
+
+    def get_path(self, database_id: str, key: str) -> str:
+        return os.path.join(self.directory, f"{database_id}_{key}.db")
+
+    def _get_entries(self, database_id: Optional[str] = None) -> List[str]:
+        prefix = f"{database_id}_" if database_id else ""
+        return [
+            os.path.join(self.directory, filename)
+            for filename in os.listdir(self.directory)
+            if filename.startswith(prefix) and filename.endswith(".db")
+        ]
+
+    def _remove(self, path: str):
+        try:
+            os.remove(path)
+            logger.info(f"Evicted materialized database: {path}")
+        except FileNotFoundError:
+            pass
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_materialized_cache() -> MaterializedDatabaseCache:
+    global _cache
+    with _cache_lock:
+        if not _cache:
+            _cache = MaterializedDatabaseCache(
+                getattr(settings, "MATERIALIZED_DB_CACHE_DIRECTORY", DEFAULT_DIRECTORY),
+                getattr(settings, "MATERIALIZED_DB_CACHE_MAX_BYTES", DEFAULT_MAX_BYTES),
+            )
+        return _cache
@@ -1,9 +1,10 @@
 from pathlib import Path
-from typing import Dict
+from typing import Dict, List
 
 import pandas as pd
 
 from deepdive.database.file_based_client import FileBasedClient
+from deepdive.database.file_cache import get_local_path
 from deepdive.models import DatabaseFile
 
 
@@ -12,8 +13,10 @@ class ParquetClient(FileBasedClient):
     A DatabaseClient to handle parquet files.
     """
 
+    def get_table_names(self, db_file: DatabaseFile) -> List[str]:
+        return [Path(db_file.file.name).stem]
+
     def read_data(self, db_file: DatabaseFile) -> Dict[str, pd.DataFrame]:
-        with db_file.file.open("r") as file:
-            return {
-                Path(file.name).stem: pd.read_parquet(file)
-            }
+        # memory mapped, rather than read into a buffer first
+        path = get_local_path(db_file.file.storage, db_file.file.name)
+        return {Path(db_file.file.name).stem: pd.read_parquet(path, memory_map=True)}
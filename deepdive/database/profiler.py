@@ -0,0 +1,241 @@
+import datetime
+import decimal
+import logging
+import timeit
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+from django.conf import settings
+
+from deepdive.models import Database
+from deepdive.schema import (
+    ColumnProfile,
+    ColumnSchema,
+    ColumnType,
+    DatabaseSchema,
+    DomainLimit,
+    SqlDialect,
+    TableProfile,
+    TableSchema,
+)
+
+logger = logging.getLogger(__name__)
+
+# remote databases aren't profiled unless set, as it runs queries on their warehouses
+DEFAULT_REMOTE_PROFILE_SAMPLE_ROWS = 0
+
+# most frequent values kept of columns with at most TOP_VALUES_MAX_DISTINCT values
+NUM_TOP_VALUES = 5
+TOP_VALUES_MAX_DISTINCT = 1000
+
+# columns that can't be compared or grouped by, e.g, BigQuery STRUCTs
+UNORDERED_COLUMN_TYPES = (ColumnType.RECORD,)
+
+# sampling clauses of dialects that support sampling a table, by percent of rows
+SAMPLE_CLAUSES = {
+    SqlDialect.SNOWFLAKE_SQL: "SAMPLE SYSTEM ({percent})",
+    SqlDialect.GOOGLE_SQL: "TABLESAMPLE SYSTEM ({percent} PERCENT)",
+}
+
+ExecuteQuery = Callable[[str], pd.DataFrame]
+
+
+def profile_tables(
+    execute_query: ExecuteQuery,
+    tables: List[TableSchema],
+    sql_dialect: SqlDialect,
+    sample_rows: Optional[int] = None,
+    version: Optional[str] = None,
+) -> List[TableSchema]:
+    """
+    Returns copies of the given tables with their (and their columns') profiles set,
+    see profile_table
+    """
+    start_time = timeit.default_timer()
+    profiled_tables = [
+        profile_table(execute_query, table, sql_dialect, sample_rows, version)
+        for table in tables
+    ]
+    logger.info(
+        "Profiled %d tables in %.2fs",
+        len(tables),
+        timeit.default_timer() - start_time,
+    )
+    return profiled_tables
+
+
+def profile_table(
+    execute_query: ExecuteQuery,
+    table: TableSchema,
+    sql_dialect: SqlDialect,
+    sample_rows: Optional[int] = None,
+    version: Optional[str] = None,
+) -> TableSchema:
+    """
+    Returns a copy of the table with its row count and per column null and distinct
+    counts, minimum and maximum computed by a single aggregate query, i.e, in one
+    scan of the table. The most frequent values of low cardinality columns are then
+    counted in one more scan per column type, see _get_top_values.
+
+    Tables of dialects in SAMPLE_CLAUSES with more than sample_rows rows are profiled
+    from a sample of about that many rows, all counts but the row count being of the
+    sample's rows.
+    """
+    source = table.name
+    row_count = None
+    if sample_rows and sql_dialect in SAMPLE_CLAUSES:
+        # a metadata lookup rather than a scan, in Snowflake and BigQuery
+        row_count = _to_int(
+            execute_query(f"SELECT COUNT(*) FROM {table.name}").iloc[0, 0]
+        )
+        if row_count > sample_rows:
+            percent = round(100 * sample_rows / row_count, 4)
+            sample_clause = SAMPLE_CLAUSES[sql_dialect].format(percent=percent)
+            source = f"(SELECT * FROM {table.name} {sample_clause}) AS sampled"
+    sampled = source != table.name
+
+    aggregates = ["COUNT(*)"]
+    for column in table.columns:
+        aggregates.append(f"COUNT({column.name})")
+        if column.column_type not in UNORDERED_COLUMN_TYPES:
+            aggregates.extend(
+                [
+                    f"COUNT(DISTINCT {column.name})",
+                    f"MIN({column.name})",
+                    f"MAX({column.name})",
+                ]
+            )
+    aliases = [f"a{i}" for i in range(len(aggregates))]
+    select = ", ".join(
+        f"{aggregate} AS {alias}" for aggregate, alias in zip(aggregates, aliases)
+    )
+    values = iter(execute_query(f"SELECT {select} FROM {source}").iloc[0].tolist())
+
+    profiled_row_count = _to_int(next(values))
+    profiles: Dict[str, ColumnProfile] = {}
+    for column in table.columns:
+        profile = ColumnProfile(null_count=profiled_row_count - _to_int(next(values)))
+        if column.column_type not in UNORDERED_COLUMN_TYPES:
+            profile.distinct_count = _to_int(next(values))
+            profile.min = _to_profile_value(next(values))
+            profile.max = _to_profile_value(next(values))
+        profiles[column.name] = profile
+
+    low_cardinality_columns = [
+        column
+        for column in table.columns
+        if 0 < (profiles[column.name].distinct_count or 0) <= TOP_VALUES_MAX_DISTINCT
+    ]
+    for column_name, top_values in _get_top_values(
+        execute_query, low_cardinality_columns, source
+    ).items():
+        profiles[column_name].top_values = top_values
+    columns = [
+        column.model_copy(update={"profile": profiles[column.name]})
+        for column in table.columns
+    ]
+
+    return table.model_copy(
+        update={
+            "columns": columns,
+            "profile": TableProfile(
+                row_count=profiled_row_count if row_count is None else row_count,
+                sampled_row_count=profiled_row_count if sampled else None,
+                version=version,
+            ),
+        }
+    )
+
+
+def save_profiles(database: Database, tables: List[TableSchema]):
+    """
+    Sets the profiles of the given tables on the database's schema, dropping those of
+    tables or columns since renamed, see Database.update_schema
+    """
+    profiled_tables = {table.name: table for table in tables}
+
+    def update(schema: DatabaseSchema) -> DatabaseSchema:
+        for table in schema.tables:
+            if table.name in profiled_tables:
+                _set_profiles(table, profiled_tables[table.name])
+        return schema
+
+    database.update_schema(update)
+
+
+def get_remote_profile_sample_rows() -> int:
+    return getattr(
+        settings, "REMOTE_PROFILE_SAMPLE_ROWS", DEFAULT_REMOTE_PROFILE_SAMPLE_ROWS
+    )
+
+
+def _set_profiles(table: TableSchema, profiled_table: TableSchema):
+    table.profile = profiled_table.profile
+    profiles: Dict[str, ColumnProfile] = {
+        column.name: column.profile for column in profiled_table.columns
+    }
+    for column in table.columns:
+        column.profile = profiles.get(column.name)
+
+
+def _get_top_values(
+    execute_query: ExecuteQuery, columns: List[ColumnSchema], source: str
+) -> Dict[str, List]:
+    """
+    Returns the most frequent values of the given columns, by column name. Columns of
+    a type are counted together in one scan: each row is repeated once per column,
+    through a cross join with the columns' indexes, and grouped by column index and
+    that column's value. Types aren't mixed as not all dialects coerce them.
+    """
+    columns_by_type: Dict[ColumnType, List[ColumnSchema]] = {}
+    for column in columns:
+        columns_by_type.setdefault(column.column_type, []).append(column)
+
+    top_values = {}
+    for typed_columns in columns_by_type.values():
+        indexes = " UNION ALL ".join(
+            f"SELECT {i} AS profiled_column" for i in range(len(typed_columns))
+        )
+        cases = " ".join(
+            f"WHEN {i} THEN {column.name}" for i, column in enumerate(typed_columns)
+        )
+        df = execute_query(
+            f"SELECT profiled_column, CASE profiled_column {cases} END AS top_value, "
+            f"COUNT(*) AS frequency FROM {source} CROSS JOIN ({indexes}) AS indexes "
+            "GROUP BY 1, 2 ORDER BY 1, 3 DESC, 2"
+        )
+        df.columns = ["profiled_column", "top_value", "frequency"]
+        df = df[df["top_value"].notna()]
+        for i, values in df.groupby("profiled_column", sort=False):
+            top_values[typed_columns[int(i)].name] = [
+                (_to_profile_value(value), _to_int(frequency))
+                for value, frequency in zip(
+                    values["top_value"].tolist()[:NUM_TOP_VALUES],
+                    values["frequency"].tolist()[:NUM_TOP_VALUES],
+                )
+            ]
+    return top_values
+
+
+def _to_int(value) -> int:
+    return 0 if value is None or pd.isna(value) else int(value)
+
+
+def _to_profile_value(value) -> Optional[DomainLimit]:
+    """
+    Converts a value returned by a client's query to one stored in a ColumnProfile
+    """
+    if value is None or (pd.api.types.is_scalar(value) and pd.isna(value)):
+        return None
+    if isinstance(value, (bool, np.bool_)):
+        return str(bool(value))
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, decimal.Decimal):
+        return float(value)
+    if isinstance(value, (datetime.date, datetime.time)):
+        return value.isoformat()
+    if isinstance(value, (int, float, str)):
+        return value
+    return str(value)
@@ -1,7 +1,22 @@
+import timeit
 from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, TypeVar
+
+from django.conf import settings
 
 from deepdive.models import Database
-from deepdive.schema import DatabaseSchema
+from deepdive.schema import DatabaseSchema, TableSchema
+
+DEFAULT_MAX_WORKERS = 8
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+# cheap per table metadata that changes along with the table's schema, e.g,
+# {"orders": {"last_altered": "2023-09-01 10:00:00", "column_count": 8}}
+TableVersions = Dict[str, Dict]
 
 
 class SchemaClient(ABC):
@@ -11,6 +26,8 @@ class SchemaClient(ABC):
     """
 
     def __init__(self, database: Database):
+        # seconds spent per phase of the last fetch, e.g, {"columns": 1.2}
+        self.timings: Dict[str, float] = {}
         self.initialize(database)
 
     @abstractmethod
@@ -20,3 +37,31 @@ class SchemaClient(ABC):
     @abstractmethod
     def fetch(self) -> DatabaseSchema:
         pass
+
+    @abstractmethod
+    def probe(self) -> TableVersions:
+        """
+        Returns the versions of all tables, used to detect which tables changed
+        """
+        pass
+
+    @abstractmethod
+    def fetch_tables(self, table_names: List[str]) -> List[TableSchema]:
+        pass
+
+    @contextmanager
+    def timed(self, phase: str) -> Iterator[None]:
+        start_time = timeit.default_timer()
+        try:
+            yield
+        finally:
+            self.timings[phase] = timeit.default_timer() - start_time
+
+    def map_concurrently(self, func: Callable[[T], R], items: List[T]) -> List[R]:
+        """
+        Fallback for metadata that can't be fetched in bulk, runs func per item on a
+        bounded number of threads and returns the results in order
+        """
+        max_workers = getattr(settings, "SCHEMA_FETCH_MAX_WORKERS", DEFAULT_MAX_WORKERS)
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            return list(executor.map(func, items))
@@ -0,0 +1,157 @@
+import logging
+import timeit
+from typing import Dict, List, Optional, Set
+
+from django.db import transaction
+
+from deepdive.database import get_schema_client
+from deepdive.database.schema_client import TableVersions
+from deepdive.models import Database, DatabaseSchemaSnapshot, DatabaseType
+from deepdive.schema import DatabaseSchema, TableSchema
+
+logger = logging.getLogger(__name__)
+
+REFRESHED_DATABASE_TYPES = (DatabaseType.SNOWFLAKE, DatabaseType.BIGQUERY)
+
+# number of snapshots kept per database
+MAX_SNAPSHOTS = 10
+
+
+def refresh_schema(database: Database) -> bool:
+    """
+    Re-introspects the tables of a remote database that changed since the last
+    snapshot and merges them into its schema, keeping user provided foreign keys and
+    column comments. Returns whether the schema changed.
+    """
+    start_time = timeit.default_timer()
+    schema_client = get_schema_client(database)
+    table_versions = schema_client.probe()
+
+    schema = database.get_schema()
+    snapshot = database.schema_snapshots.order_by("-version").first()
+    changed_tables = get_changed_tables(
+        schema, snapshot.table_versions if snapshot else None, table_versions
+    )
+    removed_tables = {table.name for table in schema.tables} - set(table_versions)
+    if not changed_tables and not removed_tables:
+        if not snapshot:
+            _save_snapshot(database, schema, table_versions, 1)
+        return False
+
+    fetched_tables = schema_client.fetch_tables(sorted(changed_tables))
+    with transaction.atomic():
+        # merged into the latest schema, which other jobs may have updated meanwhile
+        merged_schema = database.update_schema(
+            lambda schema: merge_schema(schema, fetched_tables, set(table_versions))
+        )
+        _save_snapshot(
+            database,
+            merged_schema,
+            table_versions,
+            snapshot.version + 1 if snapshot else 1,
+        )
+
+    logger.info(
+        "Refreshed %d changed and %d removed tables of database %s in %.2f seconds, "
+        "timings: %s",
+        len(changed_tables),
+        len(removed_tables),
+        database.id,
+        timeit.default_timer() - start_time,
+        schema_client.timings,
+    )
+    return True
+
+
+def get_changed_tables(
+    schema: DatabaseSchema,
+    previous_versions: Optional[TableVersions],
+    table_versions: TableVersions,
+) -> Set[str]:
+    """
+    Returns the tables that were added or altered. Without a previous snapshot, only
+    column counts can be compared against the current schema.
+    """
+    changed_tables = set()
+    for table_name, table_version in table_versions.items():
+        table = schema.get_table(table_name)
+        if not table:
+            changed_tables.add(table_name)
+        elif previous_versions is None:
+            if len(table.columns) != table_version["column_count"]:
+                changed_tables.add(table_name)
+        elif previous_versions.get(table_name) != table_version:
+            changed_tables.add(table_name)
+    return changed_tables
+
+
+def merge_schema(
+    schema: DatabaseSchema,
+    fetched_tables: List[TableSchema],
+    table_names: Set[str],
+) -> DatabaseSchema:
+    """
+    Replaces the tables of schema with the fetched ones and drops the tables no
+    longer in table_names, while keeping:
+        - comments of columns that still exist, as they may have been user provided
+        - primary and foreign keys between columns that still exist
+    """
+    fetched = {table.name: table for table in fetched_tables}
+    tables = []
+    for table in schema.tables:
+        if table.name not in table_names:
+            continue
+        tables.append(
+            _merge_table(table, fetched.pop(table.name))
+            if table.name in fetched
+            else table
+        )
+    tables.extend(fetched.values())
+
+    columns = {
+        f"{table.name}.{column.name}".lower()
+        for table in tables
+        for column in table.columns
+    }
+    return schema.model_copy(
+        update={
+            "tables": tables,
+            "primary_keys": [
+                key for key in schema.primary_keys or [] if key.lower() in columns
+            ],
+            "foreign_keys": [
+                key
+                for key in schema.foreign_keys or []
+                if key.primary.lower() in columns and key.reference.lower() in columns
+            ],
+        }
+    )
+
+
+def _merge_table(table: TableSchema, fetched_table: TableSchema) -> TableSchema:
+    comments: Dict[str, str] = {
+        column.name: column.comment for column in table.columns if column.comment
+    }
+    columns = []
+    for column in fetched_table.columns:
+        if column.name in comments:
+            column = column.model_copy(update={"comment": comments[column.name]})
+        columns.append(column)
+    return fetched_table.model_copy(update={"columns": columns})
+
+
+def _save_snapshot(
+    database: Database,
+    schema: DatabaseSchema,
+    table_versions: TableVersions,
+    version: int,
+):
+    DatabaseSchemaSnapshot.objects.create(
+        database=database,
+        version=version,
+        schema=schema.model_dump_json(exclude_none=True),
+        table_versions=table_versions,
+    )
+    DatabaseSchemaSnapshot.objects.filter(
+        database=database, version__lte=version - MAX_SNAPSHOTS
+    ).delete()
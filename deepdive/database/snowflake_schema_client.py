@@ -1,11 +1,12 @@
 import json
 import logging
-from typing import List
+from collections import defaultdict
+from typing import Dict, List
 
 from pandas import DataFrame
 from snowflake.snowpark import Session
 
-from deepdive.database.schema_client import SchemaClient
+from deepdive.database.schema_client import SchemaClient, TableVersions
 from deepdive.database.snowflake_helper import infer_missing_dtypes
 from deepdive.models import Database
 from deepdive.schema import (
@@ -20,13 +21,42 @@ from deepdive.schema import (
 logger = logging.getLogger(__name__)
 
 
+# single scan of the columns of all tables in the session's schema
+COLUMNS_QUERY = """
+select c.table_name, c.column_name, c.data_type, c.numeric_scale, c.comment
+from information_schema.columns c
+join information_schema.tables t
+    on c.table_schema = t.table_schema and c.table_name = t.table_name
+where c.table_schema = current_schema() and t.table_type = 'BASE TABLE'
+order by c.table_name, c.ordinal_position
+"""
+
+PROBE_QUERY = """
+select t.table_name, t.last_altered, count(c.column_name) as column_count
+from information_schema.tables t
+left join information_schema.columns c
+    on c.table_schema = t.table_schema and c.table_name = t.table_name
+where t.table_schema = current_schema() and t.table_type = 'BASE TABLE'
+group by t.table_name, t.last_altered
+"""
+
+# INFORMATION_SCHEMA reports SQL type names for the types SHOW COLUMNS reports
+INFORMATION_SCHEMA_TYPES = {"NUMBER": "FIXED", "FLOAT": "REAL"}
+
+
 # Taken from: https://docs.snowflake.com/en/sql-reference/sql/show-columns
 def _parse_snowflake_type(data_type: str) -> ColumnType:
     data_json = json.loads(data_type)
-    data_type = data_json["type"]
+    return _to_column_type(data_json["type"], data_json.get("scale"))
+
+
+def _parse_information_schema_type(data_type: str, scale: int) -> ColumnType:
+    return _to_column_type(INFORMATION_SCHEMA_TYPES.get(data_type, data_type), scale)
+
 
+def _to_column_type(data_type: str, scale: int) -> ColumnType:
     if data_type == "FIXED":
-        return ColumnType.INT if data_json["scale"] == 0 else ColumnType.FLOAT
+        return ColumnType.INT if scale == 0 else ColumnType.FLOAT
     if data_type == "REAL":
         return ColumnType.FLOAT
     elif data_type == "TEXT":
@@ -58,29 +88,76 @@ class SnowflakeSchemaClient(SchemaClient):
         ).create()
 
     def fetch(self) -> DatabaseSchema:
+        with self.timed("tables"):
+            tables = self._fetch_tables()
+        with self.timed("primary_keys"):
+            primary_keys = self._fetch_primary_keys()
         return DatabaseSchema(
-            tables=self._fetch_tables(),
-            primary_keys=self._fetch_primary_keys(),
+            tables=tables,
+            primary_keys=primary_keys,
             foreign_keys=self._fetch_foreign_keys(),
             sql_dialect=SqlDialect.SNOWFLAKE_SQL,
         )
 
+    def probe(self) -> TableVersions:
+        with self.timed("probe"):
+            rows = self.session.sql(PROBE_QUERY).collect()
+        return {
+            row["TABLE_NAME"]: {
+                "last_altered": str(row["LAST_ALTERED"]),
+                "column_count": row["COLUMN_COUNT"],
+            }
+            for row in rows
+        }
+
+    def fetch_tables(self, table_names: List[str]) -> List[TableSchema]:
+        with self.timed("columns"):
+            return self.map_concurrently(self._fetch_table, table_names)
+
     def _fetch_tables(self) -> List[TableSchema]:
-        tables = []
-        table_df = self.session.sql("show tables")
-        table_names = [row["name"] for row in table_df.collect()]
-        for table_name in table_names:
-            rows = self.session.sql(f"show columns in table {table_name}").collect()
-            columns = [
-                ColumnSchema(
-                    name=row["column_name"],
-                    column_type=_parse_snowflake_type(row["data_type"]),
-                )
-                for row in rows
-            ]
-            tables.append(TableSchema(name=table_name, columns=columns))
-
-        return tables
+        try:
+            return self._fetch_tables_in_bulk()
+        except Exception:
+            logger.warning(
+                "Failed to scan INFORMATION_SCHEMA.COLUMNS, fetching columns per table",
+                exc_info=True,
+            )
+            return self._fetch_tables_per_table()
+
+    def _fetch_tables_in_bulk(self) -> List[TableSchema]:
+        columns: Dict[str, List[ColumnSchema]] = defaultdict(list)
+        for row in self.session.sql(COLUMNS_QUERY).collect():
+            column = ColumnSchema(
+                name=row["COLUMN_NAME"],
+                column_type=_parse_information_schema_type(
+                    row["DATA_TYPE"], row["NUMERIC_SCALE"]
+                ),
+            )
+            if row["COMMENT"]:
+                column.comment = row["COMMENT"]
+            columns[row["TABLE_NAME"]].append(column)
+        return [
+            TableSchema(name=table_name, columns=table_columns)
+            for table_name, table_columns in columns.items()
+        ]
+
+    def _fetch_tables_per_table(self) -> List[TableSchema]:
+        with self.timed("table_names"):
+            table_df = self.session.sql("show tables")
+            table_names = [row["name"] for row in table_df.collect()]
+        with self.timed("columns"):
+            return self.map_concurrently(self._fetch_table, table_names)
+
+    def _fetch_table(self, table_name: str) -> TableSchema:
+        rows = self.session.sql(f"show columns in table {table_name}").collect()
+        columns = [
+            ColumnSchema(
+                name=row["column_name"],
+                column_type=_parse_snowflake_type(row["data_type"]),
+            )
+            for row in rows
+        ]
+        return TableSchema(name=table_name, columns=columns)
 
     def _fetch_foreign_keys(self) -> List[ForeignKey]:
         return None
@@ -1,15 +1,23 @@
+import asyncio
+import hashlib
+import json
 import logging
 import pprint
+import timeit
 import traceback
 from dataclasses import dataclass
-from typing import Dict, List, Optional
+from typing import Awaitable, Callable, Dict, List, Optional, Set
 
 import sqlparse
-from asgiref.sync import sync_to_async
+from django.conf import settings
+from pandas import DataFrame
 
-from deepdive.database import get_db_client
+from deepdive.database import DatabaseClient, ProgressCallback, get_db_client
+from deepdive.database.executor import get_executor
+from deepdive.database.materialized_cache import get_schema_structure
 from deepdive.gpt.openai_client import OpenAIClient
 from deepdive.models import Database, Session, UnparsedQuery, Visualization
+from deepdive.query_cache import get_query_cache
 from deepdive.schema import DatabaseSchema, VizSpec
 from deepdive.sql.parser import (
     SqlTree,
@@ -23,6 +31,7 @@ from deepdive.sql.processor import (
     MultiSqlProcessor,
     FilterBadQueriesProcessor,
 )
+from deepdive.viz.downsampler import downsample, get_fetch_limit
 from deepdive.viz.interpreter import VizSpecInterpreter
 from deepdive.viz.processor import (
     AliasProcessor,
@@ -32,19 +41,17 @@ from deepdive.viz.processor import (
 
 logger = logging.getLogger(__name__)
 
+# number of rows queries are limited to, unless the visualization is downsampled
+RESULT_LIMIT = 500
+
+DEFAULT_REPORT_CONCURRENCY = 4
+
 
 def _fetch_schema(database: Database, tables: List[str]):
     db_schema = DatabaseSchema.model_validate_json(database.schema)
 
-    # TEMP: disabled, to enable, need to merge and account for foreign keys / user provided updates
-    # refetch for remote databases where the schema can change
-    # if database.database_type in (
-    #     Database.DatabaseType.SNOWFLAKE,
-    #     Database.DatabaseType.BIGQUERY,
-    # ):
-    #     db_schema = fetch_schema(database)
-    #     database.schema = db_schema.model_dump_json(exclude_none=True)
-    #     database.save()
+    # remote database schemas are refreshed in the background when a session
+    # connects, see deepdive.database.schema_refresh
 
     db_table_names = [table.name for table in db_schema.tables]
     if not all(table in db_table_names for table in tables):
@@ -54,13 +61,49 @@ def _fetch_schema(database: Database, tables: List[str]):
     return db_schema
 
 
+def _get_database_version(database: Database, db_client: DatabaseClient) -> str:
+    """
+    Identifies the data a query runs against, so that cached results are never
+    served across schema changes or, for file based DBs, file and config changes
+    """
+    version = json.dumps(
+        {
+            # profiles are saved as tables are profiled, and don't change results
+            "schema": get_schema_structure(database.schema),
+            "materialized_key": getattr(db_client, "materialized_key", ""),
+        },
+        sort_keys=True,
+    )
+    return hashlib.sha256(version.encode()).hexdigest()
+
+
 @dataclass
 class DeepDiveResponse:
     sql_query: Optional[str] = None
-    data: Optional[str] = None
     visualization_spec: Optional[str] = None
     error_message: Optional[str] = None
 
+    # the query result, encoded in the format the session asked for when sent
+    dataframe: Optional[DataFrame] = None
+    # the JSON-encoded query result, see get_data
+    data: Optional[str] = None
+
+    # whether data holds a subset of the rows returned, see viz.downsampler
+    downsampled: bool = False
+    original_row_count: Optional[int] = None
+
+    # seconds elapsed since a question was received, see process_question_async
+    timings: Optional[Dict[str, float]] = None
+
+    def get_data(self) -> Optional[str]:
+        """
+        Returns the query result JSON-encoded, as persisted and sent in the JSON result
+        format. Encoded on first use only, as other result formats don't need it.
+        """
+        if self.data is None and self.dataframe is not None:
+            self.data = self.dataframe.to_json(orient="table", index=True)
+        return self.data
+
 
 class DeepDiveClient:
     """
@@ -71,31 +114,74 @@ class DeepDiveClient:
     def __init__(self, session: Session):
         self.session = session
         self.db_client = None
+        # creating the client, which finalize_async waits for, see initialize_async
+        self.db_client_future: Optional[asyncio.Future] = None
+        self.executor = get_executor(session.database)
         self.db_schema = _fetch_schema(session.database, session.tables)
         self.gpt_client = OpenAIClient(self.db_schema)
         self.sql_processor = MultiSqlProcessor(
             FilterBadQueriesProcessor(self.db_schema),
-            LimitProcessor(500),
+            LimitProcessor(RESULT_LIMIT),
         )
         self.viz_spec_processor = MultiVizSpecProcessor(
             AliasProcessor(), TablesProcessor(self.db_schema)
         )
         self.viz_spec_interpreter = VizSpecInterpreter(self.db_schema)
         self.report_queries = {}
-
-    async def initialize_async(self):
-        self.db_client = await sync_to_async(get_db_client)(self.session.database)
+        self.query_cache = get_query_cache()
+        self.database_version = None
+
+    async def initialize_async(self, on_progress: Optional[ProgressCallback] = None):
+        # get_db_client carries on in its thread if initialization is cancelled, e.g,
+        # as the session disconnects, so the client it returns is finalized then
+        self.db_client_future = asyncio.ensure_future(
+            self.executor.run_async(get_db_client, self.session.database, on_progress)
+        )
+        self.db_client = await asyncio.shield(self.db_client_future)
+        self.database_version = _get_database_version(
+            self.session.database, self.db_client
+        )
         await self._get_report_queries_async()
 
     async def finalize_async(self):
-        await sync_to_async(self.db_client.finalize)()
+        if self.db_client_future:
+            # the session may have disconnected while the client was being created
+            await asyncio.wait([self.db_client_future])
+            if not self.db_client_future.exception():
+                await self.executor.run_async(self.db_client_future.result().finalize)
+        self.executor.release()
+
+    async def process_question_async(
+        self,
+        question: str,
+        on_partial_query: Optional[Callable[[str], Awaitable[None]]] = None,
+    ) -> DeepDiveResponse:
+        """
+        Converts the question into a query and processes it. If on_partial_query is
+        given, the query is streamed to it while being generated.
+        """
+        start_time = timeit.default_timer()
+        timings = {}
+
+        async def on_partial_query_timed(sql_query: str):
+            timings.setdefault(
+                "time_to_first_token", timeit.default_timer() - start_time
+            )
+            await on_partial_query(sql_query)
 
-    async def process_question_async(self, question: str) -> DeepDiveResponse:
         example_queries = "\n".join(self.report_queries.values())
         sql_query = await self.gpt_client.construct_query_async(
-            question, example_queries
+            question,
+            example_queries,
+            on_partial_query_timed if on_partial_query else None,
         )
-        return await self.process_query_async(sql_query)
+        timings["time_to_query"] = timeit.default_timer() - start_time
+
+        response = await self.process_query_async(sql_query)
+        timings["time_to_chart"] = timeit.default_timer() - start_time
+        response.timings = timings
+        logger.info("Processed question %r with timings %s", question, timings)
+        return response
 
     async def process_query_async(self, sql_query: str) -> DeepDiveResponse:
         sql_tree = parse_sql(sql_query)
@@ -125,19 +211,52 @@ class DeepDiveClient:
 
     async def process_viz_spec_async(self, viz_spec: VizSpec) -> DeepDiveResponse:
         viz_spec = self.viz_spec_processor.process(viz_spec)
-        sql_query = self.viz_spec_interpreter.compile(viz_spec).build_str()
-        response = await self._execute_query_async(sql_query)
+
+        # downsampled visualizations fetch more rows than they show
+        fetch_limit = get_fetch_limit(viz_spec, RESULT_LIMIT)
+        query_viz_spec = (
+            viz_spec.model_copy(update={"limit": fetch_limit})
+            if fetch_limit
+            else viz_spec
+        )
+        sql_tree = self.viz_spec_interpreter.compile(query_viz_spec)
+        response = await self._execute_query_async(
+            sql_tree.build_str(), viz_spec, sql_tree.get_table_names()
+        )
         response.visualization_spec = viz_spec.model_dump_json()
         return response
 
-    async def generate_report_async(self) -> Dict[str, DeepDiveResponse]:
+    async def generate_report_async(
+        self,
+        on_response: Optional[
+            Callable[[str, DeepDiveResponse], Awaitable[None]]
+        ] = None,
+    ) -> Dict[str, DeepDiveResponse]:
+        """
+        Processes the generated queries concurrently, up to REPORT_CONCURRENCY at a
+        time, invoking on_response for each as soon as it completes
+        """
         question_query_pairs = (
             await self.gpt_client.generate_questions_and_queries_async()
         )
-        response = {}
-        for pair in question_query_pairs:
-            response[pair["question"]] = await self.process_query_async(pair["query"])
-        return response
+        semaphore = asyncio.Semaphore(
+            getattr(settings, "REPORT_CONCURRENCY", DEFAULT_REPORT_CONCURRENCY)
+        )
+
+        async def process_pair_async(pair: Dict[str, str]) -> DeepDiveResponse:
+            async with semaphore:
+                response = await self.process_query_async(pair["query"])
+            if on_response:
+                await on_response(pair["question"], response)
+            return response
+
+        responses = await asyncio.gather(
+            *[process_pair_async(pair) for pair in question_query_pairs]
+        )
+        return {
+            pair["question"]: response
+            for pair, response in zip(question_query_pairs, responses)
+        }
 
     def add_new_viz_to_report(self, viz: Visualization):
         self.report_queries[
@@ -153,23 +272,56 @@ class DeepDiveClient:
                 str(viz.id)
             ] = self.gpt_client.prompter.construct_visualization_example_prompt(viz)
 
-    async def _execute_query_async(self, sql_query: Optional[str]) -> DeepDiveResponse:
+    async def _execute_query_async(
+        self,
+        sql_query: Optional[str],
+        viz_spec: Optional[VizSpec] = None,
+        table_names: Optional[Set[str]] = None,
+    ) -> DeepDiveResponse:
         if not sql_query:
             return DeepDiveResponse()
 
-        try:
-            print(sql_query)
-            df = await sync_to_async(self.db_client.execute_query)(sql_query)
-        except Exception as ex:
-            logger.error("Exception in _execute_query: ")
-            traceback.print_exc()
-            return DeepDiveResponse(
-                sql_query=self._format_sql_query(sql_query), error_message=repr(ex)
+        cache_key = self.query_cache.get_key(
+            self.session.database.id, self.database_version, sql_query
+        )
+        cached_result = self.query_cache.get(cache_key)
+        if cached_result:
+            formatted_query, df = cached_result
+        else:
+            try:
+                print(sql_query)
+                # e.g, file based tables are loaded on first being queried
+                await self.executor.run_async(
+                    self.db_client.load_tables, table_names or set()
+                )
+                df = await self.executor.run_async(
+                    self.db_client.execute_query, sql_query
+                )
+            except Exception as ex:
+                logger.error("Exception in _execute_query: ")
+                traceback.print_exc()
+                return DeepDiveResponse(
+                    sql_query=self._format_sql_query(sql_query), error_message=repr(ex)
+                )
+
+            formatted_query = format_query(sql_query)
+            self.query_cache.put(
+                cache_key,
+                self.session.database.database_type,
+                (formatted_query, df),
+                len(formatted_query) + int(df.memory_usage(deep=True).sum()),
             )
 
+        original_row_count = len(df)
+        downsampled = False
+        if viz_spec:
+            df, downsampled = downsample(df, viz_spec)
+
         return DeepDiveResponse(
-            sql_query=format_query(sql_query),
-            data=df.to_json(orient="table", index=True),
+            sql_query=formatted_query,
+            dataframe=df,
+            downsampled=downsampled,
+            original_row_count=original_row_count if downsampled else None,
         )
 
     async def _generate_viz_spec_async(
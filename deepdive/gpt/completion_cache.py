@@ -0,0 +1,128 @@
+import hashlib
+import json
+import logging
+import time
+from datetime import timedelta
+from typing import Any, Dict, Optional
+
+from django.conf import settings
+from django.db import DatabaseError
+from django.utils import timezone
+
+from deepdive.models import CompletionCacheEntry
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TTL_SECONDS = 7 * 24 * 60 * 60
+DEFAULT_MAX_ENTRIES = 100000
+# expired and least recently used entries are pruned at most this often, per process
+DEFAULT_PRUNE_INTERVAL_SECONDS = 10 * 60
+
+
+def is_cacheable(params: Dict[str, Any]) -> bool:
+    # completions sampled with a temperature are expected to vary between calls
+    return params.get("temperature", 0) == 0
+
+
+class CompletionCache:
+    """
+    A persistent cache of LLM completions, keyed by model, prompt and generation
+    parameters and stored in Postgres so that it is shared across server processes.
+
+    Entries expire after ttl_seconds, and the least recently used entries are
+    pruned once there are more than max_entries. Pruning runs on writes, at most
+    once every prune_interval_seconds, so the cache may briefly exceed max_entries.
+
+    Failing to read or write the cache never fails a completion.
+    """
+
+    def __init__(
+        self,
+        ttl_seconds: int,
+        max_entries: int,
+        prune_interval_seconds: int = DEFAULT_PRUNE_INTERVAL_SECONDS,
+    ):
+        self.ttl = timedelta(seconds=ttl_seconds)
+        self.max_entries = max_entries
+        self.prune_interval = prune_interval_seconds
+        self.next_prune = 0.0
+
+    def get_key(self, model: str, prompt: str, params: Dict[str, Any]) -> str:
+        prompt_hash = hashlib.sha256(prompt.encode()).hexdigest()
+        encoded = json.dumps(
+            {"model": model, "prompt": prompt_hash, "params": params}, sort_keys=True
+        )
+        return hashlib.sha256(encoded.encode()).hexdigest()
+
+    async def get_async(self, key: str) -> Optional[str]:
+        now = timezone.now()
+        try:
+            entry = await CompletionCacheEntry.objects.filter(key=key).afirst()
+            if not entry:
+                return None
+            if entry.timestamp + self.ttl < now:
+                await entry.adelete()
+                return None
+
+            await CompletionCacheEntry.objects.filter(key=key).aupdate(
+                last_accessed=now
+            )
+            return entry.completion
+        except DatabaseError:
+            logger.warning("Failed to read completion cache", exc_info=True)
+            return None
+
+    async def put_async(self, key: str, model: str, completion: str):
+        now = timezone.now()
+        try:
+            await CompletionCacheEntry.objects.aupdate_or_create(
+                key=key,
+                defaults={
+                    "model": model,
+                    "completion": completion,
+                    "timestamp": now,
+                    "last_accessed": now,
+                },
+            )
+            if time.monotonic() >= self.next_prune:
+                self.next_prune = time.monotonic() + self.prune_interval
+                await self._prune_async(now)
+        except DatabaseError:
+            logger.warning("Failed to write completion cache", exc_info=True)
+
+    async def _prune_async(self, now):
+        await CompletionCacheEntry.objects.filter(
+            timestamp__lt=now - self.ttl
+        ).adelete()
+
+        if await CompletionCacheEntry.objects.acount() <= self.max_entries:
+            return
+        cutoff = (
+            await CompletionCacheEntry.objects.order_by("-last_accessed")
+            .values_list("last_accessed", flat=True)[
+                self.max_entries : self.max_entries + 1
+            ]
+            .afirst()
+        )
+        if cutoff:
+            await CompletionCacheEntry.objects.filter(
+                last_accessed__lte=cutoff
+            ).adelete()
+
+
+_completion_cache = None
+
+
+def get_completion_cache() -> CompletionCache:
+    global _completion_cache
+    if _completion_cache is None:
+        _completion_cache = CompletionCache(
+            getattr(settings, "COMPLETION_CACHE_TTL_SECONDS", DEFAULT_TTL_SECONDS),
+            getattr(settings, "COMPLETION_CACHE_MAX_ENTRIES", DEFAULT_MAX_ENTRIES),
+            getattr(
+                settings,
+                "COMPLETION_CACHE_PRUNE_INTERVAL_SECONDS",
+                DEFAULT_PRUNE_INTERVAL_SECONDS,
+            ),
+        )
+    return _completion_cache
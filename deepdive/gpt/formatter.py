@@ -1,8 +1,12 @@
 import json
-from typing import Dict, List
+from typing import Dict, List, Optional, Tuple
+
+from deepdive.sql.parser.sql_parser import parse_sql
 
 CODE_BLOCK = "```"
 SQL_CODE_BLOCK = "```sql"
+# string literals and quoted identifiers, which may hold statement terminators
+QUOTES = ("'", '"', "`")
 
 
 class Formatter:
@@ -27,6 +31,30 @@ class Formatter:
     def format_construct_query_response(self, response: str) -> str:
         return self._sanitize("SELECT " + response)
 
+    def is_construct_query_complete(self, response: str) -> bool:
+        """
+        Whether a partial (streamed) response already holds the complete query, i.e,
+        the statement was terminated, its code block closed or the next example began
+        """
+        response = response.replace(SQL_CODE_BLOCK, CODE_BLOCK)
+        terminated, _ = _scan_quotes(response)
+        return terminated or response.count(CODE_BLOCK) >= 2 or "Q:" in response
+
+    def is_construct_query_valid(self, response: str) -> bool:
+        """
+        Whether the query of a response parses, e.g, for a response whose streaming
+        was stopped early to be cached
+        """
+        query = self.format_construct_query_response(response)
+        _, open_quote = _scan_quotes(query)
+        if open_quote:
+            return False
+        try:
+            parse_sql(query)
+        except Exception:
+            return False
+        return True
+
     def format_generate_questions_and_queries_response(self, response: str) -> List[Dict[str, str]]:
         question_query_pairs = json.loads(response)
         for pair in question_query_pairs:
@@ -43,3 +71,20 @@ class Formatter:
         response = response.replace(";", "")
         response = response.replace("\n", " ")
         return response
+
+
+def _scan_quotes(response: str) -> Tuple[bool, Optional[str]]:
+    """
+    Returns whether the response holds a statement terminator outside of quotes, and
+    the quote left open at its end, if any
+    """
+    quote = None
+    for char in response:
+        if quote:
+            if char == quote:
+                quote = None
+        elif char in QUOTES:
+            quote = char
+        elif char == ";":
+            return True, None
+    return False, quote
@@ -1,7 +1,8 @@
 import backoff
 import openai
-from typing import Dict, List
+from typing import Awaitable, Callable, Dict, List, Optional
 
+from deepdive.gpt.completion_cache import get_completion_cache, is_cacheable
 from deepdive.gpt.formatter import Formatter
 from deepdive.gpt.prompter import Prompter
 from deepdive.schema import DatabaseSchema
@@ -16,28 +17,126 @@ class OpenAIClient:
         self.model = model
         self.prompter = Prompter(db_schema)
         self.formatter = Formatter()
+        self.completion_cache = get_completion_cache()
 
     @backoff.on_exception(backoff.expo, openai.OpenAIError)
-    async def complete_prompt_async(self, prompt: str, **kwargs) -> str:
+    async def complete_prompt_async(
+        self, prompt: str, temperature: float = 0, **kwargs
+    ) -> str:
         messages = [{"role": "user", "content": prompt}]
         response = await openai.ChatCompletion.acreate(
-            model=self.model, messages=messages, temperature=0, **kwargs
+            model=self.model, messages=messages, temperature=temperature, **kwargs
         )
         return response.choices[0].message.content
+
+    @backoff.on_exception(backoff.expo, openai.OpenAIError)
+    async def stream_prompt_async(
+        self,
+        prompt: str,
+        on_content: Callable[[str], Awaitable[None]],
+        is_complete: Optional[Callable[[str], bool]] = None,
+        temperature: float = 0,
+        **kwargs,
+    ) -> str:
+        """
+        Streams the completion, invoking on_content with the content received so far
+        as tokens arrive. Stops reading once is_complete holds for the content.
+        """
+        messages = [{"role": "user", "content": prompt}]
+        response = await openai.ChatCompletion.acreate(
+            model=self.model,
+            messages=messages,
+            temperature=temperature,
+            stream=True,
+            **kwargs,
+        )
+        content = ""
+        try:
+            async for chunk in response:
+                delta = chunk.choices[0].delta.get("content")
+                if not delta:
+                    continue
+                content += delta
+                await on_content(content)
+                if is_complete and is_complete(content):
+                    break
+        finally:
+            if hasattr(response, "aclose"):
+                await response.aclose()
+        return content
+
+    async def complete_prompt_cached_async(
+        self,
+        prompt: str,
+        temperature: float = 0,
+        on_content: Optional[Callable[[str], Awaitable[None]]] = None,
+        is_complete: Optional[Callable[[str], bool]] = None,
+        is_valid: Optional[Callable[[str], bool]] = None,
+        **kwargs,
+    ) -> str:
+        """
+        Same as complete_prompt_async, but answers repeated deterministic prompts
+        from the completion cache. Streams the completion if on_content is given.
+
+        Completions whose streaming was stopped by is_complete are only cached if
+        is_valid holds for them, as they may have been cut short.
+        """
+        params = {"temperature": temperature, **kwargs}
+        key = None
+        if is_cacheable(params):
+            key = self.completion_cache.get_key(self.model, prompt, params)
+            completion = await self.completion_cache.get_async(key)
+            if completion is not None:
+                if on_content:
+                    await on_content(completion)
+                return completion
+
+        if on_content:
+            completion = await self.stream_prompt_async(
+                prompt, on_content, is_complete, **params
+            )
+            stopped_early = is_complete and is_complete(completion)
+            if stopped_early and not (is_valid and is_valid(completion)):
+                key = None
+        else:
+            completion = await self.complete_prompt_async(prompt, **params)
+        if key:
+            await self.completion_cache.put_async(key, self.model, completion)
+        return completion
     
     async def generate_questions_async(self) -> List[str]:
         prompt = self.prompter.generate_questions_prompt()
         response = await self.complete_prompt_async(prompt)
         return self.formatter.format_response("generate_questions", response)
 
-    async def construct_query_async(self, question: str, example_queries: str) -> str:
+    async def construct_query_async(
+        self,
+        question: str,
+        example_queries: str,
+        on_partial_query: Optional[Callable[[str], Awaitable[None]]] = None,
+    ) -> str:
+        """
+        Constructs the query for a question, streaming the partially generated query
+        to on_partial_query if given
+        """
         prompt = self.prompter.construct_query_prompt(question, example_queries)
         extra_args = {
             "max_tokens": 600,
         }
         if example_queries:
             extra_args["stop"] = ["Q:"]
-        response = await self.complete_prompt_async(prompt, **extra_args)
+        if on_partial_query:
+
+            async def on_content(content: str):
+                await on_partial_query(
+                    self.formatter.format_response("construct_query", content)
+                )
+
+            extra_args["on_content"] = on_content
+            extra_args["is_complete"] = self.formatter.is_construct_query_complete
+            extra_args["is_valid"] = self.formatter.is_construct_query_valid
+
+        response = await self.complete_prompt_cached_async(prompt, **extra_args)
         return self.formatter.format_response("construct_query", response)
 
     async def generate_questions_and_queries_async(self) -> List[Dict[str, str]]:
@@ -1,8 +1,16 @@
 import json
+import logging
+import timeit
+from typing import List
 
+from django.conf import settings
+
+from deepdive.gpt.schema_index import SchemaIndex, describe_table, estimate_tokens
 from deepdive.sql.parser import format_query_for_prompt
 from deepdive.models import Visualization
-from deepdive.schema import DatabaseSchema
+from deepdive.schema import DatabaseSchema, TableSchema
+
+logger = logging.getLogger(__name__)
 
 NUM_QUESTIONS = 4
 QUESTION_QUERY_SCHEMA = [
@@ -12,11 +20,21 @@ QUESTION_QUERY_SCHEMA = [
     }
 ]
 
+# schemas with more tables than this only describe the tables relevant to a question
+DEFAULT_SCHEMA_PRUNING_MIN_TABLES = 20
+DEFAULT_SCHEMA_PRUNING_TOP_K = 8
+DEFAULT_SCHEMA_PRUNING_MAX_TOKENS = 2000
+
 
 class Prompter:
     def __init__(self, schema: DatabaseSchema):
         self.schema = schema
-        self.db_description = self._construct_db_description()
+        self.db_description = self._construct_db_description(schema.tables)
+        self.schema_index = None
+        if len(schema.tables) > getattr(
+            settings, "SCHEMA_PRUNING_MIN_TABLES", DEFAULT_SCHEMA_PRUNING_MIN_TABLES
+        ):
+            self.schema_index = SchemaIndex(schema)
 
     def generate_questions_prompt(self) -> str:
         prompt = (
@@ -28,13 +46,18 @@ class Prompter:
 
     def construct_query_prompt(self, question: str, example_queries: str) -> str:
         prompt = f"Complete {self.schema.sql_dialect.value} query only and with no explanation\n"
-        prompt += f"{self.db_description}"
+        prompt += f"{self._construct_relevant_db_description(question)}"
         if example_queries:
             prompt += f"\n\n{example_queries}\n"
             prompt += f"Q: {question}\nSQL: SELECT"
         else:
             prompt += f"{question}\nSELECT"
         print(prompt)
+        logger.info(
+            "Constructed query prompt of %d chars (~%d tokens)",
+            len(prompt),
+            estimate_tokens(prompt),
+        )
         return prompt
 
     def generate_questions_and_queries_prompt(self) -> str:
@@ -56,11 +79,31 @@ class Prompter:
     def generate_foreign_keys_prompt(self) -> str:
         pass
 
-    def _construct_db_description(self) -> str:
+    def _construct_relevant_db_description(self, question: str) -> str:
+        if not self.schema_index:
+            return self.db_description
+
+        start_time = timeit.default_timer()
+        tables = self.schema_index.select_tables(
+            question,
+            getattr(settings, "SCHEMA_PRUNING_TOP_K", DEFAULT_SCHEMA_PRUNING_TOP_K),
+            getattr(
+                settings,
+                "SCHEMA_PRUNING_MAX_TOKENS",
+                DEFAULT_SCHEMA_PRUNING_MAX_TOKENS,
+            ),
+        )
+        logger.info(
+            "Selected %d of %d tables in %.2f ms",
+            len(tables),
+            len(self.schema.tables),
+            (timeit.default_timer() - start_time) * 1000,
+        )
+        return self._construct_db_description(tables)
+
+    def _construct_db_description(self, tables: List[TableSchema]) -> str:
         description = f"### {self.schema.sql_dialect.value} SQL tables, with their properties:\n#\n"
-        for table in self.schema.tables:
-            description += (
-                f"# {table.name}({', '.join([c.name for c in table.columns])})\n"
-            )
+        for table in tables:
+            description += describe_table(table)
         description += "#\n### "
         return description
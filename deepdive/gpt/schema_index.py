@@ -0,0 +1,139 @@
+import math
+import re
+from collections import Counter, defaultdict
+from typing import Dict, List, Set, Tuple
+
+from deepdive.schema import DatabaseSchema, TableSchema
+
+# BM25 parameters, the usual defaults
+K1 = 1.2
+B = 0.75
+
+# table name tokens are more telling than column name or comment tokens
+TABLE_NAME_WEIGHT = 3
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Splits identifiers and text alike into lowercase words, e.g,
+    "orderDate", "ORDER_DATE" and "order dates" all tokenize to ["order", "date"]
+    """
+    text = re.sub(r"([a-z0-9])([A-Z])", r"\1 \2", text or "")
+    tokens = []
+    for token in re.split(r"[^a-zA-Z0-9]+", text.lower()):
+        if len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+            token = token[:-1]
+        if token:
+            tokens.append(token)
+    return tokens
+
+
+def estimate_tokens(text: str) -> int:
+    # roughly 4 characters per token for English text and identifiers
+    return math.ceil(len(text) / 4)
+
+
+class SchemaIndex:
+    """
+    A BM25 index over the tables of a schema, where each table is a document of its
+    name, column names and column comments.
+
+    Used to include only the tables relevant to a question in prompts for schemas
+    too large to describe in full.
+    """
+
+    def __init__(self, schema: DatabaseSchema):
+        self.schema = schema
+        self.term_frequencies: Dict[str, Counter] = {}
+        self.document_frequencies: Counter = Counter()
+        for table in schema.tables:
+            terms = Counter(self._table_terms(table))
+            self.term_frequencies[table.name] = terms
+            self.document_frequencies.update(terms.keys())
+
+        lengths = [sum(terms.values()) for terms in self.term_frequencies.values()]
+        self.average_length = sum(lengths) / len(lengths) if lengths else 0
+        self.neighbours = self._build_neighbours()
+
+    def search(self, question: str) -> List[Tuple[str, float]]:
+        """
+        Returns the tables matching the question with their scores, best first
+        """
+        query_terms = set(tokenize(question))
+        num_tables = len(self.term_frequencies)
+        scores = []
+        for table_name, terms in self.term_frequencies.items():
+            length = sum(terms.values())
+            score = 0.0
+            for term in query_terms:
+                frequency = terms.get(term, 0)
+                if not frequency:
+                    continue
+                document_frequency = self.document_frequencies[term]
+                idf = math.log(
+                    1
+                    + (num_tables - document_frequency + 0.5)
+                    / (document_frequency + 0.5)
+                )
+                score += idf * (
+                    frequency
+                    * (K1 + 1)
+                    / (frequency + K1 * (1 - B + B * length / self.average_length))
+                )
+            if score > 0:
+                scores.append((table_name, score))
+        return sorted(scores, key=lambda table_score: -table_score[1])
+
+    def select_tables(
+        self, question: str, top_k: int, max_tokens: int
+    ) -> List[TableSchema]:
+        """
+        Returns the top_k tables most relevant to the question along with the tables
+        they share foreign keys with, for as long as their descriptions fit within
+        max_tokens. Tables are returned in schema order.
+        """
+        candidates = []
+        for table_name, _ in self.search(question)[:top_k]:
+            candidates.append(table_name)
+        for table_name in list(candidates):
+            candidates.extend(sorted(self.neighbours.get(table_name, [])))
+        if not candidates:
+            # nothing matched, e.g, a question using none of the schema's terms
+            candidates = [table.name for table in self.schema.tables]
+
+        selected: Set[str] = set()
+        num_tokens = 0
+        for table_name in candidates:
+            if table_name in selected:
+                continue
+            table_tokens = estimate_tokens(
+                describe_table(self.schema.get_table(table_name))
+            )
+            if selected and num_tokens + table_tokens > max_tokens:
+                continue
+            selected.add(table_name)
+            num_tokens += table_tokens
+
+        return [table for table in self.schema.tables if table.name in selected]
+
+    def _table_terms(self, table: TableSchema) -> List[str]:
+        terms = tokenize(table.name) * TABLE_NAME_WEIGHT
+        for column in table.columns:
+            terms.extend(tokenize(column.name))
+            terms.extend(tokenize(column.comment))
+        return terms
+
+    def _build_neighbours(self) -> Dict[str, Set[str]]:
+        neighbours = defaultdict(set)
+        table_names = {table.name.lower(): table.name for table in self.schema.tables}
+        for foreign_key in self.schema.foreign_keys or []:
+            primary = table_names.get(foreign_key.primary.split(".")[0].lower())
+            reference = table_names.get(foreign_key.reference.split(".")[0].lower())
+            if primary and reference and primary != reference:
+                neighbours[primary].add(reference)
+                neighbours[reference].add(primary)
+        return neighbours
+
+
+def describe_table(table: TableSchema) -> str:
+    return f"# {table.name}({', '.join([c.name for c in table.columns])})\n"
@@ -1,10 +1,34 @@
+from datetime import date
 from typing import Dict, List, Optional
 
+import numpy as np
 import pandas as pd
 from pandas import DataFrame
 
 from deepdive.schema import ColumnType, DatabaseSchema
 
+# rows of object columns sampled to infer their types, from as many slices of a frame
+MAX_SAMPLE_ROWS = 10000
+NUM_SAMPLE_STRATA = 10
+
+# minimum fraction of a column's non-null values parsing as a type for it to be of it
+BOOLEAN_CONFIDENCE = 1.0
+NUMERIC_CONFIDENCE = 0.95
+DATE_CONFIDENCE = 0.95
+
+# object columns of a single kind of value, by pd.api.types.infer_dtype
+INFERRED_COLUMN_TYPES = {
+    "empty": ColumnType.TEXT,
+    "boolean": ColumnType.BOOLEAN,
+    "integer": ColumnType.INT,
+    "floating": ColumnType.FLOAT,
+    "mixed-integer-float": ColumnType.FLOAT,
+    "decimal": ColumnType.FLOAT,
+    "datetime64": ColumnType.DATE,
+    "datetime": ColumnType.DATE,
+    "date": ColumnType.DATE,
+}
+
 
 def _column_islike_id(column: str):
     column = column.lower()
@@ -27,17 +51,62 @@ def _parse_ids(df: DataFrame, db_schema: DatabaseSchema) -> List[str]:
     return ids
 
 
-def _is_datetime_string(row: object) -> bool:
-    return isinstance(row, str) and not pd.isnull(pd.to_datetime(row, errors="coerce"))
-
-
-def _infer_date_columns(df: DataFrame) -> List[str]:
-    date_columns = _get_numpy_column_type(df, "datetime")
-    for column in _get_numpy_column_type(df, "object"):
-        if all(df[column].map(_is_datetime_string)):
-            date_columns.append(column)
-
-    return date_columns
+def _sample(df: DataFrame, max_rows: Optional[int]) -> DataFrame:
+    """
+    Returns a stratified sample of at most max_rows rows: an equal number of rows
+    drawn from each of NUM_SAMPLE_STRATA contiguous slices of the frame, so that
+    values appearing only late in a file (e.g, after a change in format) are seen.
+    """
+    if max_rows is None or len(df) <= max_rows:
+        return df
+    rng = np.random.default_rng(0)  # inferred types are deterministic
+    strata = np.array_split(np.arange(len(df)), NUM_SAMPLE_STRATA)
+    rows_per_stratum = max_rows // NUM_SAMPLE_STRATA
+    positions = np.concatenate(
+        [
+            rng.choice(stratum, min(rows_per_stratum, len(stratum)), replace=False)
+            for stratum in strata
+        ]
+    )
+    return df.iloc[np.sort(positions)]
+
+
+def _get_confidence(matches: pd.Series, num_values: int) -> float:
+    return matches.sum() / num_values if num_values else 0.0
+
+
+def _infer_object_column_type(values: pd.Series) -> ColumnType:
+    """
+    Infers the type of an object column from its non-null values. Columns of a
+    single kind of value are typed by pandas' (compiled) inference, while the others,
+    e.g, strings, are parsed as each type over the whole column at once. A column is
+    of a type if at least that type's confidence threshold of values parse as it, so
+    that a few malformed values in a column don't make it text.
+    """
+    inferred_type = pd.api.types.infer_dtype(values, skipna=True)
+    if inferred_type in INFERRED_COLUMN_TYPES:
+        return INFERRED_COLUMN_TYPES[inferred_type]
+
+    values = values.dropna()
+    value_types = values.map(type)
+    is_bool = value_types.eq(bool)
+    if _get_confidence(is_bool, len(values)) >= BOOLEAN_CONFIDENCE:
+        return ColumnType.BOOLEAN
+
+    numbers = pd.to_numeric(values[~is_bool], errors="coerce").dropna()
+    if len(numbers) / len(values) >= NUMERIC_CONFIDENCE:
+        is_integer = np.isfinite(numbers) & (numbers % 1 == 0)
+        return ColumnType.INT if is_integer.all() else ColumnType.FLOAT
+
+    # numbers aren't dates, even though pd.to_datetime parses them as epochs
+    is_date_like = value_types.map(
+        lambda value_type: issubclass(value_type, (str, date))
+    )
+    dates = pd.to_datetime(values[is_date_like], errors="coerce")
+    if _get_confidence(dates.notna(), len(values)) >= DATE_CONFIDENCE:
+        return ColumnType.DATE
+
+    return ColumnType.TEXT
 
 
 def _get_numpy_column_type(df: DataFrame, numpy_column_type: str) -> List[str]:
@@ -45,22 +114,30 @@ def _get_numpy_column_type(df: DataFrame, numpy_column_type: str) -> List[str]:
 
 
 def get_column_types(
-    df: DataFrame, db_schema: Optional[DatabaseSchema] = None
+    df: DataFrame,
+    db_schema: Optional[DatabaseSchema] = None,
+    max_sample_rows: Optional[int] = MAX_SAMPLE_ROWS,
 ) -> Dict[ColumnType, List[str]]:
+    """
+    Infers the type of each column of the DataFrame. Typed (non-object) columns take
+    their numpy type, while object columns are inferred from a sample of at most
+    max_sample_rows rows, or all rows if None.
+    """
     ids = _parse_ids(df, db_schema)
     df = df[df.columns.difference(ids)]
 
-    date_columns = _infer_date_columns(df)
-    df = df[df.columns.difference(date_columns)]
-
-    return {
+    column_types = {
         ColumnType.ID: ids,
-        ColumnType.TEXT: _get_numpy_column_type(df, "object"),
+        ColumnType.TEXT: [],
         ColumnType.BOOLEAN: _get_numpy_column_type(df, "bool"),
         ColumnType.INT: _get_numpy_column_type(df, "integer"),
         ColumnType.FLOAT: _get_numpy_column_type(df, "floating"),
-        ColumnType.DATE: date_columns,
+        ColumnType.DATE: _get_numpy_column_type(df, "datetime"),
     }
+    sample = _sample(df[_get_numpy_column_type(df, "object")], max_sample_rows)
+    for column in sample:
+        column_types[_infer_object_column_type(sample[column])].append(column)
+    return column_types
 
 
 def inverse_column_types(
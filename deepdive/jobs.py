@@ -0,0 +1,355 @@
+import logging
+import threading
+import timeit
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional
+
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from deepdive.database import fetch_schema, get_db_client
+from deepdive.database.excel_artifacts import convert_excel_files
+from deepdive.database.profiler import (
+    get_remote_profile_sample_rows,
+    profile_tables,
+    save_profiles,
+)
+from deepdive.database.schema_refresh import REFRESHED_DATABASE_TYPES, refresh_schema
+from deepdive.gpt import get_gpt_client
+from deepdive.gpt.openai_client import OpenAIClient
+from deepdive.models import Database, DatabaseJob, DatabaseType
+from deepdive.schema import DatabaseSchema
+
+logger = logging.getLogger(__name__)
+
+JobType = DatabaseJob.JobType
+JobStatus = DatabaseJob.Status
+
+# running jobs not updated for this long are assumed to belong to a dead worker
+DEFAULT_STALE_JOB_SECONDS = 15 * 60
+
+# running jobs are updated this often by their worker, see run_job
+DEFAULT_JOB_HEARTBEAT_SECONDS = 60
+
+RETRY_BASE_DELAY_SECONDS = 10
+
+DEFAULT_SCHEMA_REFRESH_INTERVAL_SECONDS = 60 * 60
+
+
+def enqueue_database_jobs(database: Database, fetch: bool) -> List[DatabaseJob]:
+    """
+    Enqueues the steps setting up a database: fetching its schema (if fetch is set,
+    otherwise the schema was provided on creation), then generating foreign keys and
+    starter questions for it in parallel. Remote databases are then profiled, if
+    REMOTE_PROFILE_SAMPLE_ROWS is set.
+    """
+    jobs = []
+    with transaction.atomic():
+        fetch_schema_job = None
+        if fetch:
+            fetch_schema_job = DatabaseJob.objects.create(
+                database=database, job_type=JobType.FETCH_SCHEMA
+            )
+            jobs.append(fetch_schema_job)
+
+        for job_type in (
+            JobType.GENERATE_FOREIGN_KEYS,
+            JobType.GENERATE_STARTER_QUESTIONS,
+        ):
+            jobs.append(
+                DatabaseJob.objects.create(
+                    database=database, job_type=job_type, depends_on=fetch_schema_job
+                )
+            )
+
+        if _is_profiled(database):
+            # after foreign keys are generated, as both update the schema
+            generate_foreign_keys_job = next(
+                job for job in jobs if job.job_type == JobType.GENERATE_FOREIGN_KEYS
+            )
+            jobs.append(
+                DatabaseJob.objects.create(
+                    database=database,
+                    job_type=JobType.PROFILE_SCHEMA,
+                    depends_on=generate_foreign_keys_job,
+                )
+            )
+    return jobs
+
+
+def enqueue_schema_refresh(database: Database) -> Optional[DatabaseJob]:
+    """
+    Enqueues a refresh of a remote database's schema, unless one is already queued
+    or ran within SCHEMA_REFRESH_INTERVAL_SECONDS
+    """
+    if database.database_type not in REFRESHED_DATABASE_TYPES:
+        return None
+
+    interval = getattr(
+        settings,
+        "SCHEMA_REFRESH_INTERVAL_SECONDS",
+        DEFAULT_SCHEMA_REFRESH_INTERVAL_SECONDS,
+    )
+    recent_jobs = database.jobs.filter(job_type=JobType.REFRESH_SCHEMA).filter(
+        Q(status__in=(JobStatus.PENDING, JobStatus.RUNNING))
+        | Q(timestamp__gte=timezone.now() - timedelta(seconds=interval))
+    )
+    if recent_jobs.exists():
+        return None
+    # the next scheduled refresh retries, rather than this job
+    return DatabaseJob.objects.create(
+        database=database, job_type=JobType.REFRESH_SCHEMA, max_attempts=1
+    )
+
+
+def enqueue_file_conversion(database: Database) -> Optional[DatabaseJob]:
+    """
+    Enqueues the conversion of an Excel database's files to Parquet, to be run once
+    their table configs are final, i.e, on creation and whenever they change
+    """
+    if database.database_type != DatabaseType.EXCEL:
+        return None
+    if database.jobs.filter(
+        job_type=JobType.CONVERT_FILES, status=JobStatus.PENDING
+    ).exists():
+        return None
+    return DatabaseJob.objects.create(database=database, job_type=JobType.CONVERT_FILES)
+
+
+def enqueue_profiling(database: Database) -> Optional[DatabaseJob]:
+    """
+    Enqueues profiling the tables of a remote database missing profiles, e.g, ones
+    refreshed, unless profiling is already queued
+    """
+    if not _is_profiled(database):
+        return None
+    if database.jobs.filter(
+        job_type=JobType.PROFILE_SCHEMA, status=JobStatus.PENDING
+    ).exists():
+        return None
+    return DatabaseJob.objects.create(
+        database=database, job_type=JobType.PROFILE_SCHEMA
+    )
+
+
+def _is_profiled(database: Database) -> bool:
+    # file based databases are profiled as they're loaded
+    return (
+        database.database_type in REFRESHED_DATABASE_TYPES
+        and get_remote_profile_sample_rows() > 0
+    )
+
+
+def get_database_status(database: Database) -> Dict:
+    jobs = list(database.jobs.order_by("timestamp"))
+    return {
+        # the schema is all that's needed to start a session
+        "ready": all(
+            job.status == JobStatus.SUCCEEDED
+            for job in jobs
+            if job.job_type == JobType.FETCH_SCHEMA
+        ),
+        "done": all(
+            job.status in (JobStatus.SUCCEEDED, JobStatus.FAILED) for job in jobs
+        ),
+        "jobs": [
+            {
+                "id": job.id,
+                "job_type": job.job_type,
+                "status": job.status,
+                "attempts": job.attempts,
+                "error_message": job.error_message,
+            }
+            for job in jobs
+        ],
+    }
+
+
+def claim_job() -> Optional[DatabaseJob]:
+    """
+    Marks the oldest runnable job as running and returns it. Workers skip jobs locked
+    by other workers, so that any number of them can run concurrently.
+
+    Running jobs whose worker stopped updating them are run again, unless they've
+    reached max_attempts, in which case they're failed.
+    """
+    now = timezone.now()
+    stale_seconds = getattr(settings, "STALE_JOB_SECONDS", DEFAULT_STALE_JOB_SECONDS)
+    stale_before = now - timedelta(seconds=stale_seconds)
+    with transaction.atomic():
+        _fail_stale_jobs(stale_before)
+        job = (
+            DatabaseJob.objects.select_for_update(skip_locked=True, of=("self",))
+            .filter(
+                Q(status=JobStatus.PENDING, run_after__lte=now)
+                | Q(
+                    status=JobStatus.RUNNING,
+                    updated_at__lt=stale_before,
+                    attempts__lt=F("max_attempts"),
+                )
+            )
+            .filter(Q(depends_on=None) | Q(depends_on__status=JobStatus.SUCCEEDED))
+            .select_related("database")
+            .order_by("run_after")
+            .first()
+        )
+        if job:
+            job.status = JobStatus.RUNNING
+            job.attempts += 1
+            job.save()
+    return job
+
+
+def run_job(job: DatabaseJob):
+    start_time = timeit.default_timer()
+    stop_heartbeat = threading.Event()
+    heartbeat = threading.Thread(
+        target=_send_heartbeats,
+        args=(job, stop_heartbeat),
+        name=f"heartbeat-{job.id}",
+        daemon=True,
+    )
+    heartbeat.start()
+    try:
+        JOB_HANDLERS[job.job_type](job.database)
+    except Exception as ex:
+        logger.exception("Failed to run %s for database: %s", job, job.database_id)
+        _fail_job(job, repr(ex))
+        return
+    finally:
+        stop_heartbeat.set()
+        heartbeat.join()
+        close_old_connections()
+
+    job.status = JobStatus.SUCCEEDED
+    job.error_message = None
+    job.save()
+    logger.info(
+        "Ran %s for database %s in %.2f seconds",
+        job.job_type,
+        job.database_id,
+        timeit.default_timer() - start_time,
+    )
+
+
+def _send_heartbeats(job: DatabaseJob, stop: threading.Event):
+    """
+    Updates the running job until stopped, so that it isn't taken for the job of a
+    dead worker and claimed again, however long it runs
+    """
+    interval = getattr(settings, "JOB_HEARTBEAT_SECONDS", DEFAULT_JOB_HEARTBEAT_SECONDS)
+    while not stop.wait(interval):
+        try:
+            DatabaseJob.objects.filter(id=job.id, status=JobStatus.RUNNING).update(
+                updated_at=timezone.now()
+            )
+        except Exception:
+            # retried on the next heartbeat, well before the job is stale
+            logger.warning("Failed to update running job %s", job.id, exc_info=True)
+        finally:
+            close_old_connections()
+
+
+def _fail_stale_jobs(stale_before: datetime):
+    """
+    Fails the running jobs of dead workers which have no attempts left
+    """
+    for job in DatabaseJob.objects.select_for_update(
+        skip_locked=True, of=("self",)
+    ).filter(
+        status=JobStatus.RUNNING,
+        updated_at__lt=stale_before,
+        attempts__gte=F("max_attempts"),
+    ):
+        logger.warning("Failing %s of a dead worker: %s", job.job_type, job.id)
+        _fail_job(job, "Job timed out")
+
+
+def _fail_job(job: DatabaseJob, error_message: str):
+    job.error_message = error_message
+    if job.attempts < job.max_attempts:
+        job.status = JobStatus.PENDING
+        job.run_after = timezone.now() + timedelta(
+            seconds=RETRY_BASE_DELAY_SECONDS * 2 ** (job.attempts - 1)
+        )
+        job.save()
+        return
+
+    job.status = JobStatus.FAILED
+    job.save()
+    _fail_dependents(job, f"{job.job_type} failed")
+
+
+def _fail_dependents(job: DatabaseJob, error_message: str):
+    """
+    Fails the jobs depending on the failed job, directly or transitively, as they
+    can never run
+    """
+    for dependent in job.dependents.exclude(status=JobStatus.FAILED):
+        dependent.status = JobStatus.FAILED
+        dependent.error_message = error_message
+        dependent.save()
+        _fail_dependents(dependent, error_message)
+
+
+def _fetch_schema(database: Database):
+    schema = fetch_schema(database)
+    Database.objects.filter(id=database.id).update(
+        schema=schema.model_dump_json(exclude_none=True)
+    )
+
+
+def _generate_foreign_keys(database: Database):
+    schema = database.get_schema()
+    foreign_keys = get_gpt_client(
+        "zero-shot", "gpt-3.5-turbo", schema
+    ).generate_foreign_keys(schema)
+
+    # only the foreign keys are updated, as profiles may have been saved meanwhile
+    def update(schema: DatabaseSchema) -> DatabaseSchema:
+        schema.foreign_keys = foreign_keys
+        return schema
+
+    database.update_schema(update)
+
+
+def _refresh_schema(database: Database):
+    if refresh_schema(database):
+        enqueue_profiling(database)
+
+
+def _profile_schema(database: Database):
+    schema = database.get_schema()
+    tables = [table for table in schema.tables if not table.profile]
+    if not tables:
+        return
+    client = get_db_client(database)
+    try:
+        tables = profile_tables(
+            client.execute_query,
+            tables,
+            schema.sql_dialect,
+            sample_rows=get_remote_profile_sample_rows(),
+        )
+    finally:
+        client.finalize()
+    save_profiles(database, tables)
+
+
+def _generate_starter_questions(database: Database):
+    client = OpenAIClient(database.get_schema())
+    questions = async_to_sync(client.generate_questions_async)()
+    Database.objects.filter(id=database.id).update(starter_questions=questions)
+
+
+JOB_HANDLERS: Dict[str, Callable[[Database], None]] = {
+    JobType.FETCH_SCHEMA: _fetch_schema,
+    JobType.GENERATE_FOREIGN_KEYS: _generate_foreign_keys,
+    JobType.GENERATE_STARTER_QUESTIONS: _generate_starter_questions,
+    JobType.REFRESH_SCHEMA: _refresh_schema,
+    JobType.CONVERT_FILES: convert_excel_files,
+    JobType.PROFILE_SCHEMA: _profile_schema,
+}
@@ -0,0 +1,95 @@
+import os
+import tempfile
+import timeit
+
+import numpy as np
+import pandas as pd
+from django.core.management.base import BaseCommand
+
+from deepdive.database.csv_reader import CSV_READERS, get_csv_reader
+from deepdive.database.file_based_client_helper import create_table_schema
+
+# rows generated at a time when writing the benchmark file
+GENERATED_CHUNK_ROWS = 100000
+
+
+class Command(BaseCommand):
+    help = (
+        "Compares the CSV reader backends (see CSV_READER_BACKEND) by parsing "
+        "generated files of the given sizes, in full and in chunks."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--sizes",
+            type=int,
+            nargs="+",
+            default=[100, 1000],
+            help="sizes of the generated files, in MB",
+        )
+        parser.add_argument("--chunk-size", type=int, default=100000)
+        parser.add_argument(
+            "--file", help="benchmark an existing CSV file instead of generated ones"
+        )
+
+    def handle(self, *args, **options):
+        if options["file"]:
+            self._benchmark(options["file"], options["chunk_size"])
+            return
+
+        with tempfile.TemporaryDirectory() as directory:
+            for size in options["sizes"]:
+                path = os.path.join(directory, f"benchmark_{size}mb.csv")
+                self._generate(path, size * 1024**2)
+                self._benchmark(path, options["chunk_size"])
+                os.remove(path)
+
+    def _generate(self, path: str, num_bytes: int):
+        rng = np.random.default_rng(0)
+        header = True
+        while not os.path.exists(path) or os.path.getsize(path) < num_bytes:
+            pd.DataFrame(
+                {
+                    "id": np.arange(GENERATED_CHUNK_ROWS),
+                    "amount": rng.random(GENERATED_CHUNK_ROWS) * 1000,
+                    "quantity": rng.integers(0, 100, GENERATED_CHUNK_ROWS),
+                    "category": rng.choice(["a", "b", "c", "d"], GENERATED_CHUNK_ROWS),
+                    "description": rng.choice(
+                        ["lorem ipsum", "dolor sit amet", "consectetur"],
+                        GENERATED_CHUNK_ROWS,
+                    ),
+                    "created_at": pd.Timestamp("2023-01-01")
+                    + pd.to_timedelta(
+                        rng.integers(0, 365 * 24 * 3600, GENERATED_CHUNK_ROWS), "s"
+                    ),
+                }
+            ).to_csv(path, mode="a", header=header, index=False)
+            header = False
+
+    def _benchmark(self, path: str, chunk_size: int):
+        size_mb = os.path.getsize(path) / 1024**2
+        sep = "," if path.endswith(".csv") else "\t"
+        with open(path, "rb") as file:
+            table = create_table_schema(
+                "benchmark", get_csv_reader("pandas").read(file, sep, nrows=10)
+            )
+
+        for backend in CSV_READERS:
+            reader = get_csv_reader(backend)
+            with open(path, "rb") as file:
+                start = timeit.default_timer()
+                num_rows = len(reader.read(file, sep, table))
+                read_time = timeit.default_timer() - start
+
+            with open(path, "rb") as file:
+                start = timeit.default_timer()
+                for _ in reader.read_chunks(file, sep, table, chunk_size):
+                    pass
+                chunked_read_time = timeit.default_timer() - start
+
+            self.stdout.write(
+                f"{backend:>8} {size_mb:8.0f}MB {num_rows:>10} rows: "
+                f"read {read_time:6.2f}s ({size_mb / read_time:6.1f}MB/s), "
+                f"chunked {chunked_read_time:6.2f}s "
+                f"({size_mb / chunked_read_time:6.1f}MB/s)"
+            )
@@ -0,0 +1,65 @@
+import timeit
+
+import numpy as np
+import pandas as pd
+from django.core.management.base import BaseCommand
+
+from deepdive.helper import get_column_types
+
+
+class Command(BaseCommand):
+    help = (
+        "Times column type inference on generated frames of the given numbers of "
+        "rows and columns, over a sample (see MAX_SAMPLE_ROWS) and over all rows."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, nargs="+", default=[100000, 1000000])
+        parser.add_argument("--columns", type=int, nargs="+", default=[10, 100])
+        parser.add_argument(
+            "--skip-full",
+            action="store_true",
+            help="only time inference over a sample, e.g, for large frames",
+        )
+
+    def handle(self, *args, **options):
+        for num_rows in options["rows"]:
+            for num_columns in options["columns"]:
+                df = self._generate(num_rows, num_columns)
+                sampled_time = self._time(df, get_column_types)
+                message = (
+                    f"{num_rows:>10} rows x {num_columns:>4} columns: "
+                    f"sampled {sampled_time:7.3f}s"
+                )
+                if not options["skip_full"]:
+                    full_time = self._time(
+                        df, lambda df: get_column_types(df, max_sample_rows=None)
+                    )
+                    message += (
+                        f", full {full_time:7.3f}s "
+                        f"({full_time / sampled_time:6.1f}x slower)"
+                    )
+                self.stdout.write(message)
+
+    def _generate(self, num_rows: int, num_columns: int) -> pd.DataFrame:
+        # object columns of each kind, as read from a CSV or Excel file
+        rng = np.random.default_rng(0)
+        dates = pd.Series(
+            pd.Timestamp("2023-01-01")
+            + pd.to_timedelta(rng.integers(0, 365 * 24 * 3600, num_rows), "s")
+        ).dt.strftime("%Y-%m-%d %H:%M:%S")
+        kinds = [
+            dates.astype(object),
+            pd.Series(rng.choice(["lorem ipsum", "dolor sit amet"], num_rows)),
+            pd.Series(rng.integers(0, 1000, num_rows).astype(str), dtype=object),
+            pd.Series(rng.random(num_rows)),
+            pd.Series(rng.choice([True, False, None], num_rows)),
+        ]
+        return pd.DataFrame(
+            {f"column_{i}": kinds[i % len(kinds)] for i in range(num_columns)}
+        )
+
+    def _time(self, df: pd.DataFrame, infer) -> float:
+        start = timeit.default_timer()
+        infer(df)
+        return timeit.default_timer() - start
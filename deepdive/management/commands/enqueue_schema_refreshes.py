@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from deepdive.jobs import enqueue_schema_refresh
+from deepdive.models import Database
+from deepdive.database.schema_refresh import REFRESHED_DATABASE_TYPES
+
+
+class Command(BaseCommand):
+    help = (
+        "Enqueues schema refreshes of remote databases, to be run on a schedule. "
+        "Refreshes are run by the run_database_jobs command."
+    )
+
+    def handle(self, *args, **options):
+        num_enqueued = 0
+        for database in Database.objects.filter(
+            database_type__in=REFRESHED_DATABASE_TYPES
+        ):
+            if enqueue_schema_refresh(database):
+                num_enqueued += 1
+        self.stdout.write(f"Enqueued {num_enqueued} schema refreshes")
@@ -0,0 +1,50 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+
+from deepdive.jobs import claim_job, run_job
+
+
+class Command(BaseCommand):
+    help = "Runs the background jobs setting up databases, see deepdive.jobs"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=4,
+            help="Number of jobs run concurrently by this process",
+        )
+        parser.add_argument(
+            "--poll-interval",
+            type=float,
+            default=1.0,
+            help="Seconds to wait before polling again once no jobs are runnable",
+        )
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Exit once no jobs are runnable instead of polling",
+        )
+
+    def handle(self, *args, **options):
+        with ThreadPoolExecutor(max_workers=options["workers"]) as executor:
+            workers = [
+                executor.submit(
+                    self._run_worker, options["poll_interval"], options["once"]
+                )
+                for _ in range(0, options["workers"])
+            ]
+            for worker in workers:
+                worker.result()
+
+    def _run_worker(self, poll_interval: float, once: bool):
+        while True:
+            job = claim_job()
+            if job:
+                run_job(job)
+            elif once:
+                return
+            else:
+                time.sleep(poll_interval)
@@ -1,7 +1,9 @@
+from typing import Callable
 from uuid import uuid4
 
 from django.contrib.postgres.fields import ArrayField
-from django.db import models
+from django.db import models, transaction
+from django.utils import timezone
 from django.utils.translation import gettext_lazy
 
 from deepdive.auth.models import DeepDiveUser
@@ -48,6 +50,22 @@ class Database(models.Model):
     def get_schema(self):
         return DatabaseSchema.model_validate_json(self.schema)
 
+    def update_schema(
+        self, update: Callable[[DatabaseSchema], DatabaseSchema]
+    ) -> DatabaseSchema:
+        """
+        Applies update to the latest schema while the row is locked and saves the
+        schema it returns. Background jobs update different parts of the schema (e.g,
+        foreign keys and profiles) concurrently, so each must only change its own part
+        of the schema as of the update rather than of when the job started.
+        """
+        with transaction.atomic():
+            database = Database.objects.select_for_update().get(id=self.id)
+            schema = update(database.get_schema())
+            self.schema = schema.model_dump_json(exclude_none=True)
+            Database.objects.filter(id=self.id).update(schema=self.schema)
+        return schema
+
 
 class DatabaseFile(models.Model):
     """
@@ -75,6 +93,10 @@ class DatabaseFile(models.Model):
     # field to store extra arguments required to parse the file
     configs = models.JSONField(blank=True, null=True)
 
+    # Parquet files of an Excel file's tables, converted for the configs with the
+    # given hash, see deepdive.database.excel_artifacts
+    artifacts = models.JSONField(blank=True, null=True)
+
 
 class Session(models.Model):
     id = models.UUIDField(default=uuid4, primary_key=True, editable=False)
@@ -213,3 +235,112 @@ class UnparsedQuery(models.Model):
 
     id = models.UUIDField(default=uuid4, primary_key=True, editable=False)
     query = models.TextField(null=True, blank=True)
+
+
+class CompletionCacheEntry(models.Model):
+    """
+    A cached LLM completion, see deepdive.gpt.completion_cache
+    """
+
+    # sha256 of the model, prompt and generation parameters
+    key = models.CharField(max_length=64, primary_key=True)
+    model = models.CharField(max_length=64)
+    completion = models.TextField()
+    # indexed for pruning expired entries
+    timestamp = models.DateTimeField(auto_now_add=True, db_index=True)
+    last_accessed = models.DateTimeField(db_index=True)
+
+
+class DatabaseJob(models.Model):
+    """
+    A step of setting up a database (e.g, fetching its schema) that is run in the
+    background by the run_database_jobs command, see deepdive.jobs
+    """
+
+    class JobType(models.TextChoices):
+        FETCH_SCHEMA = "fetch_schema", gettext_lazy("Fetch schema")
+        GENERATE_FOREIGN_KEYS = "generate_foreign_keys", gettext_lazy(
+            "Generate foreign keys"
+        )
+        GENERATE_STARTER_QUESTIONS = "generate_starter_questions", gettext_lazy(
+            "Generate starter questions"
+        )
+        REFRESH_SCHEMA = "refresh_schema", gettext_lazy("Refresh schema")
+        CONVERT_FILES = "convert_files", gettext_lazy("Convert files")
+        PROFILE_SCHEMA = "profile_schema", gettext_lazy("Profile schema")
+
+    class Status(models.TextChoices):
+        PENDING = "pending", gettext_lazy("Pending")
+        RUNNING = "running", gettext_lazy("Running")
+        SUCCEEDED = "succeeded", gettext_lazy("Succeeded")
+        FAILED = "failed", gettext_lazy("Failed")
+
+    id = models.UUIDField(default=uuid4, primary_key=True, editable=False)
+    database = models.ForeignKey(
+        to=Database, on_delete=models.CASCADE, related_name="jobs"
+    )
+    job_type = models.CharField(max_length=32, choices=JobType.choices)
+    status = models.CharField(
+        max_length=16, choices=Status.choices, default=Status.PENDING, db_index=True
+    )
+
+    # the job only runs once the job it depends on has succeeded
+    depends_on = models.ForeignKey(
+        to="self",
+        on_delete=models.CASCADE,
+        related_name="dependents",
+        blank=True,
+        null=True,
+    )
+
+    # failed jobs are retried with backoff until max_attempts is reached
+    attempts = models.IntegerField(default=0)
+    max_attempts = models.IntegerField(default=3)
+    run_after = models.DateTimeField(default=timezone.now)
+    error_message = models.TextField(null=True, blank=True)
+
+    timestamp = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.job_type} [{self.status}]"
+
+
+class DatabaseSchemaSnapshot(models.Model):
+    """
+    A version of a remote database's schema, along with the table versions it was
+    fetched at, see deepdive.database.schema_refresh
+    """
+
+    id = models.UUIDField(default=uuid4, primary_key=True, editable=False)
+    database = models.ForeignKey(
+        to=Database, on_delete=models.CASCADE, related_name="schema_snapshots"
+    )
+    version = models.IntegerField()
+    schema = models.TextField()  # JSON-encoded field, as Database.schema
+    table_versions = models.JSONField()  # see SchemaClient.probe
+    timestamp = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = ["database", "version"]
+
+
+class MaterializedIndex(models.Model):
+    """
+    An index built on a file based database's materialized SQLite DB, as recommended
+    from its query workload, see deepdive.database.index_advisor
+    """
+
+    id = models.UUIDField(default=uuid4, primary_key=True, editable=False)
+    database = models.ForeignKey(
+        to=Database, on_delete=models.CASCADE, related_name="materialized_indexes"
+    )
+    table_name = models.CharField(max_length=512)
+    columns = models.CharField(max_length=2048)  # comma separated, in index order
+    score = models.FloatField()
+    build_time = models.FloatField()  # seconds
+    estimated_speedup = models.FloatField()
+    timestamp = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.table_name}({self.columns})"
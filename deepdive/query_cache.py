@@ -0,0 +1,113 @@
+import dataclasses
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from django.conf import settings
+
+from deepdive.models import DatabaseType
+from deepdive.sql.parser import normalize_query
+
+DEFAULT_MAX_BYTES = 256 * 1024**2
+
+# file based DBs are immutable once materialized, remote warehouses are not
+DEFAULT_TTL_SECONDS = {
+    DatabaseType.CSV: 24 * 60 * 60,
+    DatabaseType.EXCEL: 24 * 60 * 60,
+    DatabaseType.PARQUET: 24 * 60 * 60,
+    DatabaseType.SNOWFLAKE: 5 * 60,
+    DatabaseType.BIGQUERY: 5 * 60,
+}
+FALLBACK_TTL_SECONDS = 60
+
+CacheKey = Tuple[str, str, str]
+
+
+@dataclasses.dataclass
+class _CacheEntry:
+    value: Any
+    size: int
+    expires_at: float
+
+
+class QueryResultCache:
+    """
+    A process-wide LRU cache of query results, keyed by database, database version
+    (e.g, a hash of its schema and files) and normalized SQL.
+
+    Entries expire after a per database type TTL, and the least recently used
+    entries are evicted once the cached results exceed max_bytes. Entries are never
+    invalidated explicitly: the cache is per process, and changes to a database
+    change its version, hence the keys of its results.
+    """
+
+    def __init__(self, max_bytes: int, ttls: Dict[str, int]):
+        self.max_bytes = max_bytes
+        self.ttls = ttls
+        self.entries: "OrderedDict[CacheKey, _CacheEntry]" = OrderedDict()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def get_key(self, database_id: str, version: str, sql_query: str) -> CacheKey:
+        return (str(database_id), version, normalize_query(sql_query))
+
+    def get(self, key: CacheKey) -> Optional[Any]:
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry and entry.expires_at < time.monotonic():
+                self._remove(key)
+                entry = None
+
+            if not entry:
+                self.misses += 1
+                return None
+
+            self.hits += 1
+            self.entries.move_to_end(key)
+            return entry.value
+
+    def put(self, key: CacheKey, database_type: str, value: Any, size: int):
+        if size > self.max_bytes:
+            return
+
+        ttl = self.ttls.get(database_type, FALLBACK_TTL_SECONDS)
+        with self.lock:
+            if key in self.entries:
+                self._remove(key)
+            self.entries[key] = _CacheEntry(value, size, time.monotonic() + ttl)
+            self.size += size
+            while self.size > self.max_bytes:
+                self._remove(next(iter(self.entries)))
+
+    def stats(self) -> Dict[str, int]:
+        with self.lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "entries": len(self.entries),
+                "size": self.size,
+            }
+
+    def _remove(self, key: CacheKey):
+        self.size -= self.entries.pop(key).size
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_query_cache() -> QueryResultCache:
+    global _cache
+    with _cache_lock:
+        if not _cache:
+            _cache = QueryResultCache(
+                getattr(settings, "QUERY_CACHE_MAX_BYTES", DEFAULT_MAX_BYTES),
+                {
+                    **DEFAULT_TTL_SECONDS,
+                    **getattr(settings, "QUERY_CACHE_TTL_SECONDS", {}),
+                },
+            )
+        return _cache
@@ -15,10 +15,29 @@ class ColumnType(str, Enum):
     RECORD = "record"
 
 
+DomainLimit = Union[int, float, str]
+
+
+class ColumnProfile(BaseModel):
+    """
+    Statistics of a column's values, counted over the rows profiled, see
+    deepdive.database.profiler
+    """
+
+    null_count: int
+    # unset for columns that can't be compared, e.g, BigQuery STRUCTs
+    distinct_count: Optional[int] = None
+    min: Optional[DomainLimit] = None
+    max: Optional[DomainLimit] = None
+    # most frequent values with their counts, of low cardinality columns only
+    top_values: Optional[List[Tuple[DomainLimit, int]]] = None
+
+
 class ColumnSchema(BaseModel):
     name: str
     column_type: ColumnType
     comment: str = None
+    profile: Optional[ColumnProfile] = None
 
 
 class ForeignKey(BaseModel):
@@ -26,9 +45,18 @@ class ForeignKey(BaseModel):
     reference: str
 
 
+class TableProfile(BaseModel):
+    row_count: int
+    # number of rows profiled, if a sample of the table was
+    sampled_row_count: Optional[int] = None
+    # of the data profiled, e.g, the materialized DB's key, to detect stale profiles
+    version: Optional[str] = None
+
+
 class TableSchema(BaseModel):
     name: str
     columns: List[ColumnSchema]
+    profile: Optional[TableProfile] = None
 
     def get_column(self, column_name: str) -> Optional[ColumnSchema]:
         for column in self.columns:
@@ -104,7 +132,6 @@ class Binner(BaseModel):
         return self
 
 
-DomainLimit = Union[int, float, str]
 Domain = Tuple[Optional[DomainLimit], Optional[DomainLimit]]
 
 
@@ -1,9 +1,25 @@
 from django.dispatch import receiver
-from django.db.models.signals import pre_delete
+from django.db.models.signals import post_save, pre_delete
 
-from deepdive.models import DatabaseFile
+from deepdive.database.excel_artifacts import delete_artifacts
+from deepdive.database.materialized_cache import get_materialized_cache
+from deepdive.models import Database, DatabaseFile
 
 
 @receiver(pre_delete, sender=DatabaseFile)
 def delete_s3_file(sender, instance, **kwargs):
     instance.file.delete()
+    delete_artifacts(instance)
+
+
+@receiver(post_save, sender=DatabaseFile)
+@receiver(pre_delete, sender=DatabaseFile)
+def invalidate_materialized_database_file(sender, instance, **kwargs):
+    # cache keys already change with the files and configs, this frees the disk early
+    if instance.database_id:
+        get_materialized_cache().invalidate(instance.database_id)
+
+
+@receiver(pre_delete, sender=Database)
+def invalidate_materialized_database(sender, instance, **kwargs):
+    get_materialized_cache().invalidate(instance.id)
@@ -1,9 +1,10 @@
-from typing import List, Optional, Tuple, Union
+import re
+from typing import List, Optional, Set, Tuple, Union
 
 from deepdive.schema import SqlDialect
 from pydantic import BaseModel, ConfigDict
 from pypika import Order, Query
-from pypika.queries import Selectable, QueryBuilder
+from pypika.queries import Selectable, QueryBuilder, Table as PypikaTable
 from pypika.dialects import (
     SQLLiteQuery,
     SnowflakeQuery,
@@ -64,6 +65,19 @@ class SqlTree(BaseModel):
 
         return query.get_sql()
 
+    def get_table_names(self) -> Set[str]:
+        """
+        Returns the names of the tables the query may read from, i.e, those of its from
+        and join terms. Subqueries left unparsed (e.g, in the where term) contribute all
+        their identifiers, so the result may include names which aren't tables.
+        """
+        tables = [self.from_term] + [table for table, _ in self.joinon_terms]
+        table_names = set().union(*[_get_table_names(table) for table in tables])
+        for term in (self.where_term, self.having_term):
+            if term is not None:
+                table_names |= _get_identifiers(str(term))
+        return table_names
+
     def _get_query(self) -> QueryBuilder:
         if self.sql_dialect == SqlDialect.SQLITE:
             return SQLLiteQuery.from_(self.from_term)
@@ -74,3 +88,19 @@ class SqlTree(BaseModel):
         elif self.sql_dialect == SqlDialect.MY_SQL:
             return MySQLQuery.from_(self.from_term)
         return Query.from_(self.from_term)
+
+
+def _get_table_names(table: Optional[Table]) -> Set[str]:
+    if isinstance(table, str):
+        # a table name, possibly aliased, or an unparsed subquery
+        return _get_identifiers(table)
+    if isinstance(table, PypikaTable):
+        return {table._table_name}
+    if isinstance(table, QueryBuilder):
+        tables = list(table._from) + [join.item for join in table._joins]
+        return set().union(*[_get_table_names(table) for table in tables])
+    return set()
+
+
+def _get_identifiers(sql: str) -> Set[str]:
+    return set(re.findall(r"\w+", sql))
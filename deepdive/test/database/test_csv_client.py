@@ -1,5 +1,9 @@
+import io
+import sqlite3
 import unittest
+from types import SimpleNamespace
 
+from django.test import override_settings
 from pydantic_core._pydantic_core import ValidationError
 
 from deepdive.database.csv_client import CSVClient
@@ -27,3 +31,27 @@ class TestCsvClient(unittest.TestCase):
 
     def test_schema_valid(self):
         CSVClient.validate(Database(schema=TEST_DB.model_dump_json(exclude_none=True)))
+
+    def test_load_table_in_chunks(self):
+        client = CSVClient.__new__(CSVClient)
+        client.db_schema = TEST_DB
+        client.on_progress = None
+        client.conn = sqlite3.connect(":memory:")
+        # the text column is numeric in the first chunk only, which must not change
+        # how it's loaded
+        content = b"id,address\n1,10\n2,\n3,abc\n4,d\n5,e\n"
+        db_file = SimpleNamespace(file=io.BytesIO(content))
+        db_file.file.name = "customers.csv"
+
+        with override_settings(CSV_CHUNK_SIZE=2):
+            chunks = list(client.read_data_chunks(db_file))
+            self.assertEqual([len(chunk) for _, chunk in chunks], [2, 2, 1])
+
+            db_file.file.seek(0)
+            num_rows = client._load_table(db_file, TEST_DB.tables[0])
+
+        self.assertEqual(num_rows, 5)
+        self.assertEqual(
+            client.conn.execute("select * from customers order by id").fetchall(),
+            [(1, "10"), (2, None), (3, "abc"), (4, "d"), (5, "e")],
+        )
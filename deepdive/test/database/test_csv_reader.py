@@ -0,0 +1,56 @@
+import io
+import unittest
+
+import pandas as pd
+
+from deepdive.database.csv_reader import ArrowCSVReader, PandasCSVReader
+from deepdive.schema import ColumnSchema, ColumnType, TableSchema
+
+TEST_TABLE = TableSchema(
+    name="orders",
+    columns=[
+        ColumnSchema(name="id", column_type=ColumnType.INT),
+        ColumnSchema(name="amount", column_type=ColumnType.FLOAT),
+        ColumnSchema(name="code", column_type=ColumnType.TEXT),
+    ],
+)
+
+CONTENT = b"Order ID,Amount,Code\n1,1.5,007\n2,,x\n3,3.0,\n4,4.5,y\n5,5.0,z\n"
+
+
+class TestCSVReader(unittest.TestCase):
+    def test_read(self):
+        for reader in (PandasCSVReader(), ArrowCSVReader()):
+            df = reader.read(io.BytesIO(CONTENT), ",", TEST_TABLE)
+            self.assertEqual(list(df.columns), ["id", "amount", "code"])
+            self.assertEqual(df["id"].tolist(), [1, 2, 3, 4, 5])
+            self.assertTrue(pd.isna(df["amount"][1]))
+            # non-numeric columns are read as is, keeping leading zeros
+            self.assertEqual(df["code"][0], "007")
+            self.assertTrue(pd.isna(df["code"][2]))
+
+    def test_read_inferred(self):
+        for reader in (PandasCSVReader(), ArrowCSVReader()):
+            df = reader.read(io.BytesIO(CONTENT), ",", nrows=2)
+            self.assertEqual(list(df.columns), ["Order ID", "Amount", "Code"])
+            self.assertEqual(df["Order ID"].tolist(), [1, 2])
+
+    def test_read_chunks(self):
+        for reader in (PandasCSVReader(), ArrowCSVReader()):
+            chunks = list(reader.read_chunks(io.BytesIO(CONTENT), ",", TEST_TABLE, 2))
+            self.assertEqual([len(chunk) for chunk in chunks], [2, 2, 1])
+            self.assertEqual(
+                pd.concat(chunks)["id"].tolist(),
+                [1, 2, 3, 4, 5],
+            )
+
+    def test_arrow_falls_back_to_pandas(self):
+        content = CONTENT + b"6,not a number,w\n"
+        df = ArrowCSVReader().read(io.BytesIO(content), ",", TEST_TABLE)
+        self.assertEqual(len(df), 6)
+        self.assertEqual(df["amount"][5], "not a number")
+
+        chunks = list(
+            ArrowCSVReader().read_chunks(io.BytesIO(content), ",", TEST_TABLE, 2)
+        )
+        self.assertEqual(pd.concat(chunks)["id"].tolist(), [1, 2, 3, 4, 5, 6])
@@ -0,0 +1,123 @@
+import io
+import os
+import json
+import tempfile
+import unittest
+import uuid
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import pandas as pd
+from django.core.files.storage import FileSystemStorage
+
+from deepdive.database.excel_artifacts import (
+    _to_parquet_compatible,
+    convert_excel_file,
+    delete_artifacts,
+    has_artifacts,
+    read_artifacts,
+)
+
+
+def _create_workbook() -> io.BytesIO:
+    workbook = io.BytesIO()
+    with pd.ExcelWriter(workbook) as writer:
+        pd.DataFrame({"id": [1, 2], "name": ["a", "b"]}).to_excel(
+            writer, sheet_name="Customers", index=False
+        )
+        pd.DataFrame({"id": [1], "code": [7]}).to_excel(
+            writer, sheet_name="Ignored Sheet", index=False
+        )
+    workbook.seek(0)
+    workbook.name = "uploads/workbook.xlsx"
+    return workbook
+
+
+class TestExcelArtifacts(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        storage_patch = patch(
+            "deepdive.database.excel_artifacts.default_storage",
+            FileSystemStorage(location=self.directory.name),
+        )
+        storage_patch.start()
+        self.addCleanup(storage_patch.stop)
+        # artifacts are saved on the given db_file rather than persisted
+        model_patch = patch("deepdive.database.excel_artifacts.DatabaseFile")
+        self.model = model_patch.start()
+        self.addCleanup(model_patch.stop)
+        self._set_source(None)
+        self.addCleanup(self.directory.cleanup)
+
+    def _set_source(self, source):
+        # the file other files of the same content and configs copy artifacts from
+        files = self.model.objects.filter.return_value.exclude.return_value
+        files.first.return_value = source
+
+    def _create_db_file(self, name="uploads/workbook.xlsx"):
+        file = _create_workbook()
+        file.name = name
+        return SimpleNamespace(
+            id=uuid.uuid4(),
+            file=file,
+            configs=json.dumps({"Customers": {"name": "customers"}}),
+            artifacts=None,
+        )
+
+    def test_convert_and_read(self):
+        db_file = self._create_db_file()
+        self.assertIsNone(read_artifacts(db_file))
+
+        convert_excel_file(db_file)
+        self.assertTrue(has_artifacts(db_file))
+        self.assertEqual(
+            db_file.artifacts["tables"],
+            {"customers": "uploads/workbook.customers.parquet"},
+        )
+        data = read_artifacts(db_file)
+        self.assertEqual(list(data), ["customers"])
+        self.assertEqual(data["customers"]["name"].tolist(), ["a", "b"])
+
+        # artifacts of previous configs are no longer read
+        db_file.configs = json.dumps({"Customers": {"name": "clients"}})
+        self.assertIsNone(read_artifacts(db_file))
+
+    def test_copies_artifacts_of_same_content(self):
+        source = self._create_db_file()
+        convert_excel_file(source)
+
+        self._set_source(source)
+        db_file = self._create_db_file("uploads/other.xlsx")
+        with patch("deepdive.database.excel_artifacts.pd.ExcelFile") as excel_file:
+            convert_excel_file(db_file)
+            excel_file.assert_not_called()
+
+        self.assertEqual(
+            db_file.artifacts["tables"],
+            {"customers": "uploads/other.customers.parquet"},
+        )
+        self.assertEqual(
+            db_file.artifacts["content_hash"], source.artifacts["content_hash"]
+        )
+        self.assertEqual(read_artifacts(db_file)["customers"]["id"].tolist(), [1, 2])
+
+        # the copies are removed with their file only
+        delete_artifacts(db_file)
+        self.assertFalse(
+            os.path.exists(self._get_path("uploads/other.customers.parquet"))
+        )
+        self.assertTrue(
+            os.path.exists(self._get_path("uploads/workbook.customers.parquet"))
+        )
+
+    def _get_path(self, name: str) -> str:
+        return os.path.join(self.directory.name, name)
+
+    def test_to_parquet_compatible(self):
+        df = _to_parquet_compatible(
+            pd.DataFrame({0: [1, "a", None], "amount": [1.5, 2.0, None]})
+        )
+        self.assertEqual(list(df.columns), ["0", "amount"])
+        self.assertEqual(df["0"].tolist()[:2], ["1", "a"])
+        self.assertTrue(pd.isna(df["0"][2]))
+        self.assertEqual(df["amount"].dtype, float)
@@ -0,0 +1,45 @@
+import io
+import unittest
+from datetime import datetime
+
+import pandas as pd
+from django.core.files.uploadedfile import SimpleUploadedFile
+
+from deepdive.database.excel_client import ExcelClient, read_sheet_heads
+
+
+def _create_workbook() -> bytes:
+    workbook = io.BytesIO()
+    with pd.ExcelWriter(workbook) as writer:
+        pd.DataFrame(
+            {
+                "id": range(0, 20),
+                "amount": [i / 2 for i in range(0, 20)],
+                "created at": [datetime(2023, 1, i + 1) for i in range(0, 20)],
+                "mixed": [1, "a", None, True] * 5,
+            }
+        ).to_excel(writer, sheet_name="Orders", index=False)
+        pd.DataFrame().to_excel(writer, sheet_name="Empty", index=False)
+    return workbook.getvalue()
+
+
+class TestExcelClient(unittest.TestCase):
+    def test_read_sheet_heads(self):
+        workbook = _create_workbook()
+        heads = read_sheet_heads(SimpleUploadedFile("orders.xlsx", workbook), 10)
+        expected = pd.read_excel(
+            SimpleUploadedFile("orders.xlsx", workbook), sheet_name=None, nrows=10
+        )
+
+        self.assertEqual(list(heads), ["Orders", "Empty"])
+        for sheet_name, df in expected.items():
+            pd.testing.assert_frame_equal(heads[sheet_name], df)
+
+    def test_preview_tables(self):
+        previews = ExcelClient.preview_tables(
+            SimpleUploadedFile("orders.xlsx", _create_workbook())
+        )
+        self.assertEqual(
+            [column.name for column in previews[0].table_schema.columns],
+            ["id", "amount", "created_at", "mixed"],
+        )
@@ -0,0 +1,54 @@
+import asyncio
+import threading
+import unittest
+from types import SimpleNamespace
+
+from deepdive.database.executor import (
+    ExecutorMetrics,
+    MeteredExecutor,
+    PinnedExecutor,
+    get_executor,
+)
+
+
+class TestExecutor(unittest.TestCase):
+    def test_metered_executor_records_metrics(self):
+        metrics = ExecutorMetrics("test")
+        executor = MeteredExecutor("test", 1, metrics)
+        release = threading.Event()
+
+        async def run():
+            blocked = executor.run_async(release.wait)
+            queued = executor.run_async(lambda: 1)
+            tasks = asyncio.gather(blocked, queued)
+            await asyncio.sleep(0.05)
+            self.assertEqual(metrics.to_dict()["queue_depth"], 1)
+            release.set()
+            return await tasks
+
+        self.assertEqual(asyncio.run(run()), [True, 1])
+        result = metrics.to_dict()
+        self.assertEqual(result["submitted"], 2)
+        self.assertEqual(result["completed"], 2)
+        self.assertEqual(result["queue_depth"], 0)
+        self.assertGreaterEqual(result["max_queue_depth"], 1)
+        self.assertGreater(result["max_wait"], 0.0)
+
+    def test_pinned_executor_uses_one_thread(self):
+        executor = PinnedExecutor("pinned", ExecutorMetrics("pinned"))
+
+        async def run():
+            return await asyncio.gather(
+                *[executor.run_async(threading.get_ident) for _ in range(0, 5)]
+            )
+
+        self.assertEqual(len(set(asyncio.run(run()))), 1)
+        executor.release()
+
+    def test_get_executor(self):
+        snowflake = SimpleNamespace(id="1", database_type="snowflake")
+        csv = SimpleNamespace(id="2", database_type="csv")
+
+        self.assertIs(get_executor(snowflake), get_executor(snowflake))
+        self.assertIsInstance(get_executor(csv), PinnedExecutor)
+        self.assertIsNot(get_executor(csv), get_executor(csv))
@@ -0,0 +1,128 @@
+import sqlite3
+import unittest
+from unittest.mock import patch
+
+import numpy as np
+import pandas as pd
+
+from deepdive.database.csv_client import CSVClient
+from deepdive.database.file_based_client import FileBasedClient
+from deepdive.schema import (
+    ColumnSchema,
+    ColumnType,
+    DatabaseSchema,
+    ForeignKey,
+    SqlDialect,
+    TableSchema,
+)
+
+TEST_TABLE = TableSchema(
+    name="customers",
+    columns=[
+        ColumnSchema(name="id", column_type=ColumnType.INT),
+        ColumnSchema(name="balance", column_type=ColumnType.FLOAT),
+        ColumnSchema(name="address", column_type=ColumnType.TEXT),
+    ],
+)
+
+ORDERS_TABLE = TableSchema(
+    name="orders",
+    columns=[
+        ColumnSchema(name="id", column_type=ColumnType.INT),
+        ColumnSchema(name="customer_id", column_type=ColumnType.INT),
+    ],
+)
+
+
+def _create_client() -> FileBasedClient:
+    # skip initialize() as it requires a persisted Database with files
+    client = CSVClient.__new__(CSVClient)
+    client.conn = sqlite3.connect(":memory:")
+    return client
+
+
+class TestFileBasedClient(unittest.TestCase):
+    def test_insert_data(self):
+        client = _create_client()
+        data = pd.DataFrame(
+            {
+                "id": np.array([1, 2, 3], dtype=np.int64),
+                "balance": [1.5, np.nan, 3.0],
+                "address": ["a", None, "c"],
+            }
+        )
+        client._create_table(TEST_TABLE)
+        num_rows = client._insert_data(TEST_TABLE, data)
+
+        self.assertEqual(num_rows, 3)
+        self.assertEqual(
+            client.conn.execute("select * from customers order by id").fetchall(),
+            [(1, 1.5, "a"), (2, None, None), (3, 3.0, "c")],
+        )
+
+    def test_insert_data_batches(self):
+        client = _create_client()
+        data = pd.DataFrame(
+            {
+                "id": range(0, 25),
+                "balance": [float(i) for i in range(0, 25)],
+                "address": [str(i) for i in range(0, 25)],
+            }
+        )
+        client._create_table(TEST_TABLE)
+        with patch.object(FileBasedClient, "INSERT_BATCH_SIZE", 10):
+            self.assertEqual([len(b) for b in client._batch_rows(data)], [10, 10, 5])
+            num_rows = client._insert_data(TEST_TABLE, data)
+
+        self.assertEqual(num_rows, 25)
+        self.assertEqual(
+            client.conn.execute("select sum(id), count(*) from customers").fetchone(),
+            (300, 25),
+        )
+
+    def test_insert_data_empty(self):
+        client = _create_client()
+        client._create_table(TEST_TABLE)
+        data = pd.DataFrame({"id": [], "balance": [], "address": []})
+        self.assertEqual(client._insert_data(TEST_TABLE, data), 0)
+
+    def test_create_foreign_key_indexes(self):
+        client = _create_client()
+        client.db_schema = DatabaseSchema(
+            sql_dialect=SqlDialect.SQLITE,
+            tables=[TEST_TABLE, ORDERS_TABLE],
+            foreign_keys=[
+                ForeignKey(primary="CUSTOMERS.ID", reference="orders.customer_id"),
+                ForeignKey(primary="customers.id", reference="missing.id"),
+            ],
+        )
+        client._create_table(TEST_TABLE)
+        client._create_table(ORDERS_TABLE)
+        client.conn.executemany(
+            "insert into orders values (?, ?)", [(i, i % 3) for i in range(10)]
+        )
+        client._create_foreign_key_indexes("ORDERS")
+
+        # only the given table's side is indexed, as tables are loaded one at a time
+        self.assertEqual(
+            client.conn.execute(
+                "select name, tbl_name from sqlite_master where type = 'index'"
+            ).fetchall(),
+            [("fk_orders_customer_id", "orders")],
+        )
+
+        client._create_foreign_key_indexes("customers")
+        self.assertEqual(
+            client.conn.execute(
+                "select name from sqlite_master where type = 'index' order by name"
+            ).fetchall(),
+            [("fk_customers_id",), ("fk_orders_customer_id",)],
+        )
+
+    def test_apply_pragmas(self):
+        client = _create_client()
+        client._apply_pragmas(client.conn)
+        self.assertEqual(client.conn.execute("pragma temp_store").fetchone(), (2,))
+        self.assertEqual(
+            client.conn.execute("pragma cache_size").fetchone(), (-64 * 1024,)
+        )
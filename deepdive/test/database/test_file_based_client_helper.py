@@ -0,0 +1,41 @@
+import io
+import unittest
+from types import SimpleNamespace
+
+from django.test import override_settings
+
+from deepdive.database.file_based_client_helper import merge_db_files
+
+
+def _db_file(name: str, content: bytes):
+    file = io.BytesIO(content)
+    file.name = name
+    return SimpleNamespace(file=file)
+
+
+class TestFileBasedClientHelper(unittest.TestCase):
+    def test_merge_db_files(self):
+        db_files = [
+            _db_file("uploads/trial_1.csv", b"id,amount\n1,1.50\n2,\n3,007\n"),
+            _db_file("uploads/trial_2.tsv", b"id\tname\n4\ta\n"),
+        ]
+        with override_settings(CSV_CHUNK_SIZE=2):
+            merged = merge_db_files(db_files).read().decode()
+
+        self.assertEqual(
+            merged.splitlines(),
+            [
+                "Trial,id,amount,name",
+                "trial_1,1,1.50,",
+                "trial_1,2,,",
+                "trial_1,3,007,",
+                "trial_2,4,,a",
+            ],
+        )
+
+    def test_merge_db_files_reads(self):
+        db_files = [_db_file("trial.csv", b"id\n" + b"1\n" * 1000)]
+        with override_settings(CSV_CHUNK_SIZE=100):
+            stream = merge_db_files(db_files)
+            self.assertEqual(stream.read(10), b"Trial,id\nt")
+            self.assertEqual(len(stream.read()), len(b"Trial,id\n") + 8 * 1000 - 10)
@@ -0,0 +1,104 @@
+import os
+import tempfile
+import threading
+import unittest
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage
+
+from deepdive.database.file_cache import FileCache
+
+
+class FakeS3Storage(FileSystemStorage):
+    """
+    A local storage exposing objects with ETags, as S3Boto3Storage does
+    """
+
+    def __init__(self, location):
+        super().__init__(location=location)
+        self.bucket = SimpleNamespace(Object=self._get_object)
+
+    def _normalize_name(self, name):
+        return name
+
+    def _get_object(self, name):
+        with open(self.path(name), "rb") as file:
+            content = file.read()
+        return SimpleNamespace(e_tag=f'"{hash(content)}"', content_length=len(content))
+
+
+class TestFileCache(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.storage = FakeS3Storage(os.path.join(self.directory.name, "storage"))
+        self.cache = FileCache(
+            os.path.join(self.directory.name, "cache"), max_bytes=100
+        )
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_get_path(self):
+        self.storage.save("a.csv", ContentFile(b"a" * 10))
+        path = self.cache.get_path(self.storage, "a.csv")
+        with open(path, "rb") as file:
+            self.assertEqual(file.read(), b"a" * 10)
+
+        with patch.object(self.storage, "open") as storage_open:
+            self.assertEqual(self.cache.get_path(self.storage, "a.csv"), path)
+            storage_open.assert_not_called()
+
+    def test_content_addressed(self):
+        self.storage.save("a.csv", ContentFile(b"a" * 10))
+        self.storage.save("copy_of_a.csv", ContentFile(b"a" * 10))
+        self.storage.save("b.csv", ContentFile(b"b" * 10))
+        path = self.cache.get_path(self.storage, "a.csv")
+        self.assertEqual(self.cache.get_path(self.storage, "copy_of_a.csv"), path)
+        self.assertNotEqual(self.cache.get_path(self.storage, "b.csv"), path)
+
+        self.storage.delete("a.csv")
+        self.storage.save("a.csv", ContentFile(b"c" * 10))
+        self.assertNotEqual(self.cache.get_path(self.storage, "a.csv"), path)
+
+    def test_downloads_once(self):
+        self.storage.save("a.csv", ContentFile(b"a" * 10))
+        storage_open = self.storage.open
+        opened = []
+
+        def counting_open(name, mode="rb"):
+            opened.append(name)
+            return storage_open(name, mode)
+
+        with patch.object(self.storage, "open", counting_open):
+            threads = [
+                threading.Thread(
+                    target=self.cache.get_path, args=(self.storage, "a.csv")
+                )
+                for _ in range(8)
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        self.assertEqual(opened, ["a.csv"])
+
+    def test_evicts_least_recently_used(self):
+        paths = []
+        for name in ("a", "b", "c"):
+            self.storage.save(name, ContentFile(name.encode() * 40))
+            paths.append(self.cache.get_path(self.storage, name))
+            os.utime(paths[-1], (len(paths), len(paths)))
+
+        self.assertFalse(os.path.exists(paths[0]))
+        self.assertTrue(os.path.exists(paths[1]))
+        self.assertTrue(os.path.exists(paths[2]))
+
+    def test_verifies_size(self):
+        self.storage.save("a.csv", ContentFile(b"a" * 10))
+        with patch.object(
+            self.storage, "open", return_value=ContentFile(b"a" * 5)
+        ), self.assertRaises(IOError):
+            self.cache.get_path(self.storage, "a.csv")
+        self.assertEqual(os.listdir(self.cache.directory), [])
@@ -0,0 +1,123 @@
+import sqlite3
+import unittest
+
+from deepdive.database.index_advisor import _estimate_speedup, recommend_indexes
+from deepdive.schema import (
+    Binner,
+    Breakdown,
+    ColumnSchema,
+    ColumnType,
+    DatabaseSchema,
+    Filter,
+    SortBy,
+    SqlDialect,
+    TableSchema,
+    VizSpec,
+    XAxis,
+    YAxis,
+)
+
+
+def _table(name, *columns):
+    return TableSchema(
+        name=name,
+        columns=[
+            ColumnSchema(name=column, column_type=ColumnType.TEXT) for column in columns
+        ],
+    )
+
+
+SCHEMA = DatabaseSchema(
+    sql_dialect=SqlDialect.SQLITE,
+    tables=[
+        _table("orders", "id", "status", "region", "created_at", "amount"),
+        _table("users", "id", "name", "country"),
+    ],
+)
+
+
+class TestIndexAdvisor(unittest.TestCase):
+    def test_recommends_filtered_and_grouped_columns(self):
+        viz_spec = VizSpec(
+            x_axis=XAxis(name="region"),
+            y_axises=[YAxis(name="amount", aggregation="SUM")],
+            filters=[
+                Filter(name="status", filter_type="comparison", values=["shipped"])
+            ],
+            tables=["orders"],
+        )
+        recommendations = recommend_indexes([viz_spec] * 3, SCHEMA, 5)
+
+        # the composite serves status on its own as its prefix, but not region
+        self.assertEqual(
+            [(rec.table, rec.columns) for rec in recommendations],
+            [("orders", ("status", "region")), ("orders", ("region",))],
+        )
+        self.assertEqual(recommendations[0].name, "ix_orders_status_region")
+
+    def test_ranks_by_usage(self):
+        viz_specs = [
+            VizSpec(
+                breakdowns=[Breakdown(name="users.name")],
+                filters=[Filter(name="country", filter_type="like", expression="U%")],
+            ),
+            VizSpec(
+                filters=[Filter(name="amount", filter_type="numeric", domain=(0, 100))],
+                tables=["orders"],
+            ),
+            VizSpec(
+                filters=[
+                    Filter(name="amount", filter_type="numeric", domain=(10, None))
+                ],
+                tables=["orders"],
+            ),
+        ]
+        recommendations = recommend_indexes(viz_specs, SCHEMA, 5)
+        self.assertEqual(
+            [(rec.table, rec.columns) for rec in recommendations],
+            [("orders", ("amount",)), ("users", ("name",))],
+        )
+
+    def test_skips_unindexable_columns(self):
+        viz_spec = VizSpec(
+            x_axis=XAxis(
+                name="created_at",
+                binner=Binner(binner_type="datetime", time_unit="month"),
+            ),
+            breakdowns=[Breakdown(name="missing")],
+            filters=[
+                Filter(
+                    name="status",
+                    filter_type="comparison",
+                    values=["cancelled"],
+                    negate=True,
+                )
+            ],
+            y_axises=[YAxis(name="amount", aggregation="SUM")],
+            tables=["orders"],
+        )
+        self.assertEqual(recommend_indexes([viz_spec], SCHEMA, 5), [])
+
+    def test_limits_recommendations(self):
+        viz_specs = [
+            VizSpec(
+                x_axis=XAxis(name=column),
+                sort_by=SortBy(name=column),
+                tables=["orders"],
+            )
+            for column in ("id", "status", "region")
+        ]
+        self.assertEqual(len(recommend_indexes(viz_specs, SCHEMA, 2)), 2)
+
+    def test_estimate_speedup(self):
+        conn = sqlite3.connect(":memory:")
+        conn.execute("CREATE TABLE orders (status text)")
+        conn.executemany(
+            "INSERT INTO orders VALUES (?)", [(str(i % 100),) for i in range(10000)]
+        )
+        speedup = _estimate_speedup(conn, "orders", "status")
+        # 100 rows read per lookup, plus the search of the index
+        self.assertAlmostEqual(speedup, 10000 / (100 + 13.29), places=1)
+
+        conn.execute("CREATE TABLE empty (status text)")
+        self.assertEqual(_estimate_speedup(conn, "empty", "status"), 1.0)
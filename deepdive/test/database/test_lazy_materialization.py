@@ -0,0 +1,277 @@
+import os
+import sqlite3
+import tempfile
+import threading
+import unittest
+from types import SimpleNamespace
+from typing import Dict, List
+from unittest.mock import patch
+
+import pandas as pd
+
+from deepdive.database.file_based_client import FileBasedClient
+from deepdive.database.lazy_materialization import (
+    LazyMaterializedDatabase,
+    _database_keys,
+    _databases,
+    get_lazy_database,
+)
+from deepdive.database.materialized_cache import MaterializedDatabaseCache
+from deepdive.models import DatabaseFile
+from deepdive.schema import (
+    ColumnSchema,
+    ColumnType,
+    DatabaseSchema,
+    ForeignKey,
+    SqlDialect,
+    TableSchema,
+)
+
+DATABASE = SimpleNamespace(id="db")
+
+TEST_DB = DatabaseSchema(
+    sql_dialect=SqlDialect.SQLITE,
+    tables=[
+        TableSchema(
+            name="customers",
+            columns=[
+                ColumnSchema(name="id", column_type=ColumnType.INT),
+                ColumnSchema(name="address", column_type=ColumnType.TEXT),
+            ],
+        ),
+        TableSchema(
+            name="orders",
+            columns=[
+                ColumnSchema(name="id", column_type=ColumnType.INT),
+                ColumnSchema(name="customer_id", column_type=ColumnType.INT),
+            ],
+        ),
+    ],
+    foreign_keys=[ForeignKey(primary="customers.id", reference="orders.customer_id")],
+)
+
+DB_FILES = [
+    SimpleNamespace(
+        name="customers",
+        data=pd.DataFrame({"id": [1, 2], "address": ["a", "b"]}),
+    ),
+    SimpleNamespace(
+        name="orders",
+        data=pd.DataFrame({"id": [1, 2, 3], "customer_id": [1, 1, 2]}),
+    ),
+]
+
+
+class _TestClient(FileBasedClient):
+    def __init__(self):
+        # skip initialize() as it requires a persisted Database with files
+        self.db_schema = TEST_DB
+        self.on_progress = None
+        self.reads = []
+
+    def get_table_names(self, db_file: DatabaseFile) -> List[str]:
+        return [db_file.name]
+
+    def read_data(self, db_file: DatabaseFile) -> Dict[str, pd.DataFrame]:
+        self.reads.append(db_file.name)
+        return {db_file.name: db_file.data.copy()}
+
+
+class TestLazyMaterializedDatabase(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "db_key.db")
+        cache = MaterializedDatabaseCache(self.directory.name, max_bytes=10**9)
+        module = "deepdive.database.lazy_materialization"
+        patchers = [
+            patch.object(FileBasedClient, "BASE_DIRECTORY", self.directory.name),
+            patch(f"{module}.get_materialized_cache", return_value=cache),
+            patch(f"{module}.advise_indexes", return_value=[]),
+            patch("deepdive.database.file_based_client.create_indexes"),
+            patch.dict(_databases, clear=True),
+            patch.dict(_database_keys, clear=True),
+        ]
+        for patcher in patchers:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        save_profiles_patcher = patch(f"{module}.save_profiles")
+        self.save_profiles = save_profiles_patcher.start()
+        self.addCleanup(save_profiles_patcher.stop)
+        self.databases = []
+
+    def tearDown(self):
+        # tables are profiled in the background
+        for database in self.databases:
+            for future in database._profiling.values():
+                future.result()
+        self.directory.cleanup()
+
+    def _create_database(self, client: _TestClient) -> LazyMaterializedDatabase:
+        database = LazyMaterializedDatabase(
+            DATABASE, "key", self.path, client, DB_FILES
+        )
+        self.databases.append(database)
+        return database
+
+    def _query(self, query: str):
+        conn = sqlite3.connect(f"file:{self.path}?mode=ro", uri=True)
+        try:
+            return conn.execute(query).fetchall()
+        finally:
+            conn.close()
+
+    def test_load_tables(self):
+        client = _TestClient()
+        database = self._create_database(client)
+        self.assertEqual(database.get_loaded_tables(), set())
+
+        # names are matched case insensitively, and aliases ignored
+        database.load_tables({"CUSTOMERS", "c"})
+        self.assertEqual(database.get_loaded_tables(), {"customers"})
+        self.assertEqual(
+            self._query("select * from customers order by id"), [(1, "a"), (2, "b")]
+        )
+        self.assertEqual(
+            self._query(
+                "select name from sqlite_master where tbl_name = 'customers' "
+                "and type = 'index'"
+            ),
+            [("fk_customers_id",)],
+        )
+        self.assertIn(("customers",), self._query("select tbl from sqlite_stat1"))
+
+        # loaded tables aren't read again
+        database.load_tables({"customers"})
+        self.assertEqual(client.reads, ["customers"])
+
+    def test_load_tables_saves_profiles(self):
+        database = self._create_database(_TestClient())
+        database.load_tables({"orders"})
+        # once published, in the background
+        database._profiling["orders"].result()
+
+        self.save_profiles.assert_called_once()
+        (database_arg, [table]), _ = self.save_profiles.call_args
+        self.assertEqual(database_arg, DATABASE)
+        self.assertEqual(table.name, "orders")
+        self.assertEqual(table.profile.row_count, 3)
+        self.assertEqual(table.profile.version, "key")
+        profiles = {column.name: column.profile for column in table.columns}
+        self.assertEqual(profiles["customer_id"].distinct_count, 2)
+
+        # tables are profiled once, as they're loaded
+        database.load_tables({"orders"})
+        self.save_profiles.assert_called_once()
+
+    def test_load_tables_does_not_wait_for_profiles(self):
+        database = self._create_database(_TestClient())
+        profiled = threading.Event()
+        module = "deepdive.database.lazy_materialization"
+        with patch(
+            f"{module}.profile_tables", side_effect=lambda *_, **__: [profiled.wait()]
+        ):
+            database.load_tables({"orders"})
+            self.assertEqual(self._query("select count(*) from orders"), [(3,)])
+            self.assertFalse(database._profiling["orders"].done())
+            profiled.set()
+            database._profiling["orders"].result()
+
+    def test_load_tables_reports_progress(self):
+        database = self._create_database(_TestClient())
+        progress = []
+        database.load_tables({"customers", "orders"}, progress.append)
+
+        # once as loading starts, then as each table is loaded (concurrently)
+        self.assertEqual(len(progress), 3)
+        self.assertEqual(progress[0].rows_loaded, 0)
+        self.assertIn(progress[1].rows_loaded, (2, 3))
+        self.assertEqual(
+            (progress[-1].tables_loaded, progress[-1].total_tables), (2, 2)
+        )
+        self.assertEqual(progress[-1].rows_loaded, 5)
+
+        # nothing is reported once loaded
+        database.load_tables({"customers"}, progress.append)
+        self.assertEqual(len(progress), 3)
+
+    def test_warm_up(self):
+        database = self._create_database(_TestClient())
+        database.warm_up()
+        database._warm_up_thread.join()
+
+        self.assertEqual(database.get_loaded_tables(), {"customers", "orders"})
+        self.assertEqual(
+            self._query(
+                "select count(*) from orders join customers "
+                "on orders.customer_id = customers.id"
+            ),
+            [(3,)],
+        )
+
+    def test_load_retried_on_failure(self):
+        client = _TestClient()
+        database = self._create_database(client)
+        with patch.object(_TestClient, "_load_table", side_effect=OSError):
+            with self.assertRaises(OSError):
+                database.load_tables({"orders"})
+        self.assertEqual(database.get_loaded_tables(), set())
+
+        database.load_tables({"orders"})
+        self.assertEqual(self._query("select count(*) from orders"), [(3,)])
+
+    def test_tables_loaded_by_other_process(self):
+        self._create_database(_TestClient()).load_tables({"orders"})
+
+        client = _TestClient()
+        database = self._create_database(client)
+        self.assertEqual(database.get_loaded_tables(), {"orders"})
+        database.load_tables({"orders"})
+        self.assertEqual(client.reads, [])
+
+    def test_get_lazy_database_drops_superseded_keys(self):
+        client = _TestClient()
+        database = get_lazy_database(DATABASE, "key1", client, DB_FILES)
+        self.databases.append(database)
+        self.assertIs(get_lazy_database(DATABASE, "key1", client, DB_FILES), database)
+
+        self.databases.append(get_lazy_database(DATABASE, "key2", client, DB_FILES))
+        self.assertEqual(set(_databases), {"key2"})
+
+    def test_get_lazy_database_creates_outside_lock(self):
+        client = _TestClient()
+        advising = threading.Event()
+        advised = threading.Event()
+
+        def advise_indexes(database, db_schema):
+            if database.id == "slow":
+                advising.set()
+                advised.wait()
+            return []
+
+        module = "deepdive.database.lazy_materialization"
+        with patch(f"{module}.advise_indexes", side_effect=advise_indexes):
+            results = []
+            slow = SimpleNamespace(id="slow")
+            threads = [
+                threading.Thread(
+                    target=lambda: results.append(
+                        get_lazy_database(slow, "slow_key", client, DB_FILES)
+                    )
+                )
+                for _ in range(2)
+            ]
+            threads[0].start()
+            advising.wait()
+            threads[1].start()
+
+            # other databases aren't blocked by one being created
+            self.databases.append(get_lazy_database(DATABASE, "key", client, DB_FILES))
+            self.assertEqual(results, [])
+
+            advised.set()
+            for thread in threads:
+                thread.join()
+        # created once, for both sessions
+        self.assertEqual(len(results), 2)
+        self.assertIs(results[0], results[1])
+        self.databases.extend(results[:1])
@@ -0,0 +1,80 @@
+import os
+import tempfile
+import unittest
+from types import SimpleNamespace
+
+from deepdive.database.materialized_cache import MaterializedDatabaseCache
+
+DATABASE = SimpleNamespace(id="db", schema='{"tables": []}')
+
+
+def _db_file(file_id="1", size=10, configs=None):
+    return SimpleNamespace(
+        id=file_id,
+        file=SimpleNamespace(name=f"{file_id}.csv", size=size),
+        configs=configs,
+    )
+
+
+class TestMaterializedDatabaseCache(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.cache = MaterializedDatabaseCache(self.directory.name, max_bytes=100)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def _build(self, num_bytes: int) -> str:
+        fd, path = tempfile.mkstemp(dir=self.directory.name, suffix=".tmp")
+        os.write(fd, b"0" * num_bytes)
+        os.close(fd)
+        return path
+
+    def test_key_changes_with_inputs(self):
+        key = self.cache.get_key(DATABASE, [_db_file()])
+        self.assertEqual(key, self.cache.get_key(DATABASE, [_db_file()]))
+        self.assertNotEqual(key, self.cache.get_key(DATABASE, [_db_file(size=11)]))
+        self.assertNotEqual(
+            key, self.cache.get_key(DATABASE, [_db_file(configs='{"a": {}}')])
+        )
+        self.assertNotEqual(
+            key,
+            self.cache.get_key(SimpleNamespace(id="db", schema="{}"), [_db_file()]),
+        )
+
+    def test_key_ignores_profiles(self):
+        schema = '{"tables": [{"name": "t", "columns": [{"name": "c"}]}]}'
+        profiled_schema = (
+            '{"tables": [{"name": "t", "columns": [{"name": "c", "profile": {}}],'
+            ' "profile": {"row_count": 1}}]}'
+        )
+        self.assertEqual(
+            self.cache.get_key(SimpleNamespace(id="db", schema=schema), [_db_file()]),
+            self.cache.get_key(
+                SimpleNamespace(id="db", schema=profiled_schema), [_db_file()]
+            ),
+        )
+
+    def test_lookup_publish(self):
+        self.assertIsNone(self.cache.lookup("db", "key"))
+        path = self.cache.publish("db", "key", self._build(10))
+        self.assertEqual(self.cache.lookup("db", "key"), path)
+
+    def test_evicts_least_recently_used(self):
+        first = self.cache.publish("db", "first", self._build(40))
+        second = self.cache.publish("db", "second", self._build(40))
+        os.utime(first, (0, 0))
+        os.utime(second, (1, 1))
+        self.cache.lookup("db", "first")  # first is now most recently used
+
+        self.cache.publish("db", "third", self._build(40))
+        self.assertIsNotNone(self.cache.lookup("db", "first"))
+        self.assertIsNone(self.cache.lookup("db", "second"))
+        self.assertIsNotNone(self.cache.lookup("db", "third"))
+
+    def test_invalidate(self):
+        self.cache.publish("db", "key", self._build(10))
+        self.cache.publish("other", "key", self._build(10))
+        self.cache.invalidate("db")
+        self.assertIsNone(self.cache.lookup("db", "key"))
+        self.assertIsNotNone(self.cache.lookup("other", "key"))
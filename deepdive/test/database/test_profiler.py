@@ -0,0 +1,143 @@
+import sqlite3
+import unittest
+
+import pandas as pd
+
+from deepdive.database.profiler import profile_table
+from deepdive.schema import (
+    ColumnProfile,
+    ColumnSchema,
+    ColumnType,
+    SqlDialect,
+    TableProfile,
+    TableSchema,
+)
+
+TEST_TABLE = TableSchema(
+    name="orders",
+    columns=[
+        ColumnSchema(name="id", column_type=ColumnType.INT),
+        ColumnSchema(name="amount", column_type=ColumnType.FLOAT),
+        ColumnSchema(name="status", column_type=ColumnType.TEXT),
+        ColumnSchema(name="created_at", column_type=ColumnType.DATE),
+    ],
+)
+
+
+def _create_conn() -> sqlite3.Connection:
+    conn = sqlite3.connect(":memory:")
+    conn.execute(
+        "create table orders (id integer, amount real, status text, created_at text)"
+    )
+    conn.executemany(
+        "insert into orders values (?, ?, ?, ?)",
+        [
+            (1, 1.5, "shipped", "2023-01-01"),
+            (2, None, "shipped", "2023-01-03"),
+            (3, 4.0, "pending", None),
+            (4, 2.5, None, "2023-01-02"),
+        ],
+    )
+    return conn
+
+
+class TestProfiler(unittest.TestCase):
+    def test_profile_table(self):
+        conn = _create_conn()
+        table = profile_table(
+            lambda query: pd.read_sql_query(query, conn),
+            TEST_TABLE,
+            SqlDialect.SQLITE,
+            version="v1",
+        )
+
+        self.assertEqual(table.profile, TableProfile(row_count=4, version="v1"))
+        profiles = {column.name: column.profile for column in table.columns}
+        self.assertEqual(
+            profiles["amount"],
+            ColumnProfile(
+                null_count=1,
+                distinct_count=3,
+                min=1.5,
+                max=4.0,
+                top_values=[(1.5, 1), (2.5, 1), (4.0, 1)],
+            ),
+        )
+        self.assertEqual(
+            profiles["status"],
+            ColumnProfile(
+                null_count=1,
+                distinct_count=2,
+                min="pending",
+                max="shipped",
+                top_values=[("shipped", 2), ("pending", 1)],
+            ),
+        )
+        self.assertEqual(profiles["created_at"].min, "2023-01-01")
+        self.assertEqual(profiles["created_at"].max, "2023-01-03")
+        # the given table is left as is
+        self.assertIsNone(TEST_TABLE.profile)
+
+    def test_profile_table_sampled(self):
+        queries = []
+
+        def execute_query(query: str) -> pd.DataFrame:
+            queries.append(query)
+            if query == "SELECT COUNT(*) FROM orders":
+                return pd.DataFrame({"COUNT(*)": [1000000]})
+            if "top_value" in query:
+                return pd.DataFrame(
+                    {"PROFILED_COLUMN": [0], "TOP_VALUE": ["a"], "FREQUENCY": [10]}
+                )
+            return pd.DataFrame([[100] + [90, 5, "a", "b"] * len(TEST_TABLE.columns)])
+
+        table = profile_table(
+            execute_query, TEST_TABLE, SqlDialect.SNOWFLAKE_SQL, sample_rows=100
+        )
+        self.assertEqual(
+            table.profile, TableProfile(row_count=1000000, sampled_row_count=100)
+        )
+        self.assertEqual(table.columns[0].profile.null_count, 10)
+        self.assertIn(
+            "FROM (SELECT * FROM orders SAMPLE SYSTEM (0.01)) AS sampled", queries[1]
+        )
+
+    def test_profile_table_unsampled(self):
+        conn = _create_conn()
+        table = profile_table(
+            lambda query: pd.read_sql_query(query, conn),
+            TEST_TABLE,
+            SqlDialect.SQLITE,
+            sample_rows=2,
+        )
+        # SQLite tables are local, and always profiled in full
+        self.assertEqual(table.profile, TableProfile(row_count=4))
+
+    def test_top_values_counted_per_column_type(self):
+        conn = _create_conn()
+        conn.execute("alter table orders add column region text")
+        conn.execute("update orders set region = 'west' where id > 1")
+        queries = []
+
+        def execute_query(query: str) -> pd.DataFrame:
+            queries.append(query)
+            return pd.read_sql_query(query, conn)
+
+        table = profile_table(
+            execute_query,
+            TEST_TABLE.model_copy(
+                update={
+                    "columns": [
+                        ColumnSchema(name="status", column_type=ColumnType.TEXT),
+                        ColumnSchema(name="region", column_type=ColumnType.TEXT),
+                    ]
+                }
+            ),
+            SqlDialect.SQLITE,
+        )
+        # the aggregates, then the top values of both text columns in one scan
+        self.assertEqual(len(queries), 2)
+        self.assertEqual(
+            [column.profile.top_values for column in table.columns],
+            [[("shipped", 2), ("pending", 1)], [("west", 3)]],
+        )
@@ -0,0 +1,191 @@
+import json
+import unittest
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from google.cloud.bigquery.schema import SchemaField
+
+from deepdive.database.bigquery_schema_client import BigQuerySchemaClient
+from deepdive.database.snowflake_schema_client import (
+    COLUMNS_QUERY,
+    SnowflakeSchemaClient,
+)
+from deepdive.schema import ColumnType
+
+
+class FakeSnowflakeSession:
+    def __init__(self, responses):
+        self.responses = responses
+        self.queries = []
+
+    def sql(self, query):
+        self.queries.append(query)
+        response = self.responses[query]
+        if isinstance(response, Exception):
+            raise response
+        return SimpleNamespace(collect=lambda: response)
+
+
+class FakeBigQueryClient:
+    def __init__(self, rows, tables):
+        self.rows = rows
+        self.tables = tables
+        self.num_get_table_calls = 0
+
+    def query(self, query):
+        if isinstance(self.rows, Exception):
+            raise self.rows
+        return SimpleNamespace(result=lambda: self.rows)
+
+    def list_tables(self, dataset_id):
+        return [SimpleNamespace(table_id=table_id) for table_id in self.tables]
+
+    def get_table(self, table_ref):
+        self.num_get_table_calls += 1
+        table_id = table_ref.split(".")[-1]
+        return SimpleNamespace(table_id=table_id, schema=self.tables[table_id])
+
+
+def _snowflake_client(session):
+    def initialize(self, database):
+        self.database = database
+        self.session = session
+
+    with patch.object(SnowflakeSchemaClient, "initialize", initialize):
+        return SnowflakeSchemaClient(
+            SimpleNamespace(snowflake_database="DB", snowflake_schema="PUBLIC")
+        )
+
+
+def _bigquery_client(client):
+    def initialize(self, database):
+        self.database = database
+        self.client = client
+
+    with patch.object(BigQuerySchemaClient, "initialize", initialize):
+        return BigQuerySchemaClient(SimpleNamespace(bigquery_dataset_id="dataset"))
+
+
+PRIMARY_KEYS_QUERY = "show primary keys in schema DB.PUBLIC"
+
+
+class TestSnowflakeSchemaClient(unittest.TestCase):
+    def test_fetch_in_bulk(self):
+        session = FakeSnowflakeSession(
+            {
+                COLUMNS_QUERY: [
+                    {
+                        "TABLE_NAME": "ORDERS",
+                        "COLUMN_NAME": "ID",
+                        "DATA_TYPE": "NUMBER",
+                        "NUMERIC_SCALE": 0,
+                        "COMMENT": "order id",
+                    },
+                    {
+                        "TABLE_NAME": "ORDERS",
+                        "COLUMN_NAME": "PRICE",
+                        "DATA_TYPE": "NUMBER",
+                        "NUMERIC_SCALE": 2,
+                        "COMMENT": None,
+                    },
+                    {
+                        "TABLE_NAME": "USERS",
+                        "COLUMN_NAME": "NAME",
+                        "DATA_TYPE": "TEXT",
+                        "NUMERIC_SCALE": None,
+                        "COMMENT": None,
+                    },
+                ],
+                PRIMARY_KEYS_QUERY: [{"table_name": "ORDERS", "column_name": "ID"}],
+            }
+        )
+        client = _snowflake_client(session)
+        schema = client.fetch()
+
+        self.assertEqual(len(session.queries), 2)
+        self.assertEqual([table.name for table in schema.tables], ["ORDERS", "USERS"])
+        orders = schema.get_table("ORDERS")
+        self.assertEqual(
+            [(c.name, c.column_type, c.comment) for c in orders.columns],
+            [("ID", ColumnType.INT, "order id"), ("PRICE", ColumnType.FLOAT, None)],
+        )
+        self.assertEqual(schema.primary_keys, ["ORDERS.ID"])
+        self.assertEqual(set(client.timings), {"tables", "primary_keys"})
+
+    def test_falls_back_to_per_table(self):
+        session = FakeSnowflakeSession(
+            {
+                COLUMNS_QUERY: Exception("insufficient privileges"),
+                "show tables": [{"name": "ORDERS"}, {"name": "USERS"}],
+                "show columns in table ORDERS": [
+                    {
+                        "column_name": "ID",
+                        "data_type": json.dumps({"type": "FIXED", "scale": 0}),
+                    }
+                ],
+                "show columns in table USERS": [
+                    {"column_name": "NAME", "data_type": json.dumps({"type": "TEXT"})}
+                ],
+                PRIMARY_KEYS_QUERY: [],
+            }
+        )
+        schema = _snowflake_client(session).fetch()
+        self.assertEqual([table.name for table in schema.tables], ["ORDERS", "USERS"])
+        self.assertEqual(
+            schema.get_table("USERS").columns[0].column_type, ColumnType.TEXT
+        )
+
+
+class TestBigQuerySchemaClient(unittest.TestCase):
+    def test_fetch_in_bulk(self):
+        rows = [
+            {
+                "table_name": "trips",
+                "field_path": "id",
+                "data_type": "INT64",
+                "description": "trip id",
+            },
+            {
+                "table_name": "trips",
+                "field_path": "start",
+                "data_type": "STRUCT<lat FLOAT64, tags ARRAY<STRING>>",
+                "description": None,
+            },
+            {
+                "table_name": "trips",
+                "field_path": "start.lat",
+                "data_type": "FLOAT64",
+                "description": None,
+            },
+            {
+                "table_name": "trips",
+                "field_path": "start.tags",
+                "data_type": "ARRAY<STRING>",
+                "description": None,
+            },
+        ]
+        client = FakeBigQueryClient(rows, {})
+        schema = _bigquery_client(client).fetch()
+
+        self.assertEqual(client.num_get_table_calls, 0)
+        self.assertEqual(
+            [(c.name, c.column_type) for c in schema.get_table("trips").columns],
+            [("id", ColumnType.INT), ("start.lat", ColumnType.FLOAT)],
+        )
+
+    def test_falls_back_to_per_table(self):
+        tables = {
+            f"table_{i}": [
+                SchemaField("id", "INTEGER"),
+                SchemaField("start", "RECORD", fields=[SchemaField("lat", "FLOAT")]),
+            ]
+            for i in range(0, 20)
+        }
+        client = FakeBigQueryClient(Exception("access denied"), tables)
+        schema = _bigquery_client(client).fetch()
+
+        self.assertEqual(client.num_get_table_calls, 20)
+        self.assertEqual([table.name for table in schema.tables], list(tables.keys()))
+        self.assertEqual(
+            [c.name for c in schema.get_table("table_3").columns], ["id", "start.lat"]
+        )
@@ -0,0 +1,104 @@
+import unittest
+
+from deepdive.database.schema_refresh import get_changed_tables, merge_schema
+from deepdive.schema import (
+    ColumnSchema,
+    ColumnType,
+    DatabaseSchema,
+    ForeignKey,
+    SqlDialect,
+    TableSchema,
+)
+
+
+def _table(name, *columns):
+    return TableSchema(
+        name=name,
+        columns=[
+            ColumnSchema(name=column, column_type=ColumnType.TEXT) for column in columns
+        ],
+    )
+
+
+SCHEMA = DatabaseSchema(
+    sql_dialect=SqlDialect.SNOWFLAKE_SQL,
+    tables=[
+        TableSchema(
+            name="ORDERS",
+            columns=[
+                ColumnSchema(
+                    name="ID", column_type=ColumnType.INT, comment="user comment"
+                ),
+                ColumnSchema(name="USER_ID", column_type=ColumnType.INT),
+            ],
+        ),
+        _table("USERS", "ID", "NAME"),
+        _table("EVENTS", "ID", "USER_ID"),
+    ],
+    primary_keys=["ORDERS.ID", "EVENTS.ID"],
+    foreign_keys=[
+        ForeignKey(primary="USERS.ID", reference="ORDERS.USER_ID"),
+        ForeignKey(primary="USERS.ID", reference="EVENTS.USER_ID"),
+    ],
+)
+
+
+def _version(last_altered, column_count):
+    return {"last_altered": last_altered, "column_count": column_count}
+
+
+class TestSchemaRefresh(unittest.TestCase):
+    def test_changed_tables_without_snapshot(self):
+        self.assertEqual(
+            get_changed_tables(
+                SCHEMA,
+                None,
+                {
+                    "ORDERS": _version("1", 2),
+                    "USERS": _version("1", 3),
+                    "ITEMS": _version("1", 1),
+                },
+            ),
+            {"USERS", "ITEMS"},
+        )
+
+    def test_changed_tables_with_snapshot(self):
+        previous_versions = {"ORDERS": _version("1", 2), "USERS": _version("1", 2)}
+        self.assertEqual(
+            get_changed_tables(
+                SCHEMA,
+                previous_versions,
+                {"ORDERS": _version("2", 2), "USERS": _version("1", 2)},
+            ),
+            {"ORDERS"},
+        )
+
+    def test_merge_keeps_comments_and_keys(self):
+        fetched_orders = TableSchema(
+            name="ORDERS",
+            columns=[
+                ColumnSchema(name="ID", column_type=ColumnType.INT),
+                ColumnSchema(name="USER_ID", column_type=ColumnType.INT),
+                ColumnSchema(name="PRICE", column_type=ColumnType.FLOAT),
+            ],
+        )
+        merged = merge_schema(
+            SCHEMA,
+            [fetched_orders, _table("ITEMS", "ID")],
+            {"ORDERS", "USERS", "ITEMS"},
+        )
+
+        self.assertEqual(
+            [table.name for table in merged.tables], ["ORDERS", "USERS", "ITEMS"]
+        )
+        orders = merged.get_table("ORDERS")
+        self.assertEqual([c.name for c in orders.columns], ["ID", "USER_ID", "PRICE"])
+        self.assertEqual(orders.get_column("ID").comment, "user comment")
+        # keys of the dropped EVENTS table are dropped along with it
+        self.assertEqual(merged.primary_keys, ["ORDERS.ID"])
+        self.assertEqual(
+            merged.foreign_keys,
+            [ForeignKey(primary="USERS.ID", reference="ORDERS.USER_ID")],
+        )
+        # the original schema is left as-is
+        self.assertEqual(len(SCHEMA.tables), 3)
@@ -0,0 +1,94 @@
+import unittest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from asgiref.sync import async_to_sync
+
+from deepdive.gpt.completion_cache import CompletionCache, is_cacheable
+from deepdive.gpt.openai_client import OpenAIClient
+from deepdive.schema import DatabaseSchema, SqlDialect
+
+
+class FakeCompletionCache(CompletionCache):
+    def __init__(self):
+        super().__init__(ttl_seconds=60, max_entries=10)
+        self.entries = {}
+
+    async def get_async(self, key):
+        return self.entries.get(key)
+
+    async def put_async(self, key, model, completion):
+        self.entries[key] = completion
+
+
+class TestCompletionCache(unittest.TestCase):
+    def setUp(self):
+        self.cache = FakeCompletionCache()
+        self.client = OpenAIClient(
+            DatabaseSchema(sql_dialect=SqlDialect.SQLITE, tables=[])
+        )
+        self.client.completion_cache = self.cache
+
+    def test_key_changes_with_inputs(self):
+        key = self.cache.get_key("model", "prompt", {"temperature": 0})
+        self.assertEqual(key, self.cache.get_key("model", "prompt", {"temperature": 0}))
+        self.assertNotEqual(
+            key, self.cache.get_key("other", "prompt", {"temperature": 0})
+        )
+        self.assertNotEqual(
+            key, self.cache.get_key("model", "other", {"temperature": 0})
+        )
+        self.assertNotEqual(
+            key,
+            self.cache.get_key("model", "prompt", {"temperature": 0, "stop": ["Q:"]}),
+        )
+
+    def test_is_cacheable(self):
+        self.assertTrue(is_cacheable({"max_tokens": 600}))
+        self.assertTrue(is_cacheable({"temperature": 0}))
+        self.assertFalse(is_cacheable({"temperature": 0.7}))
+
+    def test_repeated_prompts_are_cached(self):
+        with patch.object(
+            self.client, "complete_prompt_async", AsyncMock(return_value="SELECT 1")
+        ) as complete_prompt_async:
+            for _ in range(0, 2):
+                self.assertEqual(
+                    async_to_sync(self.client.complete_prompt_cached_async)(
+                        "prompt", max_tokens=600
+                    ),
+                    "SELECT 1",
+                )
+            complete_prompt_async.assert_called_once_with(
+                "prompt", temperature=0, max_tokens=600
+            )
+
+    def test_bypasses_cache_with_temperature(self):
+        with patch.object(
+            self.client, "complete_prompt_async", AsyncMock(return_value="SELECT 1")
+        ) as complete_prompt_async:
+            for _ in range(0, 2):
+                async_to_sync(self.client.complete_prompt_cached_async)(
+                    "prompt", temperature=0.7
+                )
+            self.assertEqual(complete_prompt_async.call_count, 2)
+            self.assertEqual(self.cache.entries, {})
+
+    def test_prunes_periodically(self):
+        cache = CompletionCache(
+            ttl_seconds=60, max_entries=10, prune_interval_seconds=60
+        )
+        model = MagicMock()
+        model.objects.aupdate_or_create = AsyncMock()
+        module = "deepdive.gpt.completion_cache"
+        with patch(f"{module}.CompletionCacheEntry", model), patch.object(
+            cache, "_prune_async", AsyncMock()
+        ) as prune_async:
+            with patch(f"{module}.time.monotonic", return_value=100):
+                for key in ("a", "b"):
+                    async_to_sync(cache.put_async)(key, "model", "SELECT 1")
+            prune_async.assert_called_once()
+
+            with patch(f"{module}.time.monotonic", return_value=161):
+                async_to_sync(cache.put_async)("c", "model", "SELECT 1")
+            self.assertEqual(prune_async.call_count, 2)
+            self.assertEqual(model.objects.aupdate_or_create.call_count, 3)
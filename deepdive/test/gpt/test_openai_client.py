@@ -0,0 +1,91 @@
+import unittest
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, patch
+
+from asgiref.sync import async_to_sync
+
+from deepdive.gpt.openai_client import OpenAIClient
+from deepdive.schema import DatabaseSchema, SqlDialect
+
+
+def _chunk(content):
+    return SimpleNamespace(choices=[SimpleNamespace(delta={"content": content})])
+
+
+async def _stream(*contents):
+    for content in contents:
+        yield _chunk(content)
+
+
+class TestOpenAIClient(unittest.TestCase):
+    def setUp(self):
+        self.client = OpenAIClient(
+            DatabaseSchema(sql_dialect=SqlDialect.SQLITE, tables=[])
+        )
+        self.client.completion_cache = SimpleNamespace(
+            get_key=lambda *args: "key",
+            get_async=AsyncMock(return_value=None),
+            put_async=AsyncMock(),
+        )
+
+    def test_streams_partial_queries_until_complete(self):
+        partial_queries = []
+
+        async def on_partial_query(sql_query):
+            partial_queries.append(sql_query)
+
+        stream = _stream(" name", " FROM", " users;", "\nThis query selects")
+        with patch(
+            "deepdive.gpt.openai_client.openai.ChatCompletion.acreate",
+            AsyncMock(return_value=stream),
+        ) as acreate:
+            sql_query = async_to_sync(self.client.construct_query_async)(
+                "who are the users", "", on_partial_query
+            )
+
+        self.assertTrue(acreate.call_args.kwargs["stream"])
+        self.assertEqual(sql_query, "SELECT  name FROM users")
+        self.assertEqual(
+            partial_queries,
+            ["SELECT  name", "SELECT  name FROM", "SELECT  name FROM users"],
+        )
+        self.client.completion_cache.put_async.assert_called_once_with(
+            "key", self.client.model, " name FROM users;"
+        )
+
+    def test_streams_cached_query_at_once(self):
+        self.client.completion_cache.get_async.return_value = " name FROM users"
+        partial_queries = []
+
+        async def on_partial_query(sql_query):
+            partial_queries.append(sql_query)
+
+        sql_query = async_to_sync(self.client.construct_query_async)(
+            "who are the users", "", on_partial_query
+        )
+        self.assertEqual(sql_query, "SELECT  name FROM users")
+        self.assertEqual(partial_queries, ["SELECT  name FROM users"])
+
+    def _construct_query_streamed(self, *contents) -> str:
+        async def on_partial_query(sql_query):
+            pass
+
+        with patch(
+            "deepdive.gpt.openai_client.openai.ChatCompletion.acreate",
+            AsyncMock(return_value=_stream(*contents)),
+        ):
+            return async_to_sync(self.client.construct_query_async)(
+                "who are the users", "", on_partial_query
+            )
+
+    def test_streams_past_quoted_semicolons(self):
+        self._construct_query_streamed(
+            " name FROM users WHERE name = 'a;", "b'", ";", " more"
+        )
+        self.client.completion_cache.put_async.assert_called_once_with(
+            "key", self.client.model, " name FROM users WHERE name = 'a;b';"
+        )
+
+    def test_does_not_cache_invalid_query_stopped_early(self):
+        self._construct_query_streamed(" name FROM users WHERE name = 'a", "\nQ:")
+        self.client.completion_cache.put_async.assert_not_called()
@@ -0,0 +1,65 @@
+import unittest
+
+from deepdive.gpt.prompter import Prompter
+from deepdive.gpt.schema_index import SchemaIndex, tokenize
+from deepdive.schema import (
+    ColumnSchema,
+    ColumnType,
+    DatabaseSchema,
+    ForeignKey,
+    SqlDialect,
+    TableSchema,
+)
+
+
+def _table(name, *columns):
+    return TableSchema(
+        name=name,
+        columns=[
+            ColumnSchema(name=column, column_type=ColumnType.TEXT) for column in columns
+        ],
+    )
+
+
+SCHEMA = DatabaseSchema(
+    sql_dialect=SqlDialect.SNOWFLAKE_SQL,
+    tables=[
+        _table("CUSTOMERS", "C_CUSTKEY", "C_NAME", "C_NATIONKEY"),
+        _table("ORDERS", "O_ORDERKEY", "O_CUSTKEY", "O_TOTALPRICE", "O_ORDERDATE"),
+        _table("NATION", "N_NATIONKEY", "N_NAME"),
+        _table("PAGE_VIEWS", "URL", "VIEWED_AT"),
+    ]
+    + [_table(f"AUDIT_LOG_{i}", "EVENT", "CREATED_AT") for i in range(0, 30)],
+    foreign_keys=[
+        ForeignKey(primary="CUSTOMERS.C_CUSTKEY", reference="ORDERS.O_CUSTKEY"),
+        ForeignKey(primary="CUSTOMERS.C_NATIONKEY", reference="NATION.N_NATIONKEY"),
+    ],
+)
+
+
+class TestSchemaIndex(unittest.TestCase):
+    def test_tokenize(self):
+        self.assertEqual(tokenize("orderDate"), ["order", "date"])
+        self.assertEqual(tokenize("ORDER_DATES"), ["order", "date"])
+        self.assertEqual(tokenize(None), [])
+
+    def test_search_ranks_relevant_tables(self):
+        index = SchemaIndex(SCHEMA)
+        self.assertEqual(index.search("total price of orders by date")[0][0], "ORDERS")
+        self.assertEqual(index.search("most viewed page urls")[0][0], "PAGE_VIEWS")
+
+    def test_select_tables_includes_foreign_key_neighbours(self):
+        index = SchemaIndex(SCHEMA)
+        tables = index.select_tables("which nation has the most", 1, 2000)
+        self.assertEqual([table.name for table in tables], ["CUSTOMERS", "NATION"])
+
+    def test_select_tables_within_token_budget(self):
+        index = SchemaIndex(SCHEMA)
+        tables = index.select_tables("audit log events", 30, 50)
+        self.assertLess(len(tables), 30)
+        self.assertTrue(all(table.name.startswith("AUDIT") for table in tables))
+
+    def test_prompt_only_describes_relevant_tables(self):
+        prompt = Prompter(SCHEMA).construct_query_prompt("total price of orders", "")
+        self.assertIn("ORDERS(", prompt)
+        self.assertNotIn("AUDIT_LOG_0(", prompt)
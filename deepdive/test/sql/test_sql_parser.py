@@ -693,3 +693,12 @@ SELECT COUNT(*) FROM EmployeeData WHERE Hire_Date < (SELECT Hire_Date FROM Emplo
             ),
             parse_sql(query),
         )
+
+    def test_get_table_names(self):
+        query = """
+select * from customer c join orders o on c.id = o.id
+where o.amount > (select avg(amount) from lineitem)
+"""
+        table_names = parse_sql(query).get_table_names()
+        self.assertTrue({"customer", "orders", "lineitem"} <= table_names)
+        self.assertNotIn("c", table_names)
@@ -0,0 +1,68 @@
+import json
+import unittest
+import uuid
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pandas as pd
+from asgiref.sync import async_to_sync
+
+from deepdive.consumers import RequestProcessor
+from deepdive.deepdive_client import DeepDiveResponse
+from deepdive.models import Message
+
+TEST_DF = pd.DataFrame({"a": [1, 2]})
+
+
+def _create_processor() -> RequestProcessor:
+    # skip __init__ as it requires a persisted Session
+    processor = RequestProcessor.__new__(RequestProcessor)
+    processor.client = MagicMock()
+    processor.pending_saves = []
+    return processor
+
+
+class TestRequestProcessor(unittest.TestCase):
+    def setUp(self):
+        self.message = Message(id=uuid.uuid4(), session_id=uuid.uuid4())
+        module = "deepdive.consumers.Message.objects"
+        patchers = [
+            patch(f"{module}.aget", AsyncMock(return_value=self.message)),
+            patch.object(Message, "asave", AsyncMock()),
+        ]
+        for patcher in patchers:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    async def _process_sql_query_async(self, processor: RequestProcessor, response):
+        processor.client.process_query_async = AsyncMock(return_value=response)
+        request = {
+            "action": "process_sql_query",
+            "message_id": str(self.message.id),
+            "sql_query": "SELECT a FROM t",
+        }
+        return json.loads(await processor.process_async(json.dumps(request)))
+
+    def test_failed_query_clears_previous_data(self):
+        processor = _create_processor()
+
+        async def process_queries_async():
+            succeeded = await self._process_sql_query_async(
+                processor,
+                DeepDiveResponse(sql_query="SELECT a FROM t", dataframe=TEST_DF),
+            )
+            failed = await self._process_sql_query_async(
+                processor,
+                DeepDiveResponse(
+                    sql_query="SELECT b FROM t", error_message="no such column"
+                ),
+            )
+            await processor._wait_for_saves_async()
+            return succeeded, failed
+
+        succeeded, failed = async_to_sync(process_queries_async)()
+        self.assertEqual(
+            succeeded["data"]["data"], TEST_DF.to_json(orient="table", index=True)
+        )
+        self.assertEqual(failed["error_message"], "no such column")
+        self.assertIsNone(failed["data"]["data"])
+        self.assertIsNone(self.message.data)
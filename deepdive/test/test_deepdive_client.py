@@ -0,0 +1,76 @@
+import asyncio
+import threading
+import unittest
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+from asgiref.sync import async_to_sync
+
+from deepdive.database.executor import ExecutorMetrics, PinnedExecutor
+from deepdive.deepdive_client import DeepDiveClient, _get_database_version
+
+
+def _create_client() -> DeepDiveClient:
+    # skip __init__ as it requires a persisted Database
+    client = DeepDiveClient.__new__(DeepDiveClient)
+    client.session = SimpleNamespace(database=SimpleNamespace(id="db"))
+    client.db_client = None
+    client.db_client_future = None
+    client.executor = PinnedExecutor("test", ExecutorMetrics("test"))
+    return client
+
+
+class TestDeepDiveClient(unittest.TestCase):
+    def test_finalizes_client_created_after_disconnect(self):
+        client = _create_client()
+        db_client = MagicMock()
+        started = threading.Event()
+        created = threading.Event()
+
+        def get_db_client(database, on_progress):
+            started.set()
+            created.wait()
+            return db_client
+
+        async def disconnect_while_initializing():
+            initialize_task = asyncio.create_task(client.initialize_async())
+            await asyncio.get_running_loop().run_in_executor(None, started.wait)
+            initialize_task.cancel()
+
+            finalize_task = asyncio.create_task(client.finalize_async())
+            await asyncio.sleep(0)
+            db_client.finalize.assert_not_called()
+            created.set()
+            await finalize_task
+
+        with patch("deepdive.deepdive_client.get_db_client", get_db_client):
+            async_to_sync(disconnect_while_initializing)()
+        db_client.finalize.assert_called_once()
+
+    def test_finalize_after_failed_initialization(self):
+        client = _create_client()
+
+        async def initialize_and_finalize():
+            with self.assertRaises(ValueError):
+                await client.initialize_async()
+            await client.finalize_async()
+
+        with patch(
+            "deepdive.deepdive_client.get_db_client", side_effect=ValueError("bad")
+        ):
+            async_to_sync(initialize_and_finalize)()
+
+    def test_database_version_ignores_profiles(self):
+        schema = '{"tables": [{"name": "t", "columns": [{"name": "c"}]}]}'
+        profiled_schema = (
+            '{"tables": [{"name": "t", "columns": [{"name": "c", "profile": {}}],'
+            ' "profile": {"row_count": 1}}]}'
+        )
+        other_schema = '{"tables": [{"name": "t", "columns": [{"name": "d"}]}]}'
+        db_client = SimpleNamespace(materialized_key="key")
+
+        def get_version(schema: str) -> str:
+            return _get_database_version(SimpleNamespace(schema=schema), db_client)
+
+        self.assertEqual(get_version(schema), get_version(profiled_schema))
+        self.assertNotEqual(get_version(schema), get_version(other_schema))
@@ -0,0 +1,64 @@
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from deepdive.helper import get_column_to_types
+from deepdive.schema import ColumnType
+
+
+class TestHelper(unittest.TestCase):
+    def test_get_column_to_types(self):
+        df = pd.DataFrame(
+            {
+                "user_id": [1, 2, 3, 4],
+                "amount": [1.5, 2.0, None, 4.0],
+                "quantity": [1, 2, 3, 4],
+                "created_at": ["2023-01-01", "2023-01-02", None, "Jan 4, 2023"],
+                "active": [True, False, None, True],
+                "count": [1, "2", None, 4],
+                "price": ["1.5", 2, "3", None],
+                "name": ["a", "b", "c", "2023-01-01"],
+            }
+        )
+        self.assertEqual(
+            get_column_to_types(df),
+            {
+                "user_id": ColumnType.ID,
+                "amount": ColumnType.FLOAT,
+                "quantity": ColumnType.INT,
+                "created_at": ColumnType.DATE,
+                "active": ColumnType.BOOLEAN,
+                "count": ColumnType.INT,
+                "price": ColumnType.FLOAT,
+                "name": ColumnType.TEXT,
+            },
+        )
+
+    def test_mixed_columns(self):
+        dates = pd.date_range("2023-01-01", periods=100).strftime("%Y-%m-%d")
+        numbers = [str(i) for i in range(100)]
+        df = pd.DataFrame(
+            {
+                "mostly_dates": list(dates[:98]) + ["unknown", "n/a"],
+                "some_dates": list(dates[:90]) + ["unknown"] * 10,
+                "mostly_numbers": numbers[:98] + ["unknown", "n/a"],
+                "empty": [None] * 100,
+            }
+        )
+        self.assertEqual(
+            get_column_to_types(df),
+            {
+                "mostly_dates": ColumnType.DATE,
+                "some_dates": ColumnType.TEXT,
+                "mostly_numbers": ColumnType.INT,
+                "empty": ColumnType.TEXT,
+            },
+        )
+
+    def test_sampled(self):
+        # text only in the last rows, which the sample draws from
+        values = np.array(["2023-01-01"] * 100000, dtype=object)
+        values[-10000:] = "text"
+        df = pd.DataFrame({"value": values})
+        self.assertEqual(get_column_to_types(df), {"value": ColumnType.TEXT})
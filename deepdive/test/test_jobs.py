@@ -0,0 +1,88 @@
+import threading
+import unittest
+from unittest.mock import MagicMock, patch
+
+from django.test import override_settings
+from django.utils import timezone
+
+from deepdive.jobs import JobStatus, JobType, _fail_job, _fail_stale_jobs, run_job
+
+
+def _create_job(job_type: str, depends_on=None) -> MagicMock:
+    job = MagicMock(
+        job_type=job_type,
+        status=JobStatus.PENDING,
+        attempts=1,
+        max_attempts=1,
+        children=[],
+    )
+    job.dependents.exclude.side_effect = lambda status: [
+        child for child in job.children if child.status != status
+    ]
+    if depends_on:
+        depends_on.children.append(job)
+    return job
+
+
+class TestJobs(unittest.TestCase):
+    def test_fail_job_fails_dependents_transitively(self):
+        fetch_schema = _create_job(JobType.FETCH_SCHEMA)
+        generate_foreign_keys = _create_job(
+            JobType.GENERATE_FOREIGN_KEYS, depends_on=fetch_schema
+        )
+        profile_schema = _create_job(
+            JobType.PROFILE_SCHEMA, depends_on=generate_foreign_keys
+        )
+
+        _fail_job(fetch_schema, "error")
+
+        for job in (fetch_schema, generate_foreign_keys, profile_schema):
+            self.assertEqual(job.status, JobStatus.FAILED)
+            job.save.assert_called_once()
+        self.assertEqual(profile_schema.error_message, "fetch_schema failed")
+
+    def test_fail_job_retries(self):
+        job = _create_job(JobType.FETCH_SCHEMA)
+        dependent = _create_job(JobType.GENERATE_FOREIGN_KEYS, depends_on=job)
+        job.max_attempts = 3
+
+        _fail_job(job, "error")
+
+        self.assertEqual(job.status, JobStatus.PENDING)
+        self.assertEqual(dependent.status, JobStatus.PENDING)
+
+    @override_settings(JOB_HEARTBEAT_SECONDS=0.01)
+    def test_run_job_sends_heartbeats(self):
+        job = _create_job(JobType.FETCH_SCHEMA)
+        heartbeats = threading.Semaphore(0)
+
+        def fetch_schema(database):
+            # returns once the job was updated twice while running
+            for _ in range(2):
+                self.assertTrue(heartbeats.acquire(timeout=5))
+
+        with patch("deepdive.jobs.DatabaseJob") as model, patch.dict(
+            "deepdive.jobs.JOB_HANDLERS", {JobType.FETCH_SCHEMA: fetch_schema}
+        ), patch("deepdive.jobs.close_old_connections"):
+            update = model.objects.filter.return_value.update
+            update.side_effect = lambda **kwargs: heartbeats.release()
+            run_job(job)
+            update_count = update.call_count
+
+        self.assertEqual(job.status, JobStatus.SUCCEEDED)
+        model.objects.filter.assert_called_with(id=job.id, status=JobStatus.RUNNING)
+        # heartbeats stop with the job
+        self.assertEqual(update.call_count, update_count)
+
+    def test_fail_stale_jobs(self):
+        job = _create_job(JobType.FETCH_SCHEMA)
+        job.status = JobStatus.RUNNING
+        dependent = _create_job(JobType.GENERATE_FOREIGN_KEYS, depends_on=job)
+
+        with patch("deepdive.jobs.DatabaseJob") as model:
+            model.objects.select_for_update.return_value.filter.return_value = [job]
+            _fail_stale_jobs(timezone.now())
+
+        for failed_job in (job, dependent):
+            self.assertEqual(failed_job.status, JobStatus.FAILED)
+        self.assertEqual(job.error_message, "Job timed out")
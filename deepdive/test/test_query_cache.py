@@ -0,0 +1,61 @@
+import unittest
+from unittest.mock import patch
+
+from deepdive.query_cache import QueryResultCache
+
+
+class TestQueryResultCache(unittest.TestCase):
+    def setUp(self):
+        self.cache = QueryResultCache(max_bytes=100, ttls={"csv": 60, "snowflake": 30})
+
+    def test_key_normalizes_query(self):
+        self.assertEqual(
+            self.cache.get_key("db", "v1", "SELECT a FROM t"),
+            self.cache.get_key("db", "v1", "select   a\nfrom t"),
+        )
+        self.assertNotEqual(
+            self.cache.get_key("db", "v1", "select a from t"),
+            self.cache.get_key("db", "v2", "select a from t"),
+        )
+
+    def test_hits_and_misses(self):
+        key = self.cache.get_key("db", "v1", "select a from t")
+        self.assertIsNone(self.cache.get(key))
+        self.cache.put(key, "csv", "result", 10)
+        self.assertEqual(self.cache.get(key), "result")
+        self.assertEqual(
+            self.cache.stats(), {"hits": 1, "misses": 1, "entries": 1, "size": 10}
+        )
+
+    def test_evicts_least_recently_used(self):
+        first, second, third = [
+            self.cache.get_key("db", "v1", f"select {c} from t") for c in "abc"
+        ]
+        self.cache.put(first, "csv", "first", 40)
+        self.cache.put(second, "csv", "second", 40)
+        self.cache.get(first)
+        self.cache.put(third, "csv", "third", 40)
+
+        self.assertEqual(self.cache.get(first), "first")
+        self.assertIsNone(self.cache.get(second))
+        self.assertEqual(self.cache.get(third), "third")
+        self.assertEqual(self.cache.stats()["size"], 80)
+
+    def test_skips_oversized_results(self):
+        key = self.cache.get_key("db", "v1", "select a from t")
+        self.cache.put(key, "csv", "result", 101)
+        self.assertIsNone(self.cache.get(key))
+
+    def test_expires_by_database_type(self):
+        key = self.cache.get_key("db", "v1", "select a from t")
+        with patch("deepdive.query_cache.time.monotonic", return_value=0):
+            self.cache.put(key, "csv", "csv result", 10)
+        with patch("deepdive.query_cache.time.monotonic", return_value=59):
+            self.assertEqual(self.cache.get(key), "csv result")
+        with patch("deepdive.query_cache.time.monotonic", return_value=61):
+            self.assertIsNone(self.cache.get(key))
+
+        with patch("deepdive.query_cache.time.monotonic", return_value=0):
+            self.cache.put(key, "snowflake", "snowflake result", 10)
+        with patch("deepdive.query_cache.time.monotonic", return_value=31):
+            self.assertIsNone(self.cache.get(key))
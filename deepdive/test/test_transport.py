@@ -0,0 +1,71 @@
+import json
+import struct
+import unittest
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+from deepdive.consumers import RequestProcessor
+from deepdive.deepdive_client import DeepDiveResponse
+from deepdive.transport import (
+    ResultData,
+    ResultFormat,
+    encode_binary_frame,
+    to_arrow,
+    to_columnar,
+)
+
+TEST_DF = pd.DataFrame(
+    {
+        "name": ["a", None, "c"],
+        "value": [1.5, np.nan, 3.0],
+        "count": [1, 2, 3],
+    }
+)
+
+
+class TestTransport(unittest.TestCase):
+    def test_to_columnar(self):
+        self.assertEqual(
+            to_columnar(TEST_DF),
+            {
+                "columns": ["name", "value", "count"],
+                "data": [["a", None, "c"], [1.5, None, 3.0], [1, 2, 3]],
+            },
+        )
+
+    def test_to_arrow(self):
+        table = pa.ipc.open_stream(to_arrow(TEST_DF)).read_all()
+        self.assertEqual(table.column_names, ["name", "value", "count"])
+        self.assertEqual(table.column("name").to_pylist(), ["a", None, "c"])
+        self.assertEqual(table.column("count").to_pylist(), [1, 2, 3])
+
+    def test_to_arrow_mixed_types(self):
+        table = pa.ipc.open_stream(
+            to_arrow(pd.DataFrame({"mixed": [1, "a", None]}))
+        ).read_all()
+        self.assertEqual(table.column("mixed").to_pylist(), ["1", "a", None])
+
+    def test_encode_binary_frame(self):
+        frame = encode_binary_frame({"status": 200}, b"payload")
+        (length,) = struct.unpack(">I", frame[:4])
+        self.assertEqual(json.loads(frame[4 : 4 + length]), {"status": 200})
+        self.assertEqual(frame[4 + length :], b"payload")
+
+    def test_serialize_response_encodes_json_on_demand(self):
+        processor = RequestProcessor.__new__(RequestProcessor)
+        for result_format in (ResultFormat.COLUMNAR, ResultFormat.ARROW):
+            response = DeepDiveResponse(dataframe=TEST_DF)
+            processor._serialize_response(
+                200, "action", {"data": ResultData(result_format, response)}, ""
+            )
+            self.assertIsNone(response.data)
+
+        response = DeepDiveResponse(dataframe=TEST_DF)
+        serialized = processor._serialize_response(
+            200, "action", {"data": ResultData(ResultFormat.JSON, response)}, ""
+        )
+        # encoded once, for both the response and persisting the result
+        self.assertEqual(json.loads(serialized)["data"]["data"], response.data)
+        self.assertEqual(response.data, TEST_DF.to_json(orient="table", index=True))
@@ -0,0 +1,129 @@
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from deepdive.schema import Breakdown, VizSpec, VizType, XAxis, YAxis
+from deepdive.viz.downsampler import FETCH_LIMIT, downsample, get_fetch_limit
+
+
+def _viz_spec(visualization_type, breakdowns=[], limit=None):
+    return VizSpec(
+        visualization_type=visualization_type,
+        x_axis=XAxis(name="x"),
+        y_axises=[YAxis(name="y")],
+        breakdowns=[Breakdown(name=breakdown) for breakdown in breakdowns],
+        limit=limit,
+    )
+
+
+class TestDownsampler(unittest.TestCase):
+    def test_fetch_limit(self):
+        self.assertEqual(
+            get_fetch_limit(_viz_spec(VizType.LINE, limit=500), 500), FETCH_LIMIT
+        )
+        self.assertEqual(
+            get_fetch_limit(_viz_spec(VizType.LINE, limit=1000), 500), 1000
+        )
+        self.assertIsNone(get_fetch_limit(_viz_spec(VizType.LINE, limit=10), 500))
+        self.assertIsNone(get_fetch_limit(_viz_spec(VizType.BAR, limit=500), 500))
+
+    def test_small_results_are_unchanged(self):
+        df = pd.DataFrame({"x": range(0, 100), "y": range(0, 100)})
+        result, downsampled = downsample(df, _viz_spec(VizType.LINE))
+        self.assertFalse(downsampled)
+        self.assertIs(result, df)
+
+    def test_line_keeps_endpoints_and_peaks(self):
+        y = np.sin(np.linspace(0, 20, 10000))
+        y[5000] = 10
+        df = pd.DataFrame({"x": range(0, 10000), "y": y})
+
+        result, downsampled = downsample(df, _viz_spec(VizType.LINE), max_points=100)
+        self.assertTrue(downsampled)
+        self.assertEqual(len(result), 100)
+        self.assertEqual(result["x"].iloc[0], 0)
+        self.assertEqual(result["x"].iloc[-1], 9999)
+        self.assertIn(5000, result["x"].tolist())
+
+    def test_line_with_breakdowns_and_dates(self):
+        df = pd.DataFrame(
+            {
+                "x": list(pd.date_range("2023-01-01", periods=1000).astype(str)) * 2,
+                "b": ["a"] * 1000 + ["b"] * 1000,
+                "y": range(0, 2000),
+            }
+        )
+        result, downsampled = downsample(
+            df, _viz_spec(VizType.AREA, breakdowns=["b"]), max_points=100
+        )
+        self.assertTrue(downsampled)
+        self.assertLessEqual(len(result), 100)
+        self.assertEqual(result.groupby("b").size().to_dict(), {"a": 50, "b": 50})
+
+    def test_line_with_categorical_x(self):
+        df = pd.DataFrame({"x": [f"c{i}" for i in range(0, 1000)], "y": range(0, 1000)})
+        result, downsampled = downsample(df, _viz_spec(VizType.LINE), max_points=100)
+        self.assertTrue(downsampled)
+        self.assertLessEqual(len(result), 100)
+        self.assertIn(999, result["y"].tolist())
+
+    def test_line_with_categorical_x_and_many_y_axises(self):
+        # 20 series of 50 points, too few per series for a min and max of each y
+        rng = np.random.default_rng(0)
+        df = pd.DataFrame(
+            {
+                "x": [f"c{i}" for i in range(0, 50)] * 20,
+                "b": np.repeat(range(0, 20), 50),
+                **{f"y{i}": rng.random(1000) for i in range(0, 3)},
+            }
+        )
+        viz_spec = _viz_spec(VizType.LINE, breakdowns=["b"]).model_copy(
+            update={"y_axises": [YAxis(name=f"y{i}") for i in range(0, 3)]}
+        )
+        result, downsampled = downsample(df, viz_spec, max_points=100)
+        self.assertTrue(downsampled)
+        self.assertLessEqual(len(result), 100)
+        self.assertEqual(result["b"].nunique(), 20)
+
+    def test_scatter_is_stratified(self):
+        df = pd.DataFrame(
+            {
+                "x": range(0, 10000),
+                "b": ["a"] * 9000 + ["b"] * 1000,
+                "y": range(0, 10000),
+            }
+        )
+        result, downsampled = downsample(
+            df, _viz_spec(VizType.SCATTER, breakdowns=["b"]), max_points=100
+        )
+        self.assertTrue(downsampled)
+        self.assertEqual(result.groupby("b").size().to_dict(), {"a": 90, "b": 10})
+        self.assertTrue(result["x"].is_monotonic_increasing)
+
+    def test_line_with_many_breakdowns(self):
+        # 200 series of 50 points, too many to keep 3 points of each
+        df = pd.DataFrame(
+            {
+                "x": list(range(0, 50)) * 200,
+                "b": np.repeat(range(0, 200), 50),
+                "y": range(0, 10000),
+            }
+        )
+        df = pd.concat([df, pd.DataFrame({"x": range(50, 100), "b": 7, "y": 0})])
+        result, downsampled = downsample(
+            df, _viz_spec(VizType.LINE, breakdowns=["b"]), max_points=100
+        )
+        self.assertTrue(downsampled)
+        self.assertLessEqual(len(result), 100)
+        self.assertEqual(result["b"].nunique(), 33)
+        # the largest series are kept
+        self.assertIn(7, result["b"].tolist())
+
+    def test_scatter_with_many_breakdowns(self):
+        df = pd.DataFrame({"x": range(0, 10000), "b": range(0, 10000), "y": 1})
+        result, downsampled = downsample(
+            df, _viz_spec(VizType.SCATTER, breakdowns=["b"]), max_points=100
+        )
+        self.assertTrue(downsampled)
+        self.assertEqual(len(result), 100)
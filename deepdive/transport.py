@@ -0,0 +1,78 @@
+import enum
+import json
+import struct
+from typing import TYPE_CHECKING, Dict, List
+
+import pyarrow as pa
+from django.core.serializers.json import DjangoJSONEncoder
+from pandas import DataFrame
+
+if TYPE_CHECKING:
+    from deepdive.deepdive_client import DeepDiveResponse
+
+
+class ResultFormat(str, enum.Enum):
+    """
+    Formats query results can be sent over the websocket in.
+
+    JSON: DataFrame.to_json(orient="table") string, as persisted in Message.data
+    COLUMNAR: a JSON object of column names and column values, not string encoded
+    ARROW: an Arrow IPC stream, sent as a binary frame (see encode_binary_frame)
+    """
+
+    JSON = "json"
+    COLUMNAR = "columnar"
+    ARROW = "arrow"
+
+
+class ResultData:
+    """
+    Placeholder for the query result of a response, encoded upon serialization
+    """
+
+    def __init__(self, result_format: ResultFormat, response: "DeepDiveResponse"):
+        self.result_format = result_format
+        self.response = response
+
+    @property
+    def dataframe(self) -> DataFrame:
+        return self.response.dataframe
+
+
+def to_columnar(df: DataFrame) -> Dict[str, List]:
+    # pandas' JSON encoder is considerably faster than converting values in Python
+    # and takes care of NaN / NaT (encoded as null) and dates (ISO strings)
+    return {
+        "columns": [str(column) for column in df.columns],
+        "data": [
+            json.loads(df.iloc[:, i].to_json(orient="values", date_format="iso"))
+            for i in range(0, len(df.columns))
+        ],
+    }
+
+
+def to_arrow(df: DataFrame) -> bytes:
+    try:
+        table = pa.Table.from_pandas(df, preserve_index=False)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        # mixed type object columns can't be converted, fall back to strings
+        df = df.copy()
+        for column in df.select_dtypes("object"):
+            df[column] = df[column].map(
+                lambda value: None if value is None else str(value)
+            )
+        table = pa.Table.from_pandas(df, preserve_index=False)
+
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def encode_binary_frame(envelope: Dict, payload: bytes) -> bytes:
+    """
+    Binary frames are laid out as:
+        [4 byte big-endian envelope length][JSON envelope (utf-8)][payload]
+    """
+    encoded_envelope = json.dumps(envelope, cls=DjangoJSONEncoder).encode()
+    return struct.pack(">I", len(encoded_envelope)) + encoded_envelope + payload
@@ -3,18 +3,19 @@ import json
 from pathlib import Path
 from typing import List
 
-from asgiref.sync import async_to_sync
 import pandas as pd
-from django.core.files.base import ContentFile
+from django.core.files.base import File
 from django.http import HttpResponse
 from django.shortcuts import get_object_or_404
 from rest_framework import generics, status, views, viewsets
+from rest_framework.decorators import action
 from rest_framework.exceptions import ErrorDetail, ValidationError
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.settings import api_settings
 
-from deepdive.database import fetch_schema, preview_table, preview_tables, validate_db
+from deepdive.database import preview_table, preview_tables, validate_db
+from deepdive.database.file_cache import open_cached
 from deepdive.database.file_based_client_helper import (
     get_db_type,
     merge_db_files,
@@ -22,8 +23,11 @@ from deepdive.database.file_based_client_helper import (
     sanitize_table_configs,
     sanitize_table_name,
 )
-from deepdive.gpt import get_gpt_client
-from deepdive.gpt.openai_client import OpenAIClient
+from deepdive.jobs import (
+    enqueue_database_jobs,
+    enqueue_file_conversion,
+    get_database_status,
+)
 from deepdive.models import (
     Database,
     DatabaseFile,
@@ -78,24 +82,14 @@ class DatabaseViewSet(viewsets.ModelViewSet):
                 {api_settings.NON_FIELD_ERRORS_KEY: ErrorDetail(str(e))}
             )
 
-        schema = (
-            sanitize_database_schema(request.data["schema"])
-            if "schema" in request.data
-            else fetch_schema(database)
-        )
-        schema.foreign_keys = get_gpt_client(
-            "zero-shot", "gpt-3.5-turbo", schema
-        ).generate_foreign_keys(schema)
-
-        try:
-            client = OpenAIClient(schema)
-            questions = async_to_sync(client.generate_questions_async)()
-            database.starter_questions = questions
-        except Exception as e:
-            print(f"Failed to generate starter questions: {str(e)}")
-
-        database.schema = schema.model_dump_json(exclude_none=True)
+        # fetching the schema, foreign keys and starter questions take long and are
+        # run by the run_database_jobs command, poll the status action for progress
+        fetch = "schema" not in request.data
+        if not fetch:
+            schema = sanitize_database_schema(request.data["schema"])
+            database.schema = schema.model_dump_json(exclude_none=True)
         database.save()
+        enqueue_database_jobs(database, fetch)
 
         table_configs = json.loads(request.data["table_configs"])
         for database_file_id in database_file_ids:
@@ -111,14 +105,23 @@ class DatabaseViewSet(viewsets.ModelViewSet):
                     configs[table_name]["name"] = updated_table_name
             db_file.configs = json.dumps(configs)
             db_file.save()
+        # Excel files are parsed once into Parquet, as their configs are now final
+        enqueue_file_conversion(database)
 
         headers = self.get_success_headers(serializer.data)
         return Response(
-            DatabaseReadSerializer(database).data,
+            {
+                **DatabaseReadSerializer(database).data,
+                "status": get_database_status(database),
+            },
             status=status.HTTP_201_CREATED,
             headers=headers,
         )
 
+    @action(detail=True, methods=["get"], url_path="status")
+    def job_status(self, request, *args, **kwargs):
+        return Response(get_database_status(self.get_object()))
+
 
 class PreviewTables(views.APIView):
     """
@@ -160,10 +163,8 @@ class MergeTables(views.APIView):
 
         merged_db_file = DatabaseFile(user=self.request.user)
         merged_db_file.save()
-        merged_file = merge_db_files(db_files)
-        merged_db_file.file.save(
-            "DataTable.csv", ContentFile(merged_file.getvalue().encode())
-        )
+        # streamed into storage, e.g, as a multipart upload to S3
+        merged_db_file.file.save("DataTable.csv", File(merge_db_files(db_files)))
 
         previews = preview_tables("csv", merged_db_file.file)
         return Response(
@@ -187,12 +188,16 @@ class UpdateDatabaseFileView(views.APIView):
         sanitized_config = sanitize_table_configs(request.data)
 
         sanitized_orig_table_name = next(iter(sanitized_config))
-        preview = preview_table(
-            db_file.file,
-            sanitized_orig_table_name,
-            sanitized_config[sanitized_orig_table_name],
-        )
+        with open_cached(db_file.file) as file:
+            preview = preview_table(
+                file,
+                sanitized_orig_table_name,
+                sanitized_config[sanitized_orig_table_name],
+            )
         self._save_config(db_file, sanitized_config)
+        if db_file.database:
+            # the file's artifacts are stale until converted for the new configs
+            enqueue_file_conversion(db_file.database)
         return Response(
             {
                 "preview": preview.model_dump(exclude_none=True),
@@ -0,0 +1,227 @@
+from typing import List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from pandas import DataFrame
+
+from deepdive.schema import VizSpec, VizType
+
+# number of points a downsampled visualization is reduced to
+MAX_POINTS = 500
+
+# number of rows fetched for visualizations that are downsampled
+FETCH_LIMIT = 50000
+
+DOWNSAMPLED_VIZ_TYPES = (VizType.LINE, VizType.AREA, VizType.SCATTER)
+
+# number of x-axis quantiles scatter plots are stratified over without breakdowns
+NUM_STRATA = 10
+
+# points a downsampled series keeps, i.e, its endpoints and one point in between
+MIN_POINTS_PER_SERIES = 3
+
+
+def get_fetch_limit(viz_spec: VizSpec, result_limit: int) -> Optional[int]:
+    """
+    Returns the limit to query with so that the result can be downsampled, or None
+    if the viz spec's limit should be used as-is.
+
+    A limit equal to the default result limit was applied automatically and is
+    raised to FETCH_LIMIT, larger user specified limits are capped by it.
+    """
+    if not is_downsampled(viz_spec):
+        return None
+    if viz_spec.limit is None or viz_spec.limit == result_limit:
+        return FETCH_LIMIT
+    if viz_spec.limit > MAX_POINTS:
+        return min(viz_spec.limit, FETCH_LIMIT)
+    return None
+
+
+def is_downsampled(viz_spec: VizSpec) -> bool:
+    return (
+        viz_spec.visualization_type in DOWNSAMPLED_VIZ_TYPES
+        and viz_spec.x_axis is not None
+        and len(viz_spec.y_axises) > 0
+        and not any(y_axis.name == "*" for y_axis in viz_spec.y_axises)
+    )
+
+
+def downsample(
+    df: DataFrame, viz_spec: VizSpec, max_points: int = MAX_POINTS
+) -> Tuple[DataFrame, bool]:
+    """
+    Reduces the result of a line, area or scatter visualization to at most
+    max_points rows while keeping the shape of the full result:
+        - LINE / AREA: Largest-Triangle-Three-Buckets per series, falling back to
+          min / max bucketing if the x axis is not numeric or a date
+        - SCATTER: stratified sampling over breakdown groups or x-axis quantiles
+
+    Lines and areas with too many series to keep MIN_POINTS_PER_SERIES points of
+    each are reduced to their largest series. Rows are returned in their original
+    order, along with whether any were dropped.
+    """
+    if len(df) <= max_points or not is_downsampled(viz_spec):
+        return df, False
+
+    # the compiler selects the x_axis first, then breakdowns and then y_axises
+    num_breakdowns = len(viz_spec.breakdowns)
+    if len(df.columns) != 1 + num_breakdowns + len(viz_spec.y_axises):
+        return df, False
+    x_column = df.columns[0]
+    breakdown_columns = list(df.columns[1 : 1 + num_breakdowns])
+    y_columns = list(df.columns[1 + num_breakdowns :])
+
+    if viz_spec.visualization_type == VizType.SCATTER:
+        indices = _stratified_sample(df, x_column, breakdown_columns, max_points)
+    else:
+        groups = (
+            list(df.groupby(breakdown_columns, sort=False).indices.values())
+            if breakdown_columns
+            else [np.arange(len(df))]
+        )
+        groups = _get_largest_groups(
+            groups, max(max_points // MIN_POINTS_PER_SERIES, 1)
+        )
+        points_per_group = max_points // len(groups)
+        indices = np.concatenate(
+            [
+                positions[
+                    _downsample_series(
+                        df.iloc[positions], x_column, y_columns, points_per_group
+                    )
+                ]
+                for positions in groups
+            ]
+        )
+
+    return df.iloc[np.sort(indices)], True
+
+
+def _downsample_series(
+    series: DataFrame, x_column: str, y_columns: List[str], num_points: int
+) -> np.ndarray:
+    """
+    Returns the positions (within the series) of the points to keep for one series.
+    """
+    x = _to_numeric(series[x_column])
+    y = pd.to_numeric(series[y_columns[0]], errors="coerce")
+    if x is None or y.isna().all():
+        return _min_max_indices(series[y_columns], num_points)
+
+    order = np.argsort(x.to_numpy(), kind="stable")
+    return order[
+        _lttb_indices(
+            x.to_numpy()[order].astype(float),
+            np.nan_to_num(y.to_numpy()[order].astype(float)),
+            num_points,
+        )
+    ]
+
+
+def _to_numeric(column: pd.Series) -> Optional[pd.Series]:
+    if pd.api.types.is_numeric_dtype(column):
+        return column.fillna(0)
+    dates = pd.to_datetime(column, errors="coerce")
+    if dates.isna().any():
+        return None
+    return dates.astype("int64")
+
+
+def _lttb_indices(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+    """
+    Largest-Triangle-Three-Buckets (Steinarsson, 2013): keeps the first and last
+    points and, per bucket, the point forming the largest triangle with the point
+    previously selected and the average of the next bucket.
+    """
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    bucket_size = (n - 2) / (threshold - 2)
+    selected = np.zeros(threshold, dtype=int)
+    a = 0
+    for i in range(0, threshold - 2):
+        start = int(np.floor(i * bucket_size)) + 1
+        end = int(np.floor((i + 1) * bucket_size)) + 1
+        next_end = min(int(np.floor((i + 2) * bucket_size)) + 1, n)
+        avg_x = x[end:next_end].mean()
+        avg_y = y[end:next_end].mean()
+
+        areas = np.abs(
+            (x[a] - avg_x) * (y[start:end] - y[a])
+            - (x[a] - x[start:end]) * (avg_y - y[a])
+        )
+        a = start + int(np.argmax(areas))
+        selected[i + 1] = a
+    selected[-1] = n - 1
+    return selected
+
+
+def _min_max_indices(values: DataFrame, num_points: int) -> np.ndarray:
+    """
+    Splits the rows into buckets and keeps the minimum and maximum of every y column
+    within each bucket. With fewer points than y columns' minimums and maximums, the
+    points kept are evenly spaced among them.
+    """
+    num_columns = len(values.columns)
+    num_buckets = max(num_points // (2 * num_columns), 1)
+    selected = set()
+    for bucket in np.array_split(np.arange(len(values)), num_buckets):
+        if len(bucket) == 0:
+            continue
+        for column in values.columns:
+            column_values = pd.to_numeric(
+                values[column].iloc[bucket], errors="coerce"
+            ).to_numpy(dtype=float)
+            if np.isnan(column_values).all():
+                selected.add(bucket[0])
+                continue
+            selected.add(bucket[np.nanargmin(column_values)])
+            selected.add(bucket[np.nanargmax(column_values)])
+    indices = np.array(sorted(selected), dtype=int)
+    if len(indices) > num_points:
+        indices = indices[
+            np.unique(np.linspace(0, len(indices) - 1, num_points).round().astype(int))
+        ]
+    return indices
+
+
+def _stratified_sample(
+    df: DataFrame, x_column: str, breakdown_columns: List[str], num_points: int
+) -> np.ndarray:
+    if breakdown_columns:
+        strata = df.groupby(breakdown_columns, sort=False).ngroup().to_numpy()
+    else:
+        x = _to_numeric(df[x_column])
+        strata = (
+            pd.qcut(x.rank(method="first"), NUM_STRATA, labels=False).to_numpy()
+            if x is not None
+            else np.zeros(len(df), dtype=int)
+        )
+
+    rng = np.random.default_rng(0)  # deterministic, so re-running a query is stable
+    selected = []
+    for stratum in np.unique(strata):
+        positions = np.flatnonzero(strata == stratum)
+        size = max(int(round(num_points * len(positions) / len(df))), 1)
+        selected.append(rng.choice(positions, min(size, len(positions)), replace=False))
+    selected = np.concatenate(selected)
+    # each stratum keeps at least a point, which may exceed num_points with many
+    if len(selected) > num_points:
+        selected = rng.choice(selected, num_points, replace=False)
+    return selected
+
+
+def _get_largest_groups(groups: List[np.ndarray], max_groups: int) -> List[np.ndarray]:
+    """
+    Returns the max_groups largest groups, in their original order
+    """
+    if len(groups) <= max_groups:
+        return groups
+    largest = sorted(
+        np.argsort([-len(positions) for positions in groups], kind="stable")[
+            :max_groups
+        ]
+    )
+    return [groups[i] for i in largest]
@@ -163,6 +163,79 @@ AWS_S3_REGION_NAME = "REDACTED"
 AWS_SES_REGION_NAME = "REDACTED"
 AWS_SES_REGION_ENDPOINT = "REDACTED"
 
+# materialized SQLite DBs for file based databases, shared across sessions
+MATERIALIZED_DB_CACHE_DIRECTORY = os.path.join("local_dbs", "materialized")
+MATERIALIZED_DB_CACHE_MAX_BYTES = int(
+    os.environ.get("MATERIALIZED_DB_CACHE_MAX_BYTES", 10 * 1024**3)
+)
+# worker threads loading tables into materialized DBs, shared by all databases
+MATERIALIZATION_MAX_WORKERS = int(os.environ.get("MATERIALIZATION_MAX_WORKERS", 4))
+
+# DatabaseFiles downloaded from storage, shared across sessions
+FILE_CACHE_DIRECTORY = os.path.join("local_dbs", "files")
+FILE_CACHE_MAX_BYTES = int(os.environ.get("FILE_CACHE_MAX_BYTES", 10 * 1024**3))
+
+# worker threads per remote database type, file based DBs get a thread per session
+DB_EXECUTOR_MAX_WORKERS = {
+    "snowflake": int(os.environ.get("SNOWFLAKE_EXECUTOR_MAX_WORKERS", 8)),
+    "bigquery": int(os.environ.get("BIGQUERY_EXECUTOR_MAX_WORKERS", 8)),
+}
+
+# query results cached per process, TTLs by database type override the defaults
+QUERY_CACHE_MAX_BYTES = int(os.environ.get("QUERY_CACHE_MAX_BYTES", 256 * 1024**2))
+QUERY_CACHE_TTL_SECONDS = {
+    "snowflake": int(os.environ.get("SNOWFLAKE_QUERY_CACHE_TTL_SECONDS", 5 * 60)),
+    "bigquery": int(os.environ.get("BIGQUERY_QUERY_CACHE_TTL_SECONDS", 5 * 60)),
+}
+
+# number of report visualizations generated concurrently per session
+REPORT_CONCURRENCY = int(os.environ.get("REPORT_CONCURRENCY", 4))
+
+# persistent cache of deterministic (temperature 0) LLM completions
+COMPLETION_CACHE_TTL_SECONDS = int(
+    os.environ.get("COMPLETION_CACHE_TTL_SECONDS", 7 * 24 * 60 * 60)
+)
+COMPLETION_CACHE_MAX_ENTRIES = int(
+    os.environ.get("COMPLETION_CACHE_MAX_ENTRIES", 100000)
+)
+COMPLETION_CACHE_PRUNE_INTERVAL_SECONDS = int(
+    os.environ.get("COMPLETION_CACHE_PRUNE_INTERVAL_SECONDS", 10 * 60)
+)
+
+# query prompts for schemas with more tables only describe the relevant tables
+SCHEMA_PRUNING_MIN_TABLES = int(os.environ.get("SCHEMA_PRUNING_MIN_TABLES", 20))
+SCHEMA_PRUNING_TOP_K = int(os.environ.get("SCHEMA_PRUNING_TOP_K", 8))
+SCHEMA_PRUNING_MAX_TOKENS = int(os.environ.get("SCHEMA_PRUNING_MAX_TOKENS", 2000))
+
+# running database jobs are updated by their worker every JOB_HEARTBEAT_SECONDS, and
+# re-run by another worker once not updated for STALE_JOB_SECONDS
+STALE_JOB_SECONDS = int(os.environ.get("STALE_JOB_SECONDS", 15 * 60))
+JOB_HEARTBEAT_SECONDS = int(os.environ.get("JOB_HEARTBEAT_SECONDS", 60))
+
+# threads fetching table metadata when it can't be scanned in bulk
+SCHEMA_FETCH_MAX_WORKERS = int(os.environ.get("SCHEMA_FETCH_MAX_WORKERS", 8))
+
+# remote database schemas are refreshed at most once per interval
+SCHEMA_REFRESH_INTERVAL_SECONDS = int(
+    os.environ.get("SCHEMA_REFRESH_INTERVAL_SECONDS", 60 * 60)
+)
+
+# indexes built on materialized file DBs from their query workload, 0 to disable
+INDEX_ADVISOR_MAX_INDEXES = int(os.environ.get("INDEX_ADVISOR_MAX_INDEXES", 8))
+
+# bytes of materialized SQLite DBs memory mapped and cached, per connection
+SQLITE_MMAP_SIZE = int(os.environ.get("SQLITE_MMAP_SIZE", 256 * 1024**2))
+SQLITE_CACHE_SIZE = int(os.environ.get("SQLITE_CACHE_SIZE", 64 * 1024**2))
+
+# rows of CSV files parsed and loaded at a time, bounding memory used per load
+CSV_CHUNK_SIZE = int(os.environ.get("CSV_CHUNK_SIZE", 100000))
+
+# "pandas" or "pyarrow", see deepdive.database.csv_reader
+CSV_READER_BACKEND = os.environ.get("CSV_READER_BACKEND", "pandas")
+
+# rows sampled per table when profiling Snowflake and BigQuery DBs, 0 to not profile
+REMOTE_PROFILE_SAMPLE_ROWS = int(os.environ.get("REMOTE_PROFILE_SAMPLE_ROWS", 0))
+
 # Database
 # https://docs.djangoproject.com/en/3.2/ref/settings/#databases
 